@@ -0,0 +1,287 @@
+"""
+Offline detector benchmark: feed a video file or an image directory (optionally with YOLO-format labels)
+through one or more DetectorConfig variants and report latency, throughput, CPU time and accuracy.
+
+    python -m app.benchmark --images Yolo_face_recognition_trained_50/images/val \
+        --config model=hog,upsample=0 --config model=hog,upsample=1,resize_width=320 --json bench.json
+"""
+
+import argparse
+import json
+import logging
+import time
+from dataclasses import asdict, fields, replace
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import DetectorConfig
+from .detector import Detection, box_iou, create_detector
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+# (name, BGR frame, ground-truth xyxy boxes in pixels or None when unlabeled)
+Sample = Tuple[str, np.ndarray, Optional[np.ndarray]]
+
+
+def load_yolo_labels(path: Path, width: int, height: int) -> np.ndarray:
+    """YOLO txt (cls cx cy w h, normalized) -> (N, 4) xyxy pixel boxes. Missing file means no faces."""
+    if not path.exists():
+        return np.empty((0, 4))
+    rows = [line.split() for line in path.read_text().splitlines() if line.strip()]
+    if not rows:
+        return np.empty((0, 4))
+    arr = np.asarray(rows, dtype=np.float64)[:, 1:5]
+    cx, cy, w, h = arr[:, 0] * width, arr[:, 1] * height, arr[:, 2] * width, arr[:, 3] * height
+    return np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+
+def iter_image_dir(images: Path, labels: Optional[Path] = None) -> Iterator[Sample]:
+    if labels is None:
+        guess = Path(str(images).replace("images", "labels"))
+        labels = guess if guess != images and guess.is_dir() else None
+    for path in sorted(p for p in images.iterdir() if p.suffix.lower() in IMAGE_EXTS):
+        frame = cv2.imread(str(path))
+        if frame is None:
+            log.warning("Cannot read %s", path)
+            continue
+        gt = None
+        if labels is not None:
+            gt = load_yolo_labels(labels / (path.stem + ".txt"), frame.shape[1], frame.shape[0])
+        yield path.name, frame, gt
+
+
+def iter_video(path: Path) -> Iterator[Sample]:
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video {path}")
+    idx = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield f"{path.name}#{idx}", frame, None
+            idx += 1
+    finally:
+        cap.release()
+
+
+def match_detections(dets: List[Detection], gt: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+    """Greedy (highest confidence first) matching; returns a true-positive flag per detection."""
+    tp = np.zeros(len(dets), dtype=bool)
+    if not dets or len(gt) == 0:
+        return tp
+    order = np.argsort([-d.conf for d in dets], kind="stable")
+    ious = box_iou(np.array([dets[i].bbox for i in order]), gt)
+    taken = np.zeros(len(gt), dtype=bool)
+    for row, det_idx in enumerate(order):
+        cand = np.where(~taken, ious[row], -1.0)
+        best = int(cand.argmax())
+        if cand[best] >= iou_threshold:
+            taken[best] = True
+            tp[det_idx] = True
+    return tp
+
+
+def average_precision(confs: np.ndarray, tp: np.ndarray, n_gt: int) -> float:
+    """All-point interpolated AP (VOC/COCO style) from per-detection confidences and TP flags."""
+    if n_gt == 0 or len(confs) == 0:
+        return 0.0
+    order = np.argsort(-confs, kind="stable")
+    tp_sorted = tp[order].astype(np.float64)
+    tp_cum = np.cumsum(tp_sorted)
+    fp_cum = np.cumsum(1.0 - tp_sorted)
+    recall = tp_cum / n_gt
+    precision = tp_cum / np.maximum(tp_cum + fp_cum, 1e-9)
+    mrec = np.concatenate([[0.0], recall, [1.0]])
+    mpre = np.concatenate([[1.0], precision, [0.0]])
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    idx = np.where(mrec[1:] != mrec[:-1])[0]
+    return float(np.sum((mrec[idx + 1] - mrec[idx]) * mpre[idx + 1]))
+
+
+def latency_summary(latencies_s: Iterable[float]) -> Dict[str, float]:
+    arr = np.asarray(list(latencies_s), dtype=np.float64) * 1000.0
+    if arr.size == 0:
+        return {"mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p90, p99 = np.percentile(arr, [50, 90, 99])
+    return {"mean": float(arr.mean()), "p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(arr.max())}
+
+
+def evaluate(
+    detector: Callable[[np.ndarray], List[Detection]],
+    samples: Iterable[Sample],
+    warmup: int = 1,
+    iou_threshold: float = 0.5,
+    max_frames: int = 0,
+    batch_size: int = 1,
+) -> Dict[str, object]:
+    """
+    Run detector over samples; accuracy fields are only filled when samples carry labels.
+    With batch_size > 1 frames go through detector.detect_batch and each frame in a batch is charged
+    an equal share of the batch latency.
+    """
+    batched = batch_size > 1 and hasattr(detector, "detect_batch")
+    latencies: List[float] = []
+    confs: List[float] = []
+    tps: List[bool] = []
+    n_gt = 0
+    labeled = False
+    frames = 0
+    hits = 0  # frames with at least one detection (accuracy proxy for unlabeled clips)
+    wall = 0.0
+    cpu = 0.0
+    pending: List[Tuple[np.ndarray, Optional[np.ndarray]]] = []
+
+    def run(batch: List[Tuple[np.ndarray, Optional[np.ndarray]]]) -> None:
+        nonlocal n_gt, labeled, frames, hits, wall, cpu
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        if batched:
+            results = detector.detect_batch([frame for frame, _ in batch])
+        else:
+            results = [detector(batch[0][0])]
+        elapsed = time.perf_counter() - start
+        cpu += time.process_time() - cpu_start
+        wall += elapsed
+        latencies.extend([elapsed / len(batch)] * len(batch))
+        frames += len(batch)
+        hits += sum(1 for dets in results if dets)
+        for (_, gt), dets in zip(batch, results):
+            if gt is not None:
+                labeled = True
+                n_gt += len(gt)
+                tps.extend(match_detections(dets, gt, iou_threshold).tolist())
+                confs.extend(d.conf for d in dets)
+
+    for i, (_, frame, gt) in enumerate(samples):
+        if max_frames and frames + len(pending) >= max_frames:
+            break
+        if i == 0:
+            # First calls pay model load / allocation; warm up on the first frame without consuming it
+            for _ in range(warmup):
+                detector(frame)
+        pending.append((frame, gt))
+        if len(pending) >= (batch_size if batched else 1):
+            run(pending)
+            pending = []
+    if pending:
+        run(pending)
+
+    report: Dict[str, object] = {
+        "frames": frames,
+        "latency_ms": latency_summary(latencies),
+        "throughput_fps": frames / wall if wall > 0 else 0.0,
+        "cpu_s": cpu,
+        "cpu_per_frame_ms": cpu / frames * 1000.0 if frames else 0.0,
+        "hit_rate": hits / frames if frames else 0.0,
+    }
+    if labeled:
+        tp_arr = np.asarray(tps, dtype=bool)
+        n_tp = int(tp_arr.sum())
+        report.update(
+            {
+                "n_gt": n_gt,
+                "tp": n_tp,
+                "fp": int(len(tp_arr) - n_tp),
+                "precision": n_tp / len(tp_arr) if len(tp_arr) else 0.0,
+                "recall": n_tp / n_gt if n_gt else 0.0,
+                "map50": average_precision(np.asarray(confs, dtype=np.float64), tp_arr, n_gt),
+            }
+        )
+    return report
+
+
+def parse_overrides(spec: str, base: DetectorConfig) -> DetectorConfig:
+    """'model=hog,upsample=0' -> copy of base with those DetectorConfig fields replaced."""
+    types = {f.name: f.type for f in fields(base)}
+    changes = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, raw = item.partition("=")
+        if key not in types:
+            raise ValueError(f"Unknown DetectorConfig field: {key}")
+        typ = types[key]
+        if typ is bool:
+            changes[key] = raw.lower() in ("1", "true", "yes", "on")
+        else:
+            changes[key] = typ(raw)
+    return replace(base, **changes)
+
+
+def run_benchmark(
+    source: Callable[[], Iterable[Sample]],
+    configs: List[Tuple[str, DetectorConfig]],
+    warmup: int = 1,
+    max_frames: int = 0,
+    batch_size: int = 1,
+) -> List[Dict[str, object]]:
+    results = []
+    for name, det_cfg in configs:
+        log.info("Benchmarking %s", name)
+        detector = create_detector(det_cfg)
+        report = evaluate(detector, source(), warmup=warmup, max_frames=max_frames, batch_size=batch_size)
+        report = {"name": name, "detector": asdict(det_cfg), **report}
+        results.append(report)
+    return results
+
+
+def format_table(results: List[Dict[str, object]]) -> str:
+    lines = [f"{'config':40s} {'p50ms':>8s} {'p90ms':>8s} {'fps':>7s} {'cpu/f':>7s} {'prec':>6s} {'rec':>6s} {'mAP50':>6s}"]
+    for r in results:
+        lat = r["latency_ms"]
+        acc = [f"{r[k]:6.3f}" if k in r else f"{'-':>6s}" for k in ("precision", "recall", "map50")]
+        lines.append(
+            f"{r['name'][:40]:40s} {lat['p50']:8.1f} {lat['p90']:8.1f} {r['throughput_fps']:7.1f} "
+            f"{r['cpu_per_frame_ms']:7.1f} {' '.join(acc)}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Offline detector latency/accuracy benchmark.")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--video", type=str, help="Video file to replay.")
+    src.add_argument("--images", type=str, help="Image directory (YOLO layout, e.g. .../images/val).")
+    p.add_argument("--labels", type=str, default=None, help="YOLO label directory (default: images -> labels).")
+    p.add_argument(
+        "--config",
+        action="append",
+        default=[],
+        help="DetectorConfig overrides, e.g. model=hog,upsample=0. Repeat to compare configurations.",
+    )
+    p.add_argument("--warmup", type=int, default=1, help="Untimed detector calls on the first frame.")
+    p.add_argument("--max-frames", type=int, default=0, help="Stop after this many timed frames (0 = all).")
+    p.add_argument("--batch", type=int, default=1, help="Frames per detect_batch call (1 = per-frame calls).")
+    p.add_argument("--json", type=str, default=None, help="Write the machine-readable report here.")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+    if args.video:
+        video = Path(args.video)
+        source = lambda: iter_video(video)  # noqa: E731
+        source_name = str(video)
+    else:
+        images = Path(args.images)
+        labels = Path(args.labels) if args.labels else None
+        source = lambda: iter_image_dir(images, labels)  # noqa: E731
+        source_name = str(images)
+    base = DetectorConfig()
+    specs = args.config or [""]
+    configs = [(spec or "default", parse_overrides(spec, base)) for spec in specs]
+    results = run_benchmark(source, configs, warmup=args.warmup, max_frames=args.max_frames, batch_size=args.batch)
+    print(format_table(results))
+    if args.json:
+        Path(args.json).write_text(json.dumps({"source": source_name, "results": results}, indent=2))
+        log.info("Wrote %s", args.json)
+
+
+if __name__ == "__main__":
+    main()
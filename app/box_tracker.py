@@ -0,0 +1,104 @@
+import logging
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .detector import Detection
+
+log = logging.getLogger(__name__)
+
+
+class LKBoxTracker:
+    """
+    Cheap single-face tracker: pyramidal Lucas-Kanade optical flow on corners inside the face box.
+    Seeded from a detection, then advanced on every frame; confidence is the share of seed points
+    that still pass a forward-backward consistency check.
+    """
+
+    def __init__(self, work_width: int = 320, max_points: int = 40, fb_threshold_px: float = 1.0):
+        self.work_width = work_width
+        self.max_points = max_points
+        self.fb_threshold_px = fb_threshold_px
+        self._lk_params = dict(
+            winSize=(15, 15),
+            maxLevel=2,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03),
+        )
+        self._prev_gray: Optional[np.ndarray] = None
+        self._points: Optional[np.ndarray] = None
+        self._box: Optional[np.ndarray] = None  # x1, y1, x2, y2 in work (downscaled) coordinates
+        self._scale = 1.0
+        self._n_seed = 0
+        self.confidence = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self._box is not None
+
+    def reset(self) -> None:
+        self._prev_gray = None
+        self._points = None
+        self._box = None
+        self._n_seed = 0
+        self.confidence = 0.0
+
+    def _gray(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        self._scale = self.work_width / w if self.work_width and w > self.work_width else 1.0
+        if self._scale != 1.0:
+            frame = cv2.resize(frame, (self.work_width, max(1, int(h * self._scale))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def init(self, frame: np.ndarray, bbox: Tuple[float, float, float, float]) -> bool:
+        gray = self._gray(frame)
+        box = np.asarray(bbox, dtype=np.float32) * self._scale
+        x1, y1, x2, y2 = box
+        # Seed inside a slightly shrunk box to keep background corners out
+        mx, my = (x2 - x1) * 0.1, (y2 - y1) * 0.1
+        mask = np.zeros_like(gray)
+        mask[max(0, int(y1 + my)) : max(0, int(y2 - my)), max(0, int(x1 + mx)) : max(0, int(x2 - mx))] = 255
+        points = cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, 3, mask=mask)
+        if points is None or len(points) < 4:
+            self.reset()
+            return False
+        self._prev_gray = gray
+        self._points = points
+        self._box = box
+        self._n_seed = len(points)
+        self.confidence = 1.0
+        return True
+
+    def update(self, frame: np.ndarray) -> Optional[Detection]:
+        if self._box is None:
+            return None
+        gray = self._gray(frame)
+        p0 = self._points
+        p1, st, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, p0, None, **self._lk_params)
+        p0r, st_back, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, p1, None, **self._lk_params)
+        fb_err = np.abs(p0 - p0r).reshape(-1, 2).max(axis=1)
+        good = (st.ravel() == 1) & (st_back.ravel() == 1) & (fb_err < self.fb_threshold_px)
+        if good.sum() < 4:
+            self.reset()
+            return None
+
+        old = p0.reshape(-1, 2)[good]
+        new = p1.reshape(-1, 2)[good]
+        dx, dy = np.median(new - old, axis=0)
+        # Scale change from the median ratio of pairwise point distances
+        i, j = np.triu_indices(len(old), k=1)
+        d_old = np.linalg.norm(old[i] - old[j], axis=1)
+        d_new = np.linalg.norm(new[i] - new[j], axis=1)
+        valid = d_old > 1e-3
+        scale = float(np.median(d_new[valid] / d_old[valid])) if valid.any() else 1.0
+
+        x1, y1, x2, y2 = self._box
+        cx, cy = (x1 + x2) / 2 + dx, (y1 + y2) / 2 + dy
+        hw, hh = (x2 - x1) / 2 * scale, (y2 - y1) / 2 * scale
+        self._box = np.array([cx - hw, cy - hh, cx + hw, cy + hh], dtype=np.float32)
+        self._prev_gray = gray
+        self._points = new.reshape(-1, 1, 2)
+        self.confidence = float(good.sum()) / self._n_seed
+
+        bbox = tuple(float(v) for v in self._box / self._scale)
+        return Detection(bbox, conf=self.confidence, cls=0)
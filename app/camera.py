@@ -1,26 +1,73 @@
 import logging
 import os
 import platform
-from typing import Optional, Tuple
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Tuple
 
 import cv2
 import numpy as np
 
+from .frame_pool import FramePool, PooledFrame
+from .metrics import timed
+
 log = logging.getLogger(__name__)
 
 
+@dataclass
+class CapturedFrame:
+    image: np.ndarray
+    timestamp: float  # time.monotonic() right after the frame was grabbed
+    seq: int  # capture sequence number, increases by one per grabbed frame
+    buffer: Optional[PooledFrame] = None  # pool handle owning image, if pooled
+
+    def release(self) -> None:
+        """Hand the image buffer back to the camera's pool; the image must not be used afterwards."""
+        if self.buffer is not None:
+            self.buffer.release()
+
+
 class Camera:
-    """Thin wrapper around OpenCV VideoCapture with lazy open and backend fallbacks."""
+    """
+    Thin wrapper around OpenCV VideoCapture with lazy open and backend fallbacks.
+    With threaded=True a background thread keeps grabbing and only the newest frames are kept,
+    so a slow consumer never sees stale frames queued up inside the driver.
+    With pool_size > 0 frames are decoded into recycled buffers: every frame returned by read_frame()
+    must be given back with CapturedFrame.release() once the caller is done with it.
+    """
 
-    def __init__(self, device_index: int = 0, width: int = 640, height: int = 480, fps: int = 15):
+    def __init__(
+        self,
+        device_index: int = 0,
+        width: int = 640,
+        height: int = 480,
+        fps: int = 15,
+        threaded: bool = False,
+        buffer_size: int = 2,
+        pool_size: int = 0,
+    ):
         self.device_index = device_index
         self.width = width
         self.height = height
         self.fps = fps
+        self.threaded = threaded
         self.cap: Optional[cv2.VideoCapture] = None
         self._candidates = self._build_candidates()
         self._cand_pos = 0
         self._read_failures = 0
+        self._seq = 0
+        self.frames_captured = 0
+        self.dropped_frames = 0  # frames grabbed but never handed to a consumer
+        self._ring: Deque[CapturedFrame] = deque()
+        self._ring_size = max(1, buffer_size)
+        self._pool: Optional[FramePool] = FramePool(max_free=pool_size) if pool_size > 0 else None
+        self._frame_shape: Optional[Tuple[int, int, int]] = None  # shape the device actually delivers
+        self._ring_cond = threading.Condition()
+        self._last_consumed_seq = 0
+        self._thread: Optional[threading.Thread] = None
+        self._thread_running = False
 
     def _build_candidates(self):
         candidates = []
@@ -54,28 +101,123 @@ class Camera:
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
         self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.threaded:
+            # The grab thread drains the device itself; keep the driver queue as short as possible.
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def set_mode(self, width: int, height: int, fps: int) -> None:
+        """Change capture size/rate on the fly (also used by later reopens)."""
+        changed_size = (width, height) != (self.width, self.height)
+        self.width, self.height, self.fps = width, height, fps
+        if changed_size:
+            self._frame_shape = None
+        cap = self.cap
+        if cap is None:
+            return
+        if changed_size:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        cap.set(cv2.CAP_PROP_FPS, fps)
 
     def read(self) -> Optional[Tuple[bool, np.ndarray]]:
+        captured = self.read_frame()
+        if captured is None:
+            return None
+        return True, captured.image
+
+    @timed("capture")
+    def read_frame(self, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        """Return the newest frame with its capture time and sequence number, or None on failure/timeout."""
+        if not self.threaded:
+            return self._grab()
+        self.start()
+        with self._ring_cond:
+            self._ring_cond.wait_for(
+                lambda: self._ring and self._ring[-1].seq > self._last_consumed_seq, timeout=timeout
+            )
+            if not self._ring or self._ring[-1].seq <= self._last_consumed_seq:
+                return None
+            captured = self._ring[-1]
+            self.dropped_frames += captured.seq - self._last_consumed_seq - 1
+            self._last_consumed_seq = captured.seq
+            if captured.buffer is not None:
+                # The ring keeps its own reference until the frame is evicted
+                captured.buffer.retain()
+            return captured
+
+    @timed("camera_grab")
+    def _grab(self) -> Optional[CapturedFrame]:
         if self.cap is None:
             self.open()
         assert self.cap is not None
-        ret, frame = self.cap.read()
+        buffer = None
+        if self._pool is not None:
+            buffer = self._pool.acquire(self._frame_shape or (self.height, self.width, 3))
+            ret, frame = self.cap.read(buffer.image)
+            if ret and frame is not buffer.image:
+                # The device delivered another size; OpenCV allocated. Pool that size from now on.
+                buffer.release()
+                buffer = FramePool.wrap(frame)
+                self._frame_shape = frame.shape
+        else:
+            ret, frame = self.cap.read()
         if not ret:
+            if buffer is not None:
+                buffer.release()
             log.warning("Camera read failed")
             self._read_failures += 1
             if self._read_failures >= 3:
                 self._cand_pos = (self._cand_pos + 1) % len(self._candidates)
-                self.release()
+                self._release_cap()
                 try:
                     self.open()
                 except Exception as exc:
                     log.error("Reopen camera failed: %s", exc)
             return None
         self._read_failures = 0
-        return ret, frame
+        self._seq += 1
+        self.frames_captured += 1
+        return CapturedFrame(frame, time.monotonic(), self._seq, buffer)
 
-    def release(self) -> None:
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread_running = True
+        self._thread = threading.Thread(target=self._grab_loop, name="camera-grab", daemon=True)
+        self._thread.start()
+
+    def _grab_loop(self) -> None:
+        while self._thread_running:
+            try:
+                captured = self._grab()
+            except Exception as exc:
+                log.error("Camera grab failed: %s", exc)
+                captured = None
+            if captured is None:
+                time.sleep(0.05)
+                continue
+            with self._ring_cond:
+                self._ring.append(captured)
+                if len(self._ring) > self._ring_size:
+                    self._ring.popleft().release()
+                self._ring_cond.notify_all()
+
+    @property
+    def pool_stats(self) -> Tuple[int, int]:
+        """(buffers allocated, buffers reused) by the frame pool."""
+        if self._pool is None:
+            return 0, 0
+        return self._pool.allocated, self._pool.reused
+
+    def _release_cap(self) -> None:
         if self.cap:
             log.info("Releasing camera")
             self.cap.release()
             self.cap = None
+
+    def release(self) -> None:
+        if self._thread is not None:
+            self._thread_running = False
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self._release_cap()
@@ -1,4 +1,7 @@
-from dataclasses import dataclass, field
+import json
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 
 @dataclass
@@ -7,17 +10,111 @@ class CameraConfig:
     width: int = 560  # lower res for faster real-time detection
     height: int = 360
     fps: int = 24  # balance latency vs CPU load on Pi 4B
+    threaded: bool = False  # background grab thread; reads always return the newest frame
+    buffer_size: int = 2  # frames kept by the grab thread
+    pool_size: int = 6  # idle frame buffers recycled between reads; 0 allocates a new frame per read
 
 
 @dataclass
 class DetectorConfig:
-    model: str = "hog"  # "hog" (CPU) or "cnn" (GPU/NEON)
+    model: str = "hog"  # "hog" (CPU), "cnn" (GPU/NEON) or "yolo" (ONNX via cv2.dnn)
     upsample: int = 1   # no upsample for speed; better latency for real-time
     resize_width: int = 240  # more aggressive downscale for throughput
     use_fallback: bool = False  # disable slow second pass for steady FPS
     fallback_model: str = "hog"
     fallback_upsample: int = 1
     fallback_resize_width: int = 480  # optional if fallback is manually enabled
+    process_workers: int = 0  # >0: detect in this many worker processes (shared-memory frames) instead of a thread
+    # ROI mode: search around the last face, full-frame sweep every roi_full_every calls or on a miss
+    roi_enabled: bool = False
+    roi_margin: float = 0.75  # window = bbox expanded by this fraction of its size on each side
+    roi_full_every: int = 8
+    roi_resize_width: int = 240  # detector input width for the ROI crop
+    # Tiled small-face search: overlapping full-res tiles scanned under a time budget, resumed across calls.
+    # Runs when the main pass finds nothing (or always with tile_always) and replaces use_fallback.
+    tile_enabled: bool = False
+    tile_size: int = 240  # tile edge in frame pixels
+    tile_overlap: float = 0.25
+    tile_upsample: int = 1
+    tile_resize_width: int = 0  # 0 = tiles at full resolution
+    tile_budget_s: float = 0.06  # per-call time budget for tiles
+    tile_workers: int = 1  # >1 runs tiles on threads (helps only if the backend releases the GIL)
+    tile_always: bool = False
+    # YOLO (model="yolo") settings; export best.pt to ONNX with a matching imgsz
+    onnx_path: str = "Yolo_face_recognition_trained_50/runs/detect/train/weights/best.onnx"
+    input_size: int = 640  # square network input (letterboxed)
+    conf_threshold: float = 0.35
+    nms_iou: float = 0.45
+
+
+@dataclass
+class TrackingConfig:
+    enabled: bool = False  # detect-then-track: run the detector every N frames, LK optical flow in between
+    detect_every_n: int = 6  # full detection cadence in frames while the tracker holds the face
+    min_confidence: float = 0.5  # re-detect early when the share of surviving flow points drops below this
+    work_width: int = 320  # downscale width for the optical-flow tracker
+    max_points: int = 40
+
+
+@dataclass
+class MultiTrackConfig:
+    enabled: bool = False  # associate faces into tracks with stable ids; sticky target instead of the largest box
+    iou_threshold: float = 0.3  # min IoU with a track's motion-predicted box to continue it
+    matching: str = "greedy"  # "greedy" (best overlap first) or "hungarian" (optimal; needs scipy)
+    max_age: int = 10  # detector results a track survives unmatched
+    min_hits: int = 2  # matches before a track may take over from a live target
+    switch_margin: float = 0.3  # a challenger must be this much larger than the target (area)...
+    switch_frames: int = 5  # ...for this many consecutive detector results before the target switches
+    hold_frames: int = 3  # results to wait for a briefly missed target before picking another
+
+
+@dataclass
+class SchedulerConfig:
+    enabled: bool = False  # adapt resize_width/upsample at runtime (face_recognition models, in-process only)
+    budget_frames: float = 3.0  # detector latency budget = budget_frames / CameraConfig.fps
+    widths: Tuple[int, ...] = (160, 200, 240, 320, 400, 480)
+    max_upsample: int = 1
+    shrink_face_px: float = 140.0  # face wider than this in detector pixels -> cheaper setting
+    grow_face_px: float = 70.0  # smaller (or lost) -> finer setting if latency allows
+    hysteresis: float = 0.15  # latency band around the budget
+    patience: int = 3  # consecutive votes before changing the operating point
+
+
+@dataclass
+class MotionGateConfig:
+    enabled: bool = False  # skip detection on static scenes; low-power idle after timeout_no_person_s
+    work_width: int = 80  # tiny grayscale copy used for frame differencing
+    threshold: int = 18  # per-pixel gray difference counted as change
+    min_area_frac: float = 0.004  # share of changed pixels that counts as motion
+    hold_frames: int = 12  # keep detecting this many frames after motion stops
+    idle_fps: int = 4
+    idle_width: int = 0  # 0 keeps the active resolution (avoids a stream restart on some cameras)
+    idle_height: int = 0
+
+
+@dataclass
+class EstimatorConfig:
+    enabled: bool = False  # Kalman-predicted target at actuation time instead of raw (late) detections
+    process_accel: float = 300.0  # px/s^2; higher follows quick direction changes, lower smooths more
+    meas_std_px: float = 6.0  # detector box jitter
+    lead_s: float = 0.0  # predict this far past "now" (motor command latency, e.g. with async_motion)
+    kd: float = 0.04  # gain on the predicted error rate (filter velocity minus pan rate); replaces ControlConfig.kd
+    max_predict_s: float = 0.5  # never extrapolate further than this past the last measurement
+    reset_after_s: float = 1.0  # restart the filter after a gap this long
+
+
+@dataclass
+class IdentityConfig:
+    enabled: bool = False  # prefer enrolled people over the largest face when picking the target
+    gallery_dir: str = "known_faces"  # <name>/*.jpg or <name>.jpg; encodings cached in encodings.npz
+    targets: Tuple[str, ...] = ()  # names to follow; empty = any enrolled person
+    known_only: bool = False  # ignore strangers entirely instead of falling back to the largest face
+    tolerance: float = 0.6  # max encoding distance for a match (face_recognition default)
+    cache_size: int = 64  # tracks whose identity is remembered (LRU)
+    track_iou: float = 0.3  # overlap with a previous box that continues a track (no re-encoding)
+    encoding_model: str = "small"  # face_recognition landmark model: "small" (5 points) or "large"
+    num_jitters: int = 1  # re-samples per gallery image at enrollment
+    index_above: int = 1000  # gallery rows above which a FLANN index replaces brute-force matching
 
 
 @dataclass
@@ -30,9 +127,14 @@ class ControlConfig:
     microstep: int = 8  # TB6600 DIP setting
     gear_ratio: float = 1.0
     max_speed_sps: int = 2800  # allow faster slews; reduce if motor skips
-    accel_sps2: int = 4000  # steps per second^2 (not yet used)
+    accel_sps2: int = 4000  # steps per second^2 (trapezoidal ramps in async_motion mode)
+    driver: str = "gpio"  # "gpio" (per-step RPi.GPIO pulses) or "wave" (precompiled pigpio pulse trains)
+    async_motion: bool = False  # step on a background motion thread; move() retargets instead of blocking
     home_position_steps: int = 0
     timeout_no_person_s: float = 4.0
+    pul_pin: int = 17  # TB6600 PUL/DIR/ENA (BCM numbering)
+    dir_pin: int = 27
+    ena_pin: int = 22
 
 
 @dataclass
@@ -40,9 +142,102 @@ class LightConfig:
     relay_pin: int = 23
 
 
+@dataclass
+class DisplayConfig:
+    mode: str = "auto"  # "window" (cv2.imshow), "headless" (no drawing at all), "auto" = window if a display exists
+    preview_port: int = 0  # >0: MJPEG preview at http://<preview_host>:<port>/ (rendered only while watched)
+    preview_host: str = "127.0.0.1"  # use "0.0.0.0" to view from another machine
+    preview_fps: float = 5.0
+    preview_quality: int = 70
+
+
+@dataclass
+class MetricsConfig:
+    enabled: bool = False  # per-stage latency histograms (near-zero cost when off)
+    http_port: int = 0  # >0: serve Prometheus text at http://<http_host>:<port>/metrics
+    http_host: str = "127.0.0.1"
+    summary_interval_s: float = 10.0  # periodic p50/p90 log line; 0 disables
+
+
+@dataclass
+class RecorderConfig:
+    path: str = ""  # non-empty: append a flight recording (frames, detections, control) to this file
+    frame_width: int = 160  # stored frames are downscaled to this width
+    queue_size: int = 256  # writer backlog; records are dropped rather than stalling the loop
+
+
+@dataclass
+class FrameBusConfig:
+    name: str = ""  # non-empty: publish frames + detections to this shared-memory segment (app/frame_bus.py)
+    slots: int = 4  # ring size; a reader holding a frame view longer than slots-1 frames sees it overwritten
+    max_dets: int = 32  # detections stored per frame
+
+
+@dataclass
+class StartupConfig:
+    parallel: bool = True  # detector import/warm-up, gallery load and camera open on concurrent threads
+    warmup: bool = True  # run the detector once on a blank frame (and start pool workers) before the first frame
+    timeout_s: float = 60.0  # stop waiting for startup jobs after this long
+
+
+@dataclass
+class RuntimeConfig:
+    mode: str = "loop"  # "loop" (TrackerApp.run) or "async" (app/runtime.py: one asyncio task per stage)
+    channel_policy: str = "latest"  # frame/detection channels: "latest", "drop_oldest" (bounded FIFO) or "block"
+    channel_size: int = 2  # capacity for "drop_oldest"/"block"; "latest" always holds one item
+    control_hz: float = 0.0  # >0 with the estimator: control ticks at this rate, predicting between detections
+    report_interval_s: float = 10.0  # per-stage rate / channel backlog log line; 0 disables
+
+
+@dataclass
+class SupervisorConfig:
+    workers: int = 3  # detector processes shared by all cameras
+    budget_s: float = 0.25  # default per-camera detection deadline (submit -> dispatch ordering)
+    report_interval_s: float = 10.0  # per-camera latency/throughput log line; 0 disables
+
+
 @dataclass
 class AppConfig:
     camera: CameraConfig = field(default_factory=CameraConfig)
     detector: DetectorConfig = field(default_factory=DetectorConfig)
+    tracking: TrackingConfig = field(default_factory=TrackingConfig)
+    multi_track: MultiTrackConfig = field(default_factory=MultiTrackConfig)
+    scheduler: SchedulerConfig = field(default_factory=SchedulerConfig)
+    motion_gate: MotionGateConfig = field(default_factory=MotionGateConfig)
     control: ControlConfig = field(default_factory=ControlConfig)
+    estimator: EstimatorConfig = field(default_factory=EstimatorConfig)
+    identity: IdentityConfig = field(default_factory=IdentityConfig)
     light: LightConfig = field(default_factory=LightConfig)
+    display: DisplayConfig = field(default_factory=DisplayConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    recorder: RecorderConfig = field(default_factory=RecorderConfig)
+    frame_bus: FrameBusConfig = field(default_factory=FrameBusConfig)
+    runtime: RuntimeConfig = field(default_factory=RuntimeConfig)
+    startup: StartupConfig = field(default_factory=StartupConfig)
+
+
+def apply_overrides(cfg: AppConfig, sections: Dict[str, Dict[str, object]]) -> AppConfig:
+    """Copy of cfg with {"detector": {"upsample": 0}, ...} applied. Unknown sections/fields raise ValueError."""
+    updates = {}
+    for section, values in sections.items():
+        if section not in {f.name for f in fields(cfg)}:
+            raise ValueError(f"Unknown config section: {section}")
+        current = getattr(cfg, section)
+        known = {f.name: getattr(current, f.name) for f in fields(current)}
+        changes = {}
+        for key, value in values.items():
+            if key not in known:
+                raise ValueError(f"Unknown {type(current).__name__} field: {key}")
+            changes[key] = tuple(value) if isinstance(known[key], tuple) else value
+        updates[section] = replace(current, **changes)
+    return replace(cfg, **updates)
+
+
+def load_config(path, base: Optional[AppConfig] = None) -> AppConfig:
+    """AppConfig with the sections of a JSON file (e.g. written by test/autotune.py) applied to base/defaults."""
+    return apply_overrides(base or AppConfig(), json.loads(Path(path).read_text()))
+
+
+def save_config(path, sections: Dict[str, Dict[str, object]]) -> None:
+    apply_overrides(AppConfig(), sections)  # validate before writing
+    Path(path).write_text(json.dumps(sections, indent=2) + "\n")
@@ -1,7 +1,10 @@
 import logging
 from dataclasses import dataclass
+from typing import Optional
 
 from .config import ControlConfig
+from .metrics import timed
+from .motion import MotionEngine
 from .motor_driver import MotorDriver
 
 log = logging.getLogger(__name__)
@@ -11,6 +14,8 @@ log = logging.getLogger(__name__)
 class ControlState:
     current_steps: int = 0
     last_error_px: float = 0.0
+    target_steps: int = 0
+    speed_sps: float = 0.0
 
 
 class MotorController:
@@ -19,6 +24,21 @@ class MotorController:
         self.driver = driver
         self.state = ControlState()
         self.driver.enable()
+        self.motion: Optional[MotionEngine] = None
+        if cfg.async_motion:
+            self.motion = MotionEngine(
+                driver,
+                max_speed_sps=cfg.max_speed_sps,
+                accel_sps2=cfg.accel_sps2,
+                on_position=self._on_motion_position,
+            )
+            self.motion.start()
+
+    def _on_motion_position(self, position: int, target: int, velocity: float) -> None:
+        # Called from the motion thread after every step
+        self.state.current_steps = position
+        self.state.target_steps = target
+        self.state.speed_sps = velocity
 
     def px_to_steps(self, error_px: float, frame_width: int) -> int:
         deg_per_px = self.cfg.camera_hfov_deg / frame_width
@@ -28,6 +48,24 @@ class MotorController:
         ) / 360.0
         return int(error_deg * steps_per_deg)
 
+    def steps_to_px(self, steps: float, frame_width: int) -> float:
+        steps_per_deg = (
+            self.cfg.steps_per_rev * self.cfg.microstep * self.cfg.gear_ratio
+        ) / 360.0
+        return steps / steps_per_deg * frame_width / self.cfg.camera_hfov_deg
+
+    def compute_step_command_from_state(
+        self, error_px: float, error_rate_px_s: float, frame_width: int, kd: Optional[float] = None
+    ) -> int:
+        """PD step command from an estimated error and its rate (e.g. from TargetEstimator); kd overrides cfg.kd."""
+        kd = self.cfg.kd if kd is None else kd
+        control_px = self.cfg.kp * error_px + kd * error_rate_px_s
+        steps = self.px_to_steps(control_px, frame_width)
+        if abs(error_px) < self.cfg.deadband_px:
+            steps = 0
+        self.state.last_error_px = error_px
+        return steps
+
     def compute_step_command(self, error_px: float, frame_width: int, dt: float) -> int:
         derivative = (error_px - self.state.last_error_px) / dt if dt > 0 else 0.0
         control_px = self.cfg.kp * error_px + self.cfg.kd * derivative
@@ -37,16 +75,29 @@ class MotorController:
         self.state.last_error_px = error_px
         return steps
 
+    @timed("motor")
     def move(self, steps: int) -> None:
         if steps == 0:
             return
+        if self.motion is not None:
+            # Non-blocking: retarget relative to where the axis is right now
+            self.motion.move_by(steps)
+            self.state.target_steps = self.motion.target
+            return
         step_delay_s = max(1.0 / self.cfg.max_speed_sps, 0.0002)
         self.driver.step(steps, step_delay_s)
         self.state.current_steps += steps
 
     def home(self) -> None:
+        if self.motion is not None:
+            # Ramp back to the home position on the motion thread
+            self.motion.set_target(self.cfg.home_position_steps)
+            self.state.target_steps = self.cfg.home_position_steps
+            return
         self.driver.home(self.cfg.home_position_steps)
         self.state.current_steps = 0
 
     def shutdown(self) -> None:
+        if self.motion is not None:
+            self.motion.stop()
         self.driver.disable()
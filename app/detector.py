@@ -1,10 +1,16 @@
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import cv2
 import numpy as np
 
+from .metrics import timed
+
 log = logging.getLogger(__name__)
 
 
@@ -13,6 +19,8 @@ class Detection:
     bbox: Tuple[float, float, float, float]  # x1, y1, x2, y2
     conf: float
     cls: int
+    identity: Optional[str] = None  # enrolled person's name, set by IdentityResolver
+    track_id: Optional[int] = None  # stable id across detector results, set by MultiFaceTracker
 
     @property
     def center(self) -> Tuple[float, float]:
@@ -35,6 +43,19 @@ class FaceRecognitionDetector:
         fallback_model: str = "cnn",
         fallback_upsample: int = 2,
         fallback_resize_width: int = 0,
+        roi_enabled: bool = False,
+        roi_margin: float = 0.75,
+        roi_full_every: int = 8,
+        roi_resize_width: int = 240,
+        tile_enabled: bool = False,
+        tile_size: int = 240,
+        tile_overlap: float = 0.25,
+        tile_upsample: int = 1,
+        tile_resize_width: int = 0,
+        tile_budget_s: float = 0.06,
+        tile_workers: int = 1,
+        tile_always: bool = False,
+        merge_iou: float = 0.4,
     ):
         self.model = model
         self.upsample = upsample
@@ -43,6 +64,26 @@ class FaceRecognitionDetector:
         self.fallback_model = fallback_model
         self.fallback_upsample = fallback_upsample
         self.fallback_resize_width = fallback_resize_width
+        self.roi_enabled = roi_enabled
+        self.roi_margin = roi_margin
+        self.roi_full_every = roi_full_every
+        self.roi_resize_width = roi_resize_width
+        self.tile_enabled = tile_enabled
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_upsample = tile_upsample
+        self.tile_resize_width = tile_resize_width
+        self.tile_budget_s = tile_budget_s
+        self.tile_always = tile_always
+        self.merge_iou = merge_iou
+        self._last_bbox: Optional[Tuple[float, float, float, float]] = None
+        self._calls_since_full = 0
+        self._tile_grid: Optional[Tuple[Tuple[int, int], List[Tuple[int, int, int, int]]]] = None
+        self._tile_cursor = 0
+        self._tile_pool = ThreadPoolExecutor(max_workers=tile_workers) if tile_enabled and tile_workers > 1 else None
+        self._tile_workers = max(1, tile_workers)
+        self._batch_buf: Optional[np.ndarray] = None
+        self._scratch = threading.local()  # per-thread RGB input buffer (tile workers run concurrently)
         self._face_recognition = self._load()
 
     def _load(self):
@@ -54,14 +95,30 @@ class FaceRecognitionDetector:
 
         return face_recognition
 
+    def warm_up(self, shape: Tuple[int, int, int] = (360, 560, 3)) -> None:
+        """One main-pass detection on a blank frame: first-call model setup and buffers before real frames."""
+        if self._face_recognition is None:
+            return
+        self._detect(np.zeros(shape, dtype=np.uint8), model=self.model, upsample=self.upsample, resize_width=self.resize_width)
+
+    @timed("detect")
     def __call__(self, frame: np.ndarray) -> List[Detection]:
         if self._face_recognition is None:
             return []
 
+        if self.roi_enabled:
+            dets = self._detect_roi(frame)
+            if dets:
+                return dets
+
         dets = self._detect(frame, model=self.model, upsample=self.upsample, resize_width=self.resize_width)
 
+        if self.tile_enabled:
+            # Bounded-latency small-face search; replaces the all-or-nothing fallback pass
+            if not dets or self.tile_always:
+                dets = merge_detections(dets + self._detect_tiles(frame), self.merge_iou)
         # If nothing was found, try a slower but more accurate pass (e.g., CNN, no downscale)
-        if not dets and self.use_fallback:
+        elif not dets and self.use_fallback:
             dets = self._detect(
                 frame,
                 model=self.fallback_model,
@@ -69,22 +126,168 @@ class FaceRecognitionDetector:
                 resize_width=self.fallback_resize_width if self.fallback_resize_width > 0 else 0,
             )
 
+        if self.roi_enabled:
+            self._remember(dets)
+        return dets
+
+    @timed("detect_batch")
+    def detect_batch(self, frames: Sequence[np.ndarray], batch_size: int = 32) -> List[List[Detection]]:
+        """
+        Main-pass detection for many frames at once (stateless: no ROI, tiles or fallback).
+        Frames are resized and converted to RGB straight into one stacked buffer per input size;
+        the cnn model then runs through face_recognition.batch_face_locations.
+        """
+        results: List[List[Detection]] = [[] for _ in frames]
+        if self._face_recognition is None or not frames:
+            return results
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for i, frame in enumerate(frames):
+            groups.setdefault(frame.shape[:2], []).append(i)
+        for (h, w), indices in groups.items():
+            scale = self.resize_width / w if self.resize_width and w > self.resize_width else 1.0
+            out_w, out_h = (self.resize_width, max(1, int(h * scale))) if scale != 1.0 else (w, h)
+            for start in range(0, len(indices), batch_size):
+                chunk = indices[start : start + batch_size]
+                stack = self._prepare_batch([frames[i] for i in chunk], out_w, out_h)
+                if self.model == "cnn":
+                    batch_boxes = self._face_recognition.batch_face_locations(
+                        list(stack), number_of_times_to_upsample=self.upsample, batch_size=len(chunk)
+                    )
+                else:
+                    batch_boxes = [
+                        self._face_recognition.face_locations(img, number_of_times_to_upsample=self.upsample, model=self.model)
+                        for img in stack
+                    ]
+                for i, boxes in zip(chunk, batch_boxes):
+                    results[i] = self._to_detections(boxes, scale)
+        return results
+
+    def _prepare_batch(self, frames: List[np.ndarray], out_w: int, out_h: int) -> np.ndarray:
+        shape = (len(frames), out_h, out_w, 3)
+        buf = self._batch_buf
+        if buf is None or buf.shape[1:] != shape[1:] or buf.shape[0] < shape[0]:
+            buf = self._batch_buf = np.empty(shape, dtype=np.uint8)
+        stack = buf[: len(frames)]
+        for frame, dst in zip(frames, stack):
+            if frame.shape[:2] != (out_h, out_w):
+                cv2.resize(frame, (out_w, out_h), dst=dst)
+                cv2.cvtColor(dst, cv2.COLOR_BGR2RGB, dst=dst)
+            else:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=dst)
+        return stack
+
+    def _remember(self, dets: List[Detection]) -> None:
+        self._calls_since_full = 0
+        if dets:
+            self._last_bbox = max(dets, key=lambda d: (d.bbox[2] - d.bbox[0]) * (d.bbox[3] - d.bbox[1])).bbox
+        else:
+            self._last_bbox = None
+
+    def _detect_roi(self, frame: np.ndarray) -> List[Detection]:
+        """Detect inside a margin-expanded window around the last face. Empty result means: do a full sweep."""
+        if self._last_bbox is None or self._calls_since_full >= self.roi_full_every:
+            return []
+        self._calls_since_full += 1
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = self._last_bbox
+        mx, my = (x2 - x1) * self.roi_margin, (y2 - y1) * self.roi_margin
+        rx1, ry1 = max(0, int(x1 - mx)), max(0, int(y1 - my))
+        rx2, ry2 = min(w, int(x2 + mx)), min(h, int(y2 + my))
+        if rx2 - rx1 < 16 or ry2 - ry1 < 16:
+            return []
+        # The crop is much smaller than the frame, so the same pixel budget gives a higher effective resolution.
+        dets = self._detect(
+            frame[ry1:ry2, rx1:rx2], model=self.model, upsample=self.upsample, resize_width=self.roi_resize_width
+        )
+        for det in dets:
+            bx1, by1, bx2, by2 = det.bbox
+            det.bbox = (bx1 + rx1, by1 + ry1, bx2 + rx1, by2 + ry1)
+        if dets:
+            self._last_bbox = max(dets, key=lambda d: (d.bbox[2] - d.bbox[0]) * (d.bbox[3] - d.bbox[1])).bbox
+        return dets
+
+    def _tiles(self, h: int, w: int) -> List[Tuple[int, int, int, int]]:
+        if self._tile_grid is not None and self._tile_grid[0] == (h, w):
+            return self._tile_grid[1]
+        size = min(self.tile_size, w, h)
+        step = max(1, int(size * (1 - self.tile_overlap)))
+
+        def starts(length: int) -> List[int]:
+            pos = list(range(0, length - size + 1, step))
+            if pos[-1] != length - size:
+                pos.append(length - size)  # last tile flush with the border
+            return pos
+
+        tiles = [(x, y, x + size, y + size) for y in starts(h) for x in starts(w)]
+        self._tile_grid = ((h, w), tiles)
+        self._tile_cursor = 0
+        return tiles
+
+    def _detect_tile(self, frame: np.ndarray, tile: Tuple[int, int, int, int]) -> List[Detection]:
+        x1, y1, x2, y2 = tile
+        dets = self._detect(
+            frame[y1:y2, x1:x2], model=self.model, upsample=self.tile_upsample, resize_width=self.tile_resize_width
+        )
+        for det in dets:
+            bx1, by1, bx2, by2 = det.bbox
+            det.bbox = (bx1 + x1, by1 + y1, bx2 + x1, by2 + y1)
+        return dets
+
+    def _detect_tiles(self, frame: np.ndarray) -> List[Detection]:
+        """
+        Scan overlapping tiles at a finer scale, resuming where the previous call stopped, until the
+        time budget is used up (at least one batch per call). A full sweep may span several frames.
+        """
+        tiles = self._tiles(*frame.shape[:2])
+        deadline = time.perf_counter() + self.tile_budget_s
+        dets: List[Detection] = []
+        done = 0
+        while done < len(tiles):
+            batch = []
+            for _ in range(min(self._tile_workers, len(tiles) - done)):
+                batch.append(tiles[self._tile_cursor])
+                self._tile_cursor = (self._tile_cursor + 1) % len(tiles)
+            if self._tile_pool is not None and len(batch) > 1:
+                results = self._tile_pool.map(lambda t: self._detect_tile(frame, t), batch)
+            else:
+                results = [self._detect_tile(frame, t) for t in batch]
+            for tile_dets in results:
+                dets.extend(tile_dets)
+            done += len(batch)
+            if time.perf_counter() >= deadline:
+                break
         return dets
 
     def _detect(self, frame: np.ndarray, model: str, upsample: int, resize_width: int) -> List[Detection]:
         # Optionally downscale to reduce load on Pi-class CPUs. resize_width==0 means full-res.
         scale = 1.0
-        frame_in = frame
-        if resize_width and frame.shape[1] > resize_width:
-            scale = resize_width / frame.shape[1]
-            new_h = max(1, int(frame.shape[0] * scale))
-            frame_in = cv2.resize(frame, (resize_width, new_h))
-
-        # face_recognition expects RGB images
-        rgb = np.ascontiguousarray(frame_in[:, :, ::-1])
+        h, w = frame.shape[:2]
+        if resize_width and w > resize_width:
+            scale = resize_width / w
+            h, w = max(1, int(h * scale)), resize_width
+
+        # face_recognition expects RGB images; resize and convert into a reused buffer
+        rgb = self._scratch_rgb(h, w)
+        if scale != 1.0:
+            cv2.resize(frame, (w, h), dst=rgb)
+            cv2.cvtColor(rgb, cv2.COLOR_BGR2RGB, dst=rgb)
+        else:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
         boxes = self._face_recognition.face_locations(
             rgb, number_of_times_to_upsample=upsample, model=model
         )
+        return self._to_detections(boxes, scale)
+
+    def _scratch_rgb(self, h: int, w: int) -> np.ndarray:
+        """Contiguous (h, w, 3) view into a grow-only per-thread buffer (ROI/tile crops vary in size)."""
+        flat = getattr(self._scratch, "buf", None)
+        if flat is None or flat.size < h * w * 3:
+            flat = self._scratch.buf = np.empty(h * w * 3, dtype=np.uint8)
+        return flat[: h * w * 3].reshape(h, w, 3)
+
+    @staticmethod
+    def _to_detections(boxes, scale: float) -> List[Detection]:
+        """face_recognition (top, right, bottom, left) boxes -> Detections in original-frame pixels."""
         dets: List[Detection] = []
         for top, right, bottom, left in boxes:
             if scale != 1.0:
@@ -94,3 +297,170 @@ class FaceRecognitionDetector:
                 left /= scale
             dets.append(Detection((left, top, right, bottom), conf=1.0, cls=0))
         return dets
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes -> (N, M)."""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    iw = np.clip(np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]), 0, None)
+    ih = np.clip(np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def merge_detections(dets: List[Detection], iou_threshold: float) -> List[Detection]:
+    """Drop duplicates (e.g. the same face seen by overlapping tiles), keeping the most confident box."""
+    if len(dets) < 2:
+        return dets
+    boxes = np.array([d.bbox for d in dets], dtype=np.float64)
+    scores = np.array([d.conf for d in dets], dtype=np.float64)
+    return [dets[i] for i in nms(boxes, scores, iou_threshold)]
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression over (N, 4) xyxy boxes. Returns kept indices, best first."""
+    if boxes.shape[0] == 0:
+        return np.empty((0,), dtype=np.intp)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    order = np.argsort(scores)[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.maximum(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0)
+        ih = np.maximum(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0)
+        inter = iw * ih
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.intp)
+
+
+class YoloOnnxDetector:
+    """
+    Face detector running an exported YOLO ONNX model (e.g. Yolo_face_recognition_trained_50) via cv2.dnn.
+    Export with: yolo export model=runs/detect/train/weights/best.pt format=onnx imgsz=640
+    The model was asked for explicitly, so a missing or unreadable file raises instead of detecting nothing.
+    """
+
+    def __init__(
+        self,
+        onnx_path: str,
+        input_size: int = 640,
+        conf_threshold: float = 0.35,
+        nms_iou: float = 0.45,
+    ):
+        self.onnx_path = onnx_path
+        self.input_size = input_size
+        self.conf_threshold = conf_threshold
+        self.nms_iou = nms_iou
+        # Letterbox canvas (BGR, padded with YOLO's gray) and NCHW float blob, reused across calls.
+        self._canvas = np.full((input_size, input_size, 3), 114, dtype=np.uint8)
+        self._blob = np.empty((1, 3, input_size, input_size), dtype=np.float32)
+        self._layout: Optional[Tuple[int, int, float, int, int, int, int]] = None
+        self._net = self._load()
+
+    def _load(self):
+        if not os.path.isfile(self.onnx_path):
+            weights = os.path.join(os.path.dirname(self.onnx_path) or ".", "best.pt")
+            raise FileNotFoundError(
+                f"YOLO ONNX model not found: {self.onnx_path}. The weights are not committed; export them with "
+                f"`yolo export model={weights} format=onnx imgsz=320` (set DetectorConfig.input_size to match) "
+                "or pass --onnx-path"
+            )
+        try:
+            net = cv2.dnn.readNetFromONNX(self.onnx_path)
+        except cv2.error as exc:
+            raise RuntimeError(f"Cannot load YOLO ONNX model {self.onnx_path}: {exc}") from exc
+        net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        return net
+
+    def warm_up(self, shape: Tuple[int, int, int] = (360, 560, 3)) -> None:
+        """One forward pass on a blank frame: cv2.dnn sets up layers and allocates on the first call."""
+        self._letterbox(np.zeros(shape, dtype=np.uint8))
+        self._net.setInput(self._blob)
+        self._net.forward()
+
+    @timed("detect")
+    def __call__(self, frame: np.ndarray) -> List[Detection]:
+        ratio, pad_x, pad_y = self._letterbox(frame)
+        self._net.setInput(self._blob)
+        out = self._net.forward()
+        return self._decode(out, ratio, pad_x, pad_y, frame.shape[1], frame.shape[0])
+
+    def _letterbox(self, frame: np.ndarray) -> Tuple[float, int, int]:
+        h, w = frame.shape[:2]
+        if self._layout is None or self._layout[:2] != (h, w):
+            # Frame size changed (or first call): recompute placement and clear stale content from the padding.
+            size = self.input_size
+            ratio = min(size / w, size / h)
+            new_w, new_h = max(1, round(w * ratio)), max(1, round(h * ratio))
+            pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+            self._canvas[:] = 114
+            self._layout = (h, w, ratio, pad_x, pad_y, new_w, new_h)
+        _, _, ratio, pad_x, pad_y, new_w, new_h = self._layout
+        cv2.resize(frame, (new_w, new_h), dst=self._canvas[pad_y : pad_y + new_h, pad_x : pad_x + new_w])
+        # HWC BGR uint8 -> NCHW RGB float32 in [0, 1], written straight into the reused blob
+        np.multiply(self._canvas.transpose(2, 0, 1)[::-1], 1.0 / 255.0, out=self._blob[0], casting="unsafe")
+        return ratio, pad_x, pad_y
+
+    def _decode(
+        self, out: np.ndarray, ratio: float, pad_x: int, pad_y: int, frame_w: int, frame_h: int
+    ) -> List[Detection]:
+        # YOLOv8/11 head: (1, 4 + num_classes, num_anchors) with rows cx, cy, w, h, class scores
+        preds = out.reshape(out.shape[-2], out.shape[-1])
+        class_scores = preds[4:]
+        cls_ids = class_scores.argmax(axis=0)
+        confs = class_scores[cls_ids, np.arange(preds.shape[1])]
+        mask = confs >= self.conf_threshold
+        if not mask.any():
+            return []
+        cx, cy, bw, bh = preds[:4, mask]
+        confs = confs[mask]
+        cls_ids = cls_ids[mask]
+        boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+        # Undo letterbox: remove padding, rescale, clip to the original frame
+        boxes[:, [0, 2]] = np.clip((boxes[:, [0, 2]] - pad_x) / ratio, 0, frame_w)
+        boxes[:, [1, 3]] = np.clip((boxes[:, [1, 3]] - pad_y) / ratio, 0, frame_h)
+        keep = nms(boxes, confs, self.nms_iou)
+        return [
+            Detection(tuple(float(v) for v in boxes[i]), conf=float(confs[i]), cls=int(cls_ids[i]))
+            for i in keep
+        ]
+
+
+def create_detector(cfg):
+    """Build the detector selected by DetectorConfig.model."""
+    if cfg.model == "yolo":
+        return YoloOnnxDetector(
+            onnx_path=cfg.onnx_path,
+            input_size=cfg.input_size,
+            conf_threshold=cfg.conf_threshold,
+            nms_iou=cfg.nms_iou,
+        )
+    return FaceRecognitionDetector(
+        model=cfg.model,
+        upsample=cfg.upsample,
+        resize_width=cfg.resize_width,
+        use_fallback=cfg.use_fallback,
+        fallback_model=cfg.fallback_model,
+        fallback_upsample=cfg.fallback_upsample,
+        fallback_resize_width=cfg.fallback_resize_width,
+        roi_enabled=cfg.roi_enabled,
+        roi_margin=cfg.roi_margin,
+        roi_full_every=cfg.roi_full_every,
+        roi_resize_width=cfg.roi_resize_width,
+        tile_enabled=cfg.tile_enabled,
+        tile_size=cfg.tile_size,
+        tile_overlap=cfg.tile_overlap,
+        tile_upsample=cfg.tile_upsample,
+        tile_resize_width=cfg.tile_resize_width,
+        tile_budget_s=cfg.tile_budget_s,
+        tile_workers=cfg.tile_workers,
+        tile_always=cfg.tile_always,
+    )
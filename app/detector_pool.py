@@ -0,0 +1,390 @@
+import logging
+import multiprocessing as mp
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .detector import Detection, create_detector
+from .metrics import REGISTRY as METRICS
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class DetectionResult:
+    seq: int
+    dets: List[Detection]
+    latency_s: float  # submit -> result available
+    frame: Optional[np.ndarray] = None  # copy of the input frame, only with keep_frames=True
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to a parent-owned segment; the parent stays responsible for unlinking it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Spawned workers share the parent's resource tracker, so registering again is harmless.
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(det_cfg, slot_name, conn, warm_shape, ready, index) -> None:
+    detector = create_detector(det_cfg)
+    if warm_shape is not None:
+        detector.warm_up(warm_shape)
+    ready[index] = 1
+    shm = _attach(slot_name)
+    frame = None
+    try:
+        while True:
+            try:
+                task = conn.recv()
+            except EOFError:
+                break  # parent gone
+            if task is None:
+                break
+            seq, shape = task
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+            try:
+                dets = detector(frame)
+            except Exception as exc:
+                log.warning("Detector worker failed on seq=%d: %s", seq, exc)
+                dets = []
+            conn.send((seq, dets))
+    finally:
+        frame = None  # drop the view before closing the mapping
+        shm.close()
+
+
+class ProcessDetectorPool:
+    """
+    Runs detectors in worker processes so detection scales across cores (dlib holds the GIL).
+    Each worker owns one shared-memory frame slot and a pipe; only small task/result tuples are
+    pickled. Results come back tagged with the frame sequence number and anything older than the
+    newest delivered result is dropped. Nothing is shared between workers, so one that dies (dlib
+    crash, OOM kill) cannot wedge the others: the next poll reclaims its slot and respawns it.
+    """
+
+    def __init__(self, det_cfg, workers: int = 3, keep_frames: bool = False, slot_bytes: int = 0):
+        self.det_cfg = det_cfg
+        self.workers = max(1, workers)
+        self.keep_frames = keep_frames
+        self.min_slot_bytes = slot_bytes  # size slots for the largest expected frame (several cameras)
+        self._ctx = mp.get_context("spawn")
+        self._ready = self._ctx.Array("i", self.workers)  # per worker: detector loaded and warm
+        self._procs: List[mp.Process] = []
+        self._conns: List[Connection] = []
+        self._slots: List[shared_memory.SharedMemory] = []
+        self._free: List[int] = []  # idle workers (= their slots)
+        self._retired: set = set()  # workers that died during startup; not respawned
+        self._warm_shape: Optional[Tuple[int, ...]] = None
+        self._inflight: Dict[int, int] = {}  # slot -> seq being detected
+        self._submit_time = {}
+        self._shapes = {}
+        self._slot_bytes = 0
+        self._last_delivered = -1
+        self.submitted = 0
+        self.completed = 0
+        self.stale_dropped = 0
+        self.worker_restarts = 0
+        self._check_lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._procs != [] and not self._free
+
+    @property
+    def free_slots(self) -> int:
+        return self.workers if not self._procs else len(self._free)
+
+    @property
+    def ready_workers(self) -> int:
+        """Live workers that have loaded and warmed their detector."""
+        return sum(1 for i, proc in enumerate(self._procs) if self._ready[i] and proc.is_alive())
+
+    def wait_ready(self, workers: int = 1, timeout: float = 60.0) -> bool:
+        """Block until this many workers are warm (or timeout)."""
+        deadline = time.monotonic() + timeout
+        while self.ready_workers < min(workers, self.workers):
+            if not any(p.is_alive() for p in self._procs):
+                self._check_workers()  # raises when every worker failed to start
+                return False
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def start(self, shape: Tuple[int, ...]) -> None:
+        """Spawn the workers now (instead of on the first submit) and warm them on frames of this shape."""
+        if not self._procs:
+            self._start(max(int(np.prod(shape)), self.min_slot_bytes), warm_shape=tuple(shape))
+
+    def _start(self, frame_bytes: int, warm_shape: Optional[Tuple[int, ...]] = None) -> None:
+        self._slot_bytes = frame_bytes
+        self._warm_shape = warm_shape
+        self._slots = [shared_memory.SharedMemory(create=True, size=frame_bytes) for _ in range(self.workers)]
+        self._free = list(range(self.workers))
+        self._conns = [None] * self.workers
+        self._procs = [self._spawn(i) for i in range(self.workers)]
+        log.info("Detector pool started (workers=%d, slot=%d bytes)", self.workers, frame_bytes)
+
+    def _spawn(self, index: int) -> mp.Process:
+        self._ready[index] = 0
+        conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(self.det_cfg, self._slots[index].name, child_conn, self._warm_shape, self._ready, index),
+            name=f"detector-{index}",
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        self._conns[index] = conn
+        return proc
+
+    def _check_workers(self) -> None:
+        """Reclaim the slot of any dead worker and respawn it (unless it never got through startup)."""
+        with self._check_lock:  # wait_ready() may run on another thread than poll()
+            self._check_workers_locked()
+        if self._procs and len(self._retired) == self.workers:
+            raise RuntimeError("Every detector worker failed to start (see the worker errors above)")
+
+    def _check_workers_locked(self) -> None:
+        for i, proc in enumerate(self._procs):
+            if i in self._retired or proc.is_alive():
+                continue
+            self._conns[i].close()
+            if self._inflight.pop(i, None) is not None:
+                self._submit_time.pop(i, None)
+            if not self._ready[i]:
+                # Failed while loading the detector; respawning would just fail again
+                log.error("Detector worker %s exited during startup (exit code %s)", proc.name, proc.exitcode)
+                self._retired.add(i)
+                if i in self._free:
+                    self._free.remove(i)
+                continue
+            log.warning("Detector worker %s died (exit code %s); respawning", proc.name, proc.exitcode)
+            self.worker_restarts += 1
+            self._procs[i] = self._spawn(i)
+            if i not in self._free:
+                self._free.append(i)
+
+    def submit(self, frame: np.ndarray, seq: int) -> bool:
+        """Copy frame into an idle worker's slot and hand it over. Returns False when every worker is busy."""
+        if not self._procs:
+            self._start(max(frame.nbytes, self.min_slot_bytes), warm_shape=frame.shape)
+        if not self._free:
+            return False
+        if frame.nbytes > self._slot_bytes or frame.dtype != np.uint8:
+            log.warning("Frame %s does not fit the detector pool slots; skipped", frame.shape)
+            return False
+        slot = self._free.pop()
+        np.copyto(np.ndarray(frame.shape, dtype=np.uint8, buffer=self._slots[slot].buf), frame)
+        self._submit_time[slot] = time.monotonic()
+        self._shapes[slot] = frame.shape
+        self._inflight[slot] = seq
+        try:
+            self._conns[slot].send((seq, frame.shape))
+        except OSError:
+            pass  # worker just died; the next poll reclaims the slot
+        self.submitted += 1
+        return True
+
+    def _collect(self) -> List[Tuple[int, int, List[Detection]]]:
+        """(seq, slot, dets) of every finished detection; frees the slots."""
+        self._check_workers()
+        done = []
+        for slot in list(self._inflight):
+            conn = self._conns[slot]
+            try:
+                if not conn.poll():
+                    continue
+                seq, dets = conn.recv()
+            except (EOFError, OSError):
+                continue  # died mid-send; _check_workers reclaims it
+            del self._inflight[slot]
+            done.append((seq, slot, dets))
+        done.sort()
+        return done
+
+    def _result_frame(self, slot: int) -> np.ndarray:
+        return np.ndarray(self._shapes[slot], dtype=np.uint8, buffer=self._slots[slot].buf).copy()
+
+    def poll_all(self) -> List[DetectionResult]:
+        """Every finished result in sequence order, without stale filtering."""
+        results = []
+        for seq, slot, dets in self._collect():
+            self.completed += 1
+            latency = time.monotonic() - self._submit_time.pop(slot, time.monotonic())
+            frame = self._result_frame(slot) if self.keep_frames else None
+            self._free.append(slot)
+            results.append(DetectionResult(seq, dets, latency, frame))
+        return results
+
+    def poll(self) -> Optional[DetectionResult]:
+        """Newest finished result that is fresher than the last one delivered, or None."""
+        newest: Optional[DetectionResult] = None
+        for seq, slot, dets in self._collect():
+            self.completed += 1
+            latency = time.monotonic() - self._submit_time.pop(slot, time.monotonic())
+            frame = None
+            if self.keep_frames and (newest is None or seq > newest.seq):
+                frame = self._result_frame(slot)
+            self._free.append(slot)
+            if seq <= self._last_delivered or (newest is not None and seq < newest.seq):
+                self.stale_dropped += 1
+                continue
+            if newest is not None:
+                self.stale_dropped += 1
+            newest = DetectionResult(seq, dets, latency, frame)
+        if newest is not None:
+            self._last_delivered = newest.seq
+        return newest
+
+    def shutdown(self) -> None:
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for proc in self._procs:
+            proc.join(timeout=2.0)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._procs, self._conns = [], []
+        for shm in self._slots:
+            shm.close()
+            shm.unlink()
+        self._slots = []
+
+
+class PoolClient:
+    """
+    One camera's view of a FairDetectorScheduler, with the submit/poll/shutdown interface of
+    ProcessDetectorPool so TrackerApp can use either. Holds at most one waiting frame (newest wins).
+    """
+
+    def __init__(self, scheduler: "FairDetectorScheduler", name: str, budget_s: float):
+        self.scheduler = scheduler
+        self.name = name
+        self.budget_s = budget_s
+        self._staging: Optional[np.ndarray] = None
+        self._waiting: Optional[Tuple[int, float, float]] = None  # (seq, submit time, deadline)
+        self._result: Optional[DetectionResult] = None
+        self._last_delivered = -1
+        self.last_served = 0.0
+        self.submitted = 0
+        self.completed = 0
+        self.superseded = 0  # waiting frames replaced by a newer one before dispatch
+        self.latencies: Deque[float] = deque(maxlen=512)  # submit -> result, including queueing
+
+    def submit(self, frame: np.ndarray, seq: int) -> bool:
+        return self.scheduler._submit(self, frame, seq)
+
+    def poll(self) -> Optional[DetectionResult]:
+        return self.scheduler._poll(self)
+
+    def shutdown(self) -> None:
+        self.scheduler._detach(self)
+
+
+class FairDetectorScheduler:
+    """
+    Shares one ProcessDetectorPool between several cameras.
+
+    Every client has a single latest-value mailbox, so a camera that submits often only replaces its
+    own waiting frame. Whenever a worker slot is free the waiting frame with the earliest deadline
+    (submit time + client budget) is dispatched, ties going to the client served least recently.
+    No background thread: clients drive dispatch and result routing from their submit()/poll() calls.
+    """
+
+    def __init__(self, pool: ProcessDetectorPool, budget_s: float = 0.25):
+        self.pool = pool
+        self.budget_s = budget_s
+        self._lock = threading.Lock()
+        self._clients: List[PoolClient] = []
+        self._inflight: Dict[int, Tuple[PoolClient, int, float]] = {}  # pool seq -> (client, client seq, submit time)
+        self._next_seq = 0
+
+    def client(self, name: str, budget_s: Optional[float] = None) -> PoolClient:
+        client = PoolClient(self, name, self.budget_s if budget_s is None else budget_s)
+        with self._lock:
+            self._clients.append(client)
+        return client
+
+    def _submit(self, client: PoolClient, frame: np.ndarray, seq: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self._route_results()
+            client.submitted += 1
+            others_waiting = any(c._waiting is not None for c in self._clients if c is not client)
+            if self.pool.free_slots and not others_waiting:
+                # Nobody to be fair to: skip the staging copy
+                client._waiting = None
+                return self._dispatch(client, frame, seq, now)
+            if client._waiting is not None:
+                client.superseded += 1
+            if client._staging is None or client._staging.shape != frame.shape:
+                client._staging = np.empty_like(frame)
+            np.copyto(client._staging, frame)
+            client._waiting = (seq, now, now + client.budget_s)
+            self._dispatch_waiting()
+        return True
+
+    def _dispatch(self, client: PoolClient, frame: np.ndarray, seq: int, submit_time: float) -> bool:
+        self._next_seq += 1
+        if not self.pool.submit(frame, self._next_seq):
+            return False
+        self._inflight[self._next_seq] = (client, seq, submit_time)
+        client.last_served = time.monotonic()
+        return True
+
+    def _dispatch_waiting(self) -> None:
+        while self.pool.free_slots:
+            waiting = [c for c in self._clients if c._waiting is not None]
+            if not waiting:
+                return
+            client = min(waiting, key=lambda c: (c._waiting[2], c.last_served))
+            seq, submit_time, _ = client._waiting
+            client._waiting = None
+            if not self._dispatch(client, client._staging, seq, submit_time):
+                return
+
+    def _route_results(self) -> None:
+        now = time.monotonic()
+        for result in self.pool.poll_all():
+            entry = self._inflight.pop(result.seq, None)
+            if entry is None:
+                continue
+            client, seq, submit_time = entry
+            client.completed += 1
+            latency = now - submit_time
+            client.latencies.append(latency)
+            METRICS.observe("tracker_detection_latency_seconds", latency, camera=client.name)
+            if seq <= client._last_delivered or (client._result is not None and seq < client._result.seq):
+                continue
+            client._result = DetectionResult(seq, result.dets, latency, result.frame)
+
+    def _poll(self, client: PoolClient) -> Optional[DetectionResult]:
+        with self._lock:
+            self._route_results()
+            self._dispatch_waiting()
+            result, client._result = client._result, None
+            if result is not None:
+                client._last_delivered = result.seq
+            return result
+
+    def _detach(self, client: PoolClient) -> None:
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+
+    def shutdown(self) -> None:
+        self.pool.shutdown()
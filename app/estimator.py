@@ -0,0 +1,80 @@
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+class TargetEstimator:
+    """
+    Constant-velocity Kalman filter on the face center and width.
+
+    State is [x, y, s, vx, vy, vs] in pan-compensated pixels: x includes the camera's pan offset at
+    capture time, so moving the camera does not look like the face moving. Measurements are applied
+    at their capture timestamps; predict() extrapolates to any later time (e.g. expected actuation)
+    without touching the filter state.
+    """
+
+    def __init__(
+        self,
+        process_accel: float = 300.0,
+        meas_std_px: float = 6.0,
+        max_predict_s: float = 0.5,
+        reset_after_s: float = 1.0,
+    ):
+        self.process_accel = process_accel  # px/s^2, white-noise acceleration
+        self.max_predict_s = max_predict_s
+        self.reset_after_s = reset_after_s
+        self._R = np.eye(3) * meas_std_px**2
+        self._H = np.hstack([np.eye(3), np.zeros((3, 3))])
+        self.x: Optional[np.ndarray] = None
+        self.P: Optional[np.ndarray] = None
+        self.t = 0.0
+
+    @property
+    def initialized(self) -> bool:
+        return self.x is not None
+
+    def reset(self) -> None:
+        self.x = None
+        self.P = None
+
+    def _transition(self, dt: float) -> Tuple[np.ndarray, np.ndarray]:
+        F = np.eye(6)
+        F[0, 3] = F[1, 4] = F[2, 5] = dt
+        q = self.process_accel**2
+        # Discrete white-noise acceleration model, per axis
+        q11, q12, q22 = dt**4 / 4 * q, dt**3 / 2 * q, dt**2 * q
+        Q = np.zeros((6, 6))
+        for i in range(3):
+            Q[i, i], Q[i, i + 3], Q[i + 3, i], Q[i + 3, i + 3] = q11, q12, q12, q22
+        return F, Q
+
+    def update(self, t: float, x: float, y: float, size: float) -> None:
+        z = np.array([x, y, size], dtype=np.float64)
+        if self.x is None or t - self.t > self.reset_after_s:
+            self.x = np.concatenate([z, np.zeros(3)])
+            self.P = np.diag([25.0, 25.0, 25.0, 400.0**2, 400.0**2, 100.0**2])
+            self.t = t
+            return
+        dt = t - self.t
+        if dt < 0:
+            # Older than the current state (out-of-order detector result): ignore
+            return
+        F, Q = self._transition(dt)
+        x_pred = F @ self.x
+        P_pred = F @ self.P @ F.T + Q
+        S = self._H @ P_pred @ self._H.T + self._R
+        K = P_pred @ self._H.T @ np.linalg.inv(S)
+        self.x = x_pred + K @ (z - self._H @ x_pred)
+        self.P = (np.eye(6) - K @ self._H) @ P_pred
+        self.t = t
+
+    def predict(self, t: float) -> Optional[np.ndarray]:
+        """State [x, y, s, vx, vy, vs] extrapolated to time t (capped at max_predict_s ahead)."""
+        if self.x is None:
+            return None
+        dt = min(max(t - self.t, 0.0), self.max_predict_s)
+        F, _ = self._transition(dt)
+        return F @ self.x
@@ -0,0 +1,425 @@
+"""
+Shared-memory frame bus: the tracker publishes every captured frame with its capture timestamp and the
+current detections into a ring of slots in one multiprocessing.shared_memory segment; other local
+processes (recorder, notifier, ...) attach by name and read frames zero-copy without the tracker ever
+waiting for them. A subscriber that falls behind just skips to the newest frame.
+
+Each slot carries a begin/end sequence pair: the publisher bumps `begin` before writing and sets `end`
+when done, so a reader can tell a complete slot from one that is (or has since been) overwritten.
+
+    python -m app.frame_bus --name miso-frames              # watch a running tracker
+    python -m app.frame_bus --bench --subscribers 4         # throughput with concurrent readers
+"""
+
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import sys
+import time
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .detector import Detection
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"MISOBUS1"
+_HEADER = np.dtype(
+    [
+        ("magic", "S8"),
+        ("slots", "<u4"),
+        ("max_dets", "<u4"),
+        ("slot_stride", "<u8"),
+        ("pixel_bytes", "<u8"),
+        ("write_seq", "<u8"),  # sequence number of the newest complete frame (0 = none yet)
+        ("closed", "<u4"),
+    ],
+    align=True,
+)
+_SLOT = np.dtype(
+    [
+        ("begin", "<u8"),  # sequence being written / last written
+        ("end", "<u8"),  # sequence whose write completed
+        ("frame_seq", "<u8"),  # camera sequence number
+        ("timestamp", "<f8"),  # capture time (time.monotonic() of the publishing process)
+        ("det_timestamp", "<f8"),  # capture time of the frame the detections came from
+        ("height", "<u4"),
+        ("width", "<u4"),
+        ("channels", "<u4"),
+        ("n_dets", "<u4"),
+        ("target", "<i4"),  # index of the tracked target in the detections, -1 = none
+    ],
+    align=True,
+)
+_HEADER_BYTES = 64
+_SLOT_HEADER_BYTES = 64
+_DET_FIELDS = 6  # x1, y1, x2, y2, conf, track id (-1 = none) as float32
+
+
+def _align(n: int, to: int = 64) -> int:
+    return (n + to - 1) // to * to
+
+
+def _tracker_name(shm: shared_memory.SharedMemory) -> str:
+    return "/" + shm.name if os.name == "posix" else shm.name  # as SharedMemory registers it
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach without taking ownership: an exiting reader must not unlink the publisher's segment."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(_tracker_name(shm), "shared_memory")
+        return shm
+
+
+class FrameBusPublisher:
+    """
+    Writer side (one per segment). The segment is created on the first publish, sized for that frame;
+    later frames that are larger are skipped with a warning. publish() never blocks on readers.
+    """
+
+    def __init__(self, name: str, slots: int = 4, max_dets: int = 32):
+        self.name = name
+        self.slots = max(2, slots)
+        self.max_dets = max_dets
+        self.published = 0
+        self.oversized = 0
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._header = None
+        self._stride = 0
+        self._pixel_bytes = 0
+
+    def _create(self, pixel_bytes: int) -> None:
+        self._pixel_bytes = pixel_bytes
+        self._stride = _align(_SLOT_HEADER_BYTES + self.max_dets * _DET_FIELDS * 4 + pixel_bytes)
+        size = _HEADER_BYTES + self.slots * self._stride
+        try:
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a crashed run: replace it (attached readers keep their old mapping)
+            log.warning("Frame bus %s already exists; replacing it", self.name)
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        self._header = np.ndarray((), dtype=_HEADER, buffer=self._shm.buf)
+        self._header["slots"] = self.slots
+        self._header["max_dets"] = self.max_dets
+        self._header["slot_stride"] = self._stride
+        self._header["pixel_bytes"] = pixel_bytes
+        self._header["write_seq"] = 0
+        self._header["closed"] = 0
+        self._header["magic"] = MAGIC  # last: readers treat the segment as valid from here on
+        log.info("Frame bus %s: %d slots of %d bytes", self.name, self.slots, self._stride)
+
+    def publish(
+        self,
+        image: np.ndarray,
+        timestamp: float,
+        dets: Sequence[Detection] = (),
+        det_timestamp: float = 0.0,
+        target: Optional[Detection] = None,
+        frame_seq: int = 0,
+    ) -> bool:
+        if self._shm is None:
+            self._create(image.nbytes)
+        if image.nbytes > self._pixel_bytes or image.dtype != np.uint8:
+            self.oversized += 1
+            if self.oversized == 1:
+                log.warning("Frame %s does not fit the frame bus slots; not published", image.shape)
+            return False
+        seq = self.published + 1
+        offset = _HEADER_BYTES + (seq % self.slots) * self._stride
+        buf = self._shm.buf
+        slot = np.ndarray((), dtype=_SLOT, buffer=buf, offset=offset)
+        slot["begin"] = seq
+        h, w = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 1
+        np.copyto(np.ndarray(image.shape, dtype=np.uint8, buffer=buf, offset=offset + self._det_bytes_end()), image)
+        n = min(len(dets), self.max_dets)
+        if n:
+            det_view = np.ndarray((n, _DET_FIELDS), dtype=np.float32, buffer=buf, offset=offset + _SLOT_HEADER_BYTES)
+            det_view[:] = [
+                (*d.bbox, d.conf, -1 if d.track_id is None else d.track_id) for d in dets[:n]
+            ]
+        target_index = -1
+        if target is not None:
+            target_index = next((i for i, d in enumerate(dets[:n]) if d is target), -1)
+        slot["frame_seq"] = frame_seq
+        slot["timestamp"] = timestamp
+        slot["det_timestamp"] = det_timestamp
+        slot["height"], slot["width"], slot["channels"] = h, w, channels
+        slot["n_dets"] = n
+        slot["target"] = target_index
+        slot["end"] = seq
+        self._header["write_seq"] = seq
+        self.published = seq
+        return True
+
+    def _det_bytes_end(self) -> int:
+        return _SLOT_HEADER_BYTES + self.max_dets * _DET_FIELDS * 4
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self._header["closed"] = 1
+        self._header = None
+        self._shm.close()
+        # The publisher owns unlink. A reader sharing our resource tracker (a spawned child) has dropped
+        # the registration when it attached; registering again (a set: no-op otherwise) keeps unlink's
+        # unregister balanced.
+        resource_tracker.register(_tracker_name(self._shm), "shared_memory")
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._shm = None
+
+
+@dataclass
+class BusFrame:
+    """A frame as seen by a subscriber. image is a view into shared memory until copied."""
+
+    seq: int
+    frame_seq: int
+    timestamp: float
+    det_timestamp: float
+    image: np.ndarray
+    detections: List[Detection]
+    target: Optional[Detection]
+    _slot: np.ndarray
+
+    def valid(self) -> bool:
+        """False once the publisher has started overwriting this slot; check after using a view."""
+        return int(self._slot["begin"]) == self.seq
+
+
+class FrameBusSubscriber:
+    """
+    Reader side; any number per segment, each in its own process. latest() returns the newest frame,
+    next() waits for a frame newer than the last one returned (skipping whatever was missed).
+    """
+
+    def __init__(self, name: str, timeout: float = 10.0):
+        self.name = name
+        self.received = 0
+        self.skipped = 0  # frames published but never returned (consumer too slow)
+        self.torn = 0  # frames that were overwritten while being read
+        self._last_seq = 0
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._shm = _attach(name)
+                header = np.ndarray((), dtype=_HEADER, buffer=self._shm.buf)
+                if bytes(header["magic"]) == MAGIC:
+                    break
+                self._shm.close()
+            except FileNotFoundError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Frame bus {name} not found")
+            time.sleep(0.05)
+        self._header = header
+        self.slots = int(header["slots"])
+        self.max_dets = int(header["max_dets"])
+        self._stride = int(header["slot_stride"])
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._header["closed"])
+
+    def latest(self, copy: bool = False) -> Optional[BusFrame]:
+        """Newest complete frame, or None before the first one."""
+        for _ in range(self.slots):
+            seq = int(self._header["write_seq"])
+            if seq == 0:
+                return None
+            frame = self._read(seq, copy)
+            if frame is not None:
+                return frame
+        return None
+
+    def next(self, timeout: float = 1.0, copy: bool = False) -> Optional[BusFrame]:
+        """Next frame after the last one returned; waits up to timeout (polling), None on timeout/close."""
+        deadline = time.monotonic() + timeout
+        while int(self._header["write_seq"]) <= self._last_seq:
+            if self.closed or time.monotonic() > deadline:
+                return None
+            time.sleep(0.001)
+        return self.latest(copy)
+
+    def _read(self, seq: int, copy: bool) -> Optional[BusFrame]:
+        offset = _HEADER_BYTES + (seq % self.slots) * self._stride
+        buf = self._shm.buf
+        slot = np.ndarray((), dtype=_SLOT, buffer=buf, offset=offset)
+        if int(slot["end"]) != seq:
+            self.torn += 1
+            return None
+        h, w, c = int(slot["height"]), int(slot["width"]), int(slot["channels"])
+        n = int(slot["n_dets"])
+        pixels = offset + _SLOT_HEADER_BYTES + self.max_dets * _DET_FIELDS * 4
+        image = np.ndarray((h, w, c) if c > 1 else (h, w), dtype=np.uint8, buffer=buf, offset=pixels)
+        if copy:
+            image = image.copy()
+        rows = np.ndarray((n, _DET_FIELDS), dtype=np.float32, buffer=buf, offset=offset + _SLOT_HEADER_BYTES).tolist()
+        frame = BusFrame(seq, int(slot["frame_seq"]), float(slot["timestamp"]), float(slot["det_timestamp"]), image, [], None, slot)
+        target_index = int(slot["target"])
+        if int(slot["begin"]) != seq:
+            self.torn += 1
+            return None
+        frame.detections = [
+            Detection((r[0], r[1], r[2], r[3]), r[4], 0, track_id=None if r[5] < 0 else int(r[5])) for r in rows
+        ]
+        frame.target = frame.detections[target_index] if 0 <= target_index < n else None
+        if self._last_seq:
+            self.skipped += max(0, seq - self._last_seq - 1)
+        self._last_seq = seq
+        self.received += 1
+        return frame
+
+    def close(self) -> None:
+        self._header = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # frame views still alive; the mapping goes away with them
+
+
+def create_frame_bus(cfg) -> Optional[FrameBusPublisher]:
+    if not cfg.name:
+        return None
+    return FrameBusPublisher(cfg.name, slots=cfg.slots, max_dets=cfg.max_dets)
+
+
+def _bench_subscriber(index: int, name: str, seconds: float, work_s: float, results) -> None:
+    sub = FrameBusSubscriber(name)
+    latencies, overwritten = [], 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        frame = sub.next(timeout=0.5)
+        if frame is None:
+            continue
+        latencies.append(time.monotonic() - frame.timestamp)
+        frame.image.mean(axis=(0, 1))  # touch the view like a consumer would
+        if work_s:
+            time.sleep(work_s)
+        overwritten += not frame.valid()
+        del frame
+    lat = np.asarray(latencies) if latencies else np.zeros(1)
+    stats = (sub.received, sub.skipped, sub.torn, overwritten, float(np.median(lat)), float(np.percentile(lat, 99)))
+    results.put((index, stats))
+    sub.close()
+
+
+def bench(
+    subscribers: int,
+    seconds: float,
+    width: int,
+    height: int,
+    fps: float,
+    work_ms: Sequence[float],
+    max_publish_ms: float = 5.0,
+) -> bool:
+    """
+    Publish synthetic frames while several subscriber processes read them; print per-reader rates.
+    Passes when every reader received frames, publish p99 stays under max_publish_ms and readers whose
+    per-frame work takes less than half the frame period (at a fixed fps) neither skip nor tear frames.
+    """
+    name = f"miso-bench-{mp.current_process().pid}"
+    pub = FrameBusPublisher(name, slots=4)
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    dets = [Detection((10.0, 20.0, 110.0, 140.0), 0.9, 0, track_id=1)]
+    pub.publish(frame, time.monotonic(), dets)  # creates the segment before readers attach
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    procs = []
+    for i in range(subscribers):
+        work = work_ms[i % len(work_ms)] / 1000.0 if work_ms else 0.0
+        proc = ctx.Process(target=_bench_subscriber, args=(i, name, seconds, work, results), daemon=True)
+        proc.start()
+        procs.append((proc, work))
+    time.sleep(1.0)  # let the readers attach
+    start = time.perf_counter()
+    publish_s = []
+    period = 1.0 / fps if fps > 0 else 0.0
+    while time.perf_counter() - start < seconds - 1.5:
+        frame[0, 0, 0] = pub.published & 0xFF
+        t0 = time.perf_counter()
+        pub.publish(frame, time.monotonic(), dets, target=dets[0])
+        publish_s.append(time.perf_counter() - t0)
+        if period:
+            time.sleep(max(0.0, period - (time.perf_counter() - t0)))
+    elapsed = time.perf_counter() - start
+    rows = dict(results.get(timeout=seconds + 10) for _ in procs)
+    for proc, _ in procs:
+        proc.join(timeout=5)
+    pub.close()
+    publish_p99 = float(np.percentile(publish_s, 99))
+    print(
+        f"Publisher: {len(publish_s) / elapsed:.0f} frames/s of {width}x{height}, "
+        f"publish p50 {np.median(publish_s) * 1e6:.0f} us, p99 {publish_p99 * 1e6:.0f} us"
+    )
+    failures = []
+    if publish_p99 * 1000 > max_publish_ms:
+        failures.append(f"publish p99 {publish_p99 * 1000:.2f} ms > {max_publish_ms} ms")
+    for i, (_, work) in enumerate(procs):
+        received, skipped, torn, overwritten, p50, p99 = rows[i]
+        print(
+            f"Subscriber {i} (work {work * 1000:.0f} ms): {received / elapsed:.0f} frames/s, skipped {skipped}, "
+            f"torn reads {torn}, views overwritten during work {overwritten}, "
+            f"latency p50 {p50 * 1000:.2f} ms p99 {p99 * 1000:.2f} ms"
+        )
+        if not received:
+            failures.append(f"subscriber {i} received nothing")
+        elif period and work < period / 2 and (skipped or torn):
+            failures.append(f"subscriber {i} keeps up but skipped {skipped} / tore {torn} frames")
+    print("FAIL: " + "; ".join(failures) if failures else "PASS")
+    return not failures
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Frame bus watcher / throughput benchmark.")
+    p.add_argument("--name", type=str, default="miso-frames", help="Segment name (FrameBusConfig.name).")
+    p.add_argument("--bench", action="store_true", help="Run the publisher/subscriber benchmark instead.")
+    p.add_argument("--subscribers", type=int, default=4)
+    p.add_argument("--seconds", type=float, default=6.0)
+    p.add_argument("--width", type=int, default=640)
+    p.add_argument("--height", type=int, default=480)
+    p.add_argument("--fps", type=float, default=30.0, help="Publish rate (0 = as fast as possible, no skip check).")
+    p.add_argument("--max-publish-ms", type=float, default=5.0, help="Bench fails above this publish p99.")
+    p.add_argument("--work-ms", type=str, default="0,5,50", help="Per-frame work of the subscribers (cycled).")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.bench:
+        work = [float(v) for v in args.work_ms.split(",") if v.strip()]
+        ok = bench(args.subscribers, args.seconds, args.width, args.height, args.fps, work, args.max_publish_ms)
+        sys.exit(0 if ok else 1)
+    sub = FrameBusSubscriber(args.name)
+    last, count = time.monotonic(), 0
+    try:
+        while not sub.closed:
+            frame = sub.next(timeout=1.0)
+            if frame is None:
+                continue
+            count += 1
+            now = time.monotonic()
+            if now - last >= 1.0:
+                faces = ", ".join(f"#{d.track_id}" if d.track_id is not None else "face" for d in frame.detections)
+                print(
+                    f"{count / (now - last):.1f} fps, frame {frame.frame_seq} {frame.image.shape[1]}x{frame.image.shape[0]}, "
+                    f"age {(now - frame.timestamp) * 1000:.1f} ms, skipped {sub.skipped}, detections: {faces or 'none'}"
+                )
+                last, count = now, 0
+    except KeyboardInterrupt:
+        pass
+    sub.close()
+
+
+if __name__ == "__main__":
+    main()
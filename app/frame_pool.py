@@ -0,0 +1,82 @@
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+class PooledFrame:
+    """
+    A pool buffer with a reference count. Every holder calls retain() when it keeps the frame past
+    the current loop iteration and release() when done; the last release returns the buffer.
+    """
+
+    __slots__ = ("image", "_pool", "_refs")
+
+    def __init__(self, image: np.ndarray, pool: Optional["FramePool"]):
+        self.image = image
+        self._pool = pool
+        self._refs = 1
+
+    def retain(self) -> "PooledFrame":
+        pool = self._pool
+        if pool is None:
+            return self
+        with pool._lock:
+            self._refs += 1
+        return self
+
+    def release(self) -> None:
+        pool = self._pool
+        if pool is None:
+            return
+        with pool._lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            if self._refs < 0:
+                log.warning("PooledFrame released more often than retained")
+                return
+        pool._recycle(self)
+
+
+class FramePool:
+    """
+    Fixed-shape uint8 frame buffers recycled by reference count, so the capture -> detect -> display
+    path does not allocate a fresh full frame per iteration. Buffers nobody released are simply
+    garbage-collected; the pool allocates a replacement and keeps at most max_free idle buffers.
+    """
+
+    def __init__(self, max_free: int = 8):
+        self.max_free = max_free
+        self._shape: Optional[Tuple[int, ...]] = None
+        self._free: List[np.ndarray] = []
+        self._lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, shape: Tuple[int, ...]) -> PooledFrame:
+        shape = tuple(shape)
+        with self._lock:
+            if shape != self._shape:
+                # Resolution change (e.g. idle mode): old-size buffers are dropped as they come back
+                self._shape = shape
+                self._free.clear()
+            if self._free:
+                self.reused += 1
+                return PooledFrame(self._free.pop(), self)
+            self.allocated += 1
+        return PooledFrame(np.empty(shape, dtype=np.uint8), self)
+
+    def _recycle(self, frame: PooledFrame) -> None:
+        with self._lock:
+            if frame.image.shape == self._shape and len(self._free) < self.max_free:
+                self._free.append(frame.image)
+        frame._pool = None  # a stale handle must not recycle the buffer twice
+
+    @staticmethod
+    def wrap(image: np.ndarray) -> PooledFrame:
+        """Unpooled handle for an externally allocated image; retain/release are no-ops."""
+        return PooledFrame(image, None)
@@ -0,0 +1,191 @@
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .detector import Detection, box_iou
+
+log = logging.getLogger(__name__)
+
+_IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+class FaceGallery:
+    """
+    Enrolled people as an (N, 128) matrix of face_recognition encodings plus a name per row.
+    Matching is one vectorized distance computation; above index_above rows a FLANN KD-tree
+    index answers nearest-neighbour queries instead.
+    """
+
+    def __init__(self, names: Sequence[str], encodings: np.ndarray, index_above: int = 1000):
+        self.names = list(names)
+        self.encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+        self._sq_norms = np.einsum("ij,ij->i", self.encodings, self.encodings)
+        self._index = None
+        if len(self.names) > index_above > 0:
+            try:
+                self._index = cv2.flann_Index(self.encodings, dict(algorithm=1, trees=4))
+            except cv2.error as exc:
+                log.warning("FLANN index unavailable (%s); using brute-force matching", exc)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def load(cls, root: Path, face_recognition, index_above: int = 1000, num_jitters: int = 1) -> "FaceGallery":
+        """
+        Enroll from root/<name>/*.jpg or root/<name>.jpg. Encodings are cached in root/encodings.npz
+        and only recomputed for images added or changed since.
+        """
+        root = Path(root)
+        cache_path = root / "encodings.npz"
+        cached: Dict[str, Tuple[float, np.ndarray]] = {}
+        if cache_path.exists():
+            with np.load(cache_path, allow_pickle=False) as data:
+                for path, mtime, enc in zip(data["paths"], data["mtimes"], data["encodings"]):
+                    cached[str(path)] = (float(mtime), enc)
+        paths, mtimes, names, encodings = [], [], [], []
+        changed = False
+        for image_path in sorted(p for p in root.rglob("*") if p.suffix.lower() in _IMAGE_SUFFIXES):
+            key = str(image_path.relative_to(root))
+            name = image_path.parent.name if image_path.parent != root else image_path.stem
+            mtime = image_path.stat().st_mtime
+            hit = cached.get(key)
+            if hit is not None and hit[0] == mtime:
+                enc = hit[1]
+            else:
+                changed = True
+                image = face_recognition.load_image_file(str(image_path))
+                found = face_recognition.face_encodings(image, num_jitters=num_jitters)
+                if not found:
+                    log.warning("No face found in gallery image %s; skipped", image_path)
+                    continue
+                enc = found[0]
+            paths.append(key)
+            mtimes.append(mtime)
+            names.append(name)
+            encodings.append(enc)
+        if changed or len(paths) != len(cached):
+            np.savez(
+                cache_path,
+                paths=np.asarray(paths, dtype=str),
+                mtimes=np.asarray(mtimes, dtype=np.float64),
+                encodings=np.asarray(encodings, dtype=np.float64).reshape(-1, 128),
+            )
+        log.info("Face gallery: %d encodings for %d people", len(names), len(set(names)))
+        return cls(names, np.asarray(encodings).reshape(-1, 128), index_above=index_above)
+
+    def match(self, encodings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest gallery row and its Euclidean distance for each (M, 128) query."""
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+        if not len(self.names) or not len(queries):
+            return np.full(len(queries), -1), np.full(len(queries), np.inf)
+        if self._index is not None:
+            idx, sq_dist = self._index.knnSearch(queries, 1, params=dict(checks=64))
+            return idx[:, 0], np.sqrt(np.maximum(sq_dist[:, 0], 0.0))
+        # |q - g|^2 = |q|^2 + |g|^2 - 2 q.g for all pairs in one matrix product
+        sq = np.einsum("ij,ij->i", queries, queries)[:, None] + self._sq_norms[None, :] - 2.0 * queries @ self.encodings.T
+        idx = np.argmin(sq, axis=1)
+        return idx, np.sqrt(np.maximum(sq[np.arange(len(queries)), idx], 0.0))
+
+
+class IdentityResolver:
+    """
+    Labels detections with enrolled names. A detection overlapping a recently seen box (IoU >= track_iou)
+    continues that track and reuses its cached identity; only new tracks run the face encoder. When the
+    multi-face tracker has set Detection.track_id, those ids are the tracks instead.
+    The cache is an LRU of cache_size tracks.
+    """
+
+    def __init__(
+        self,
+        gallery: FaceGallery,
+        face_recognition,
+        tolerance: float = 0.6,
+        cache_size: int = 64,
+        track_iou: float = 0.3,
+        encoding_model: str = "small",
+    ):
+        self.gallery = gallery
+        self._fr = face_recognition
+        self.tolerance = tolerance
+        self.cache_size = cache_size
+        self.track_iou = track_iou
+        self.encoding_model = encoding_model
+        # track id -> (last box, identity or None, distance)
+        self._tracks: "OrderedDict[int, Tuple[Tuple[float, float, float, float], Optional[str], float]]" = OrderedDict()
+        self._next_id = 0
+        self.encoded = 0
+        self.cache_hits = 0
+
+    def resolve(self, frame: np.ndarray, dets: List[Detection]) -> None:
+        """Set det.identity in place (None for strangers)."""
+        if not dets:
+            return
+        track_ids = list(self._tracks.keys())
+        assigned: List[Optional[int]] = [None] * len(dets)
+        external = all(d.track_id is not None for d in dets)
+        if external:
+            assigned = [d.track_id if d.track_id in self._tracks else None for d in dets]
+        elif track_ids:
+            iou = box_iou(np.array([d.bbox for d in dets]), np.array([self._tracks[t][0] for t in track_ids]))
+            # Greedy, best overlap first; each track continues at most one detection
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                i, j = divmod(int(flat), len(track_ids))
+                if iou[i, j] < self.track_iou:
+                    break
+                if assigned[i] is None and track_ids[j] not in assigned:
+                    assigned[i] = track_ids[j]
+        new = [i for i, t in enumerate(assigned) if t is None]
+        if new:
+            # face_recognition wants RGB and (top, right, bottom, left) boxes
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            locations = [
+                (int(dets[i].bbox[1]), int(dets[i].bbox[2]), int(dets[i].bbox[3]), int(dets[i].bbox[0])) for i in new
+            ]
+            encodings = self._fr.face_encodings(rgb, known_face_locations=locations, model=self.encoding_model)
+            self.encoded += len(new)
+            idx, dist = self.gallery.match(np.asarray(encodings).reshape(-1, 128))
+            for i, row, d in zip(new, idx, dist):
+                name = self.gallery.names[row] if row >= 0 and d <= self.tolerance else None
+                if external:
+                    assigned[i] = dets[i].track_id
+                else:
+                    self._next_id += 1
+                    assigned[i] = self._next_id
+                self._tracks[assigned[i]] = (dets[i].bbox, name, float(d))
+        for det, track_id in zip(dets, assigned):
+            if track_id not in self._tracks:
+                continue  # encoder returned fewer faces than asked for
+            _, name, dist = self._tracks[track_id]
+            self._tracks[track_id] = (det.bbox, name, dist)
+            self._tracks.move_to_end(track_id)
+            det.identity = name
+        self.cache_hits += len(dets) - len(new)
+        while len(self._tracks) > self.cache_size:
+            self._tracks.popitem(last=False)
+
+
+def create_identity_resolver(cfg) -> Optional[IdentityResolver]:
+    """Build the resolver from IdentityConfig; None when face_recognition or the gallery is missing."""
+    try:
+        import face_recognition  # type: ignore
+    except Exception as exc:  # pragma: no cover
+        log.warning("face_recognition not available: %s. Identity targeting disabled.", exc)
+        return None
+    root = Path(cfg.gallery_dir)
+    if not root.is_dir():
+        log.warning("Face gallery %s not found; identity targeting disabled", root)
+        return None
+    gallery = FaceGallery.load(root, face_recognition, index_above=cfg.index_above, num_jitters=cfg.num_jitters)
+    return IdentityResolver(
+        gallery,
+        face_recognition,
+        tolerance=cfg.tolerance,
+        cache_size=cfg.cache_size,
+        track_iou=cfg.track_iou,
+        encoding_model=cfg.encoding_model,
+    )
@@ -0,0 +1,202 @@
+"""
+Low-overhead latency metrics: fixed-bucket histograms, a Prometheus text endpoint and a periodic
+summary log line. Everything is a no-op (one attribute check) until REGISTRY.enabled is set.
+"""
+
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+# Seconds; spans sub-millisecond control steps up to multi-second stalls
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0,
+)
+STAGE_METRIC = "tracker_stage_seconds"
+E2E_METRIC = "tracker_capture_to_actuation_seconds"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside the matching bucket."""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if c and seen + c >= rank:
+                lo = self.bounds[i - 1] if i > 0 else 0.0
+                hi = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return self.bounds[-1]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.enabled = False
+        self._hists: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._gauges: Dict[Tuple[str, LabelKey], float] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._lock = threading.Lock()
+        self._last_summary = time.monotonic()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        hist = self._hists.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._hists.setdefault(key, Histogram())
+        hist.observe(value)
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:  # render() on the HTTP thread iterates the same dict
+            self._gauges[key] = float(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self._hists.get((name, tuple(sorted(labels.items()))))
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines: List[str] = []
+        typed = set()
+
+        def head(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            hists = sorted(self._hists.items())
+            gauges = sorted(self._gauges.items())
+            counters = sorted(self._counters.items())
+        for (name, labels), hist in hists:
+            head(name, "histogram")
+            with hist._lock:
+                counts, total, count = list(hist.counts), hist.sum, hist.count
+            cumulative = 0
+            for bound, c in zip(list(hist.bounds) + [float("inf")], counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {total}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+        for (name, labels), value in counters:
+            head(name, "counter")
+            lines.append(f"{name}{_fmt_labels(labels)} {value}")
+        for (name, labels), value in gauges:
+            head(name, "gauge")
+            lines.append(f"{name}{_fmt_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        parts = []
+        with self._lock:
+            hists = sorted(self._hists.items())
+        for (name, labels), hist in hists:
+            label = ",".join(v for _, v in labels) or name.replace("tracker_", "").replace("_seconds", "")
+            parts.append(f"{label}={hist.quantile(0.5) * 1000:.1f}/{hist.quantile(0.9) * 1000:.1f}")
+        return "p50/p90 ms " + " ".join(parts)
+
+    def maybe_log_summary(self, interval_s: float) -> None:
+        if not self.enabled or interval_s <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_summary >= interval_s:
+            self._last_summary = now
+            log.info("Metrics: %s", self.summary())
+
+    def start_http_server(self, port: int, host: str = "127.0.0.1") -> None:
+        if self._server is not None:
+            return
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                log.debug("metrics http: " + fmt, *args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        log.info("Metrics endpoint on http://%s:%d/metrics", host, self._server.server_address[1])
+
+    def stop_http_server(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _fmt_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def timed(stage: str):
+    """Decorator recording the call duration into tracker_stage_seconds{stage=...} when metrics are on."""
+
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                REGISTRY.observe(STAGE_METRIC, time.perf_counter() - start, stage=stage)
+
+        return wrapper
+
+    return deco
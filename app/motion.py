@@ -0,0 +1,125 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+from .motor_driver import MotorDriver
+
+log = logging.getLogger(__name__)
+
+
+class MotionEngine:
+    """
+    Background stepping thread executing trapezoidal velocity profiles.
+    Targets can be changed at any time; the profile is re-planned on every step, so a new target
+    bends the current move (decelerating and reversing if needed) instead of waiting for it to finish.
+    """
+
+    def __init__(
+        self,
+        driver: MotorDriver,
+        max_speed_sps: float,
+        accel_sps2: float,
+        on_position: Optional[Callable[[int, int, float], None]] = None,
+        log_steps: Optional[bool] = None,
+        step_log_size: int = 100_000,
+    ):
+        self.driver = driver
+        self.max_speed_sps = float(max_speed_sps)
+        self.accel_sps2 = float(accel_sps2)
+        self.on_position = on_position
+        if log_steps is None:
+            log_steps = bool(getattr(driver, "mock", False))
+        # (monotonic time, position) after every step; lets mock runs verify spacing and ramps
+        self.step_log: Optional[Deque[Tuple[float, int]]] = deque(maxlen=step_log_size) if log_steps else None
+        self.position = 0
+        self.target = 0
+        self.velocity = 0.0  # signed steps/s
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def idle(self) -> bool:
+        return self.position == self.target and self.velocity == 0.0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="motion", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def set_target(self, target: int) -> None:
+        with self._cond:
+            self.target = int(target)
+            self._cond.notify_all()
+
+    def move_by(self, steps: int) -> None:
+        with self._cond:
+            self.target = self.position + int(steps)
+            self._cond.notify_all()
+
+    def reset_position(self, position: int = 0) -> None:
+        """Redefine the current position (e.g. after homing) without moving."""
+        with self._cond:
+            self.position = self.target = int(position)
+            self.velocity = 0.0
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.idle:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def _next_velocity(self, remaining: int) -> float:
+        """Velocity (signed steps/s) for the next step given the remaining distance to target."""
+        v = self.velocity
+        a = self.accel_sps2
+        direction = 1 if remaining > 0 else -1
+        if v * direction < 0:
+            # Moving away from the target: brake, reversal happens once speed reaches the floor
+            speed = math.sqrt(max(v * v - 2 * a, 0.0))
+            return -direction * speed if speed > 0 else direction * math.sqrt(2 * a)
+        speed = abs(v)
+        stopping_steps = speed * speed / (2 * a)
+        if stopping_steps >= abs(remaining):
+            speed = math.sqrt(max(speed * speed - 2 * a, 2 * a))
+        else:
+            speed = min(math.sqrt(speed * speed + 2 * a), self.max_speed_sps)
+        return direction * speed
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and self.position == self.target:
+                    self.velocity = 0.0
+                    self._cond.wait()
+                if not self._running:
+                    return
+                self.velocity = self._next_velocity(self.target - self.position)
+                direction = 1 if self.velocity > 0 else -1
+                delay_s = 1.0 / abs(self.velocity)
+            # Step outside the lock so set_target never waits on a pulse
+            self.driver.step(direction, delay_s)
+            now = time.monotonic()
+            with self._cond:
+                self.position += direction
+                if self.step_log is not None:
+                    self.step_log.append((now, self.position))
+                position, target = self.position, self.target
+                velocity = self.velocity if position != target else 0.0
+            if self.on_position is not None:
+                self.on_position(position, target, velocity)
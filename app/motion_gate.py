@@ -0,0 +1,65 @@
+import logging
+from typing import Optional
+
+import cv2
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """
+    Cheap scene-change detector on a tiny blurred grayscale copy of the frame.
+    Compares against a running-average background; reports motion while the changed-pixel share
+    exceeds min_area_frac and for hold_frames afterwards.
+    """
+
+    def __init__(
+        self,
+        work_width: int = 80,
+        threshold: int = 18,
+        min_area_frac: float = 0.004,
+        bg_alpha: float = 0.05,
+        hold_frames: int = 12,
+    ):
+        self.work_width = work_width
+        self.threshold = threshold
+        self.min_area_frac = min_area_frac
+        self.bg_alpha = bg_alpha
+        self.hold_frames = hold_frames
+        self._background: Optional[np.ndarray] = None
+        self._small: Optional[np.ndarray] = None
+        self._hold = 0
+        self._primed = False
+        self.changed_frac = 0.0
+
+    def reset(self) -> None:
+        self._background = None
+        self._hold = 0
+
+    def __call__(self, frame: np.ndarray) -> bool:
+        h, w = frame.shape[:2]
+        size = (self.work_width, max(1, int(h * self.work_width / w)))
+        if self._small is None or self._small.shape[:2] != size[::-1]:
+            self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self._background = None  # resolution changed (e.g. idle mode)
+        cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            if self._primed:
+                # Re-learning after a reset/resolution change is not evidence of motion
+                return self._hold > 0
+            self._primed = True
+            self._hold = self.hold_frames
+            return True
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        self.changed_frac = float(np.count_nonzero(diff > self.threshold)) / diff.size
+        cv2.accumulateWeighted(gray, self._background, self.bg_alpha)
+        if self.changed_frac >= self.min_area_frac:
+            self._hold = self.hold_frames
+            return True
+        if self._hold > 0:
+            self._hold -= 1
+            return True
+        return False
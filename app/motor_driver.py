@@ -1,6 +1,8 @@
 import logging
 import time
-from typing import Protocol
+from typing import List, Optional, Protocol, Tuple
+
+import numpy as np
 
 try:
     import RPi.GPIO as GPIO  # type: ignore
@@ -62,3 +64,215 @@ class TB6600Driver:
 
     def home(self, home_steps: int = 0) -> None:
         self.step(-home_steps, step_delay_s=0.002)
+
+
+def compile_pulse_train(
+    steps: int, max_speed_sps: float, accel_sps2: float, pulse_width_us: int = 5
+) -> np.ndarray:
+    """
+    Rising-edge times (microseconds, int64, first edge at 0) for a trapezoidal move of |steps| pulses.
+    Short moves that never reach max_speed_sps become triangular profiles.
+    """
+    n = abs(int(steps))
+    if n == 0:
+        return np.empty((0,), dtype=np.int64)
+    v_max = float(max_speed_sps)
+    a = float(accel_sps2)
+    n_ramp = min(v_max * v_max / (2 * a), n / 2)
+    v_peak = np.sqrt(2 * a * n_ramp)
+    t_ramp = np.sqrt(2 * n_ramp / a)
+    t_total = 2 * t_ramp + (n - 2 * n_ramp) / v_peak
+    # Time at which the axis passes the middle of each step
+    x = np.arange(n, dtype=np.float64) + 0.5
+    t = np.where(
+        x <= n_ramp,
+        np.sqrt(2 * x / a),
+        np.where(
+            x <= n - n_ramp,
+            t_ramp + (x - n_ramp) / v_peak,
+            t_total - np.sqrt(2 * np.maximum(n - x, 0.0) / a),
+        ),
+    )
+    rise_us = np.rint((t - t[0]) * 1e6).astype(np.int64)
+    # Never let pulses overlap, even if rounding squeezes the fastest intervals
+    min_period = 2 * pulse_width_us
+    gaps = np.diff(rise_us, prepend=rise_us[0] - min_period)
+    return np.cumsum(np.maximum(gaps, min_period)) - min_period
+
+
+class PigpioWaveBackend:
+    """Sends pulse trains as pigpio DMA waveforms (needs the pigpiod daemon)."""
+
+    max_pulses_per_wave = 2000  # stay well below pigpio's control-block limit
+
+    def __init__(self, pul_pin: int, dir_pin: int, ena_pin: int):
+        import pigpio  # type: ignore
+
+        self._pigpio = pigpio
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("pigpiod not reachable")
+        self.pul_pin = pul_pin
+        self.dir_pin = dir_pin
+        self.ena_pin = ena_pin
+        for pin in (pul_pin, dir_pin, ena_pin):
+            self.pi.set_mode(pin, pigpio.OUTPUT)
+
+    def write(self, pin: int, level: int) -> None:
+        self.pi.write(pin, level)
+
+    def send(self, rise_us: np.ndarray, pulse_width_us: int) -> None:
+        if len(rise_us) == 1:
+            # A lone pulse does not need a DMA wave; the caller paces single steps
+            self.pi.gpio_trigger(self.pul_pin, pulse_width_us, 1)
+            return
+        pulse = self._pigpio.pulse
+        mask = 1 << self.pul_pin
+        gaps = np.diff(rise_us, append=rise_us[-1] + 2 * pulse_width_us) - pulse_width_us
+        for start in range(0, len(rise_us), self.max_pulses_per_wave):
+            chunk = gaps[start : start + self.max_pulses_per_wave]
+            wave = []
+            for gap in chunk.tolist():
+                wave.append(pulse(mask, 0, pulse_width_us))
+                wave.append(pulse(0, mask, gap))
+            self.pi.wave_add_generic(wave)
+            wid = self.pi.wave_create()
+            self.pi.wave_send_once(wid)
+            while self.pi.wave_tx_busy():
+                time.sleep(0.001)
+            self.pi.wave_delete(wid)
+
+
+class SimulatedWaveBackend:
+    """
+    Hardware-free wave backend. Validates every pulse train against driver limits
+    (pulse width, minimum spacing, acceleration) and keeps what was sent for inspection.
+    """
+
+    def __init__(
+        self,
+        max_rate_hz: float = 20000.0,
+        min_pulse_us: int = 3,
+        max_accel_sps2: Optional[float] = None,
+        strict: bool = True,
+        realtime: bool = False,
+    ):
+        self.max_rate_hz = max_rate_hz
+        self.min_pulse_us = min_pulse_us
+        self.max_accel_sps2 = max_accel_sps2
+        self.strict = strict
+        self.realtime = realtime
+        self.levels = {}
+        self.sent: List[Tuple[int, np.ndarray, int]] = []  # (dir level, rise times us, pulse width us)
+        self.violations: List[str] = []
+        self._dir_pin: Optional[int] = None
+
+    def write(self, pin: int, level: int) -> None:
+        self.levels[pin] = level
+
+    def check(self, rise_us: np.ndarray, pulse_width_us: int) -> List[str]:
+        problems = []
+        if pulse_width_us < self.min_pulse_us:
+            problems.append(f"pulse width {pulse_width_us}us < {self.min_pulse_us}us")
+        if len(rise_us) > 1:
+            periods = np.diff(rise_us)
+            min_period = 1e6 / self.max_rate_hz
+            if periods.min() < max(min_period, pulse_width_us + self.min_pulse_us):
+                problems.append(f"pulse spacing {periods.min()}us below {min_period:.1f}us")
+            if self.max_accel_sps2 is not None and len(periods) > 1:
+                period_s = periods * 1e-6
+                speeds = 1.0 / period_s
+                accel = np.abs(np.diff(speeds)) / ((period_s[1:] + period_s[:-1]) / 2)
+                # Allow for 1us edge quantization, which dominates at high step rates
+                slack = 2e-6 * np.maximum(speeds[1:], speeds[:-1]) ** 3
+                excess = accel - (self.max_accel_sps2 * 1.05 + slack)
+                if excess.max() > 0:
+                    problems.append(f"acceleration {accel[excess.argmax()]:.0f} sps2 above {self.max_accel_sps2:.0f}")
+        return problems
+
+    def send(self, rise_us: np.ndarray, pulse_width_us: int) -> None:
+        problems = self.check(rise_us, pulse_width_us)
+        if problems:
+            self.violations.extend(problems)
+            if self.strict:
+                raise ValueError("; ".join(problems))
+        dir_level = self.levels.get(self._dir_pin, 0) if self._dir_pin is not None else 0
+        self.sent.append((dir_level, rise_us, pulse_width_us))
+        if self.realtime and len(rise_us):
+            time.sleep((rise_us[-1] + pulse_width_us) / 1e6)
+
+
+class WaveformStepDriver:
+    """
+    MotorDriver that compiles each move (with accel/decel ramps) into a pulse train and hands it to a
+    waveform backend in one batch, instead of toggling PUL from Python per step.
+    Uses pigpio when available, otherwise a SimulatedWaveBackend.
+    """
+
+    def __init__(
+        self,
+        max_speed_sps: float = 2800,
+        accel_sps2: float = 4000,
+        pul_pin: int = 17,
+        dir_pin: int = 27,
+        ena_pin: int = 22,
+        pulse_width_us: int = 5,
+        backend=None,
+    ):
+        self.max_speed_sps = max_speed_sps
+        self.accel_sps2 = accel_sps2
+        self.pul_pin = pul_pin
+        self.dir_pin = dir_pin
+        self.ena_pin = ena_pin
+        self.pulse_width_us = pulse_width_us
+        if backend is None:
+            try:
+                backend = PigpioWaveBackend(pul_pin, dir_pin, ena_pin)
+            except Exception as exc:
+                log.info("pigpio not available (%s); using simulated wave backend", exc)
+                backend = SimulatedWaveBackend(max_accel_sps2=accel_sps2)
+        if isinstance(backend, SimulatedWaveBackend):
+            backend._dir_pin = dir_pin
+        self.backend = backend
+        self.mock = isinstance(backend, SimulatedWaveBackend)
+        log.info("Waveform step driver initialized (backend=%s)", type(backend).__name__)
+
+    def enable(self) -> None:
+        self.backend.write(self.ena_pin, 1)
+
+    def disable(self) -> None:
+        self.backend.write(self.ena_pin, 0)
+
+    def step(self, steps: int, step_delay_s: float) -> None:
+        if steps == 0:
+            return
+        # Single steps come from MotionEngine, which owns the profile: hold the step period like
+        # TB6600Driver does, otherwise the pulse returns at once and the ramp collapses
+        deadline = time.monotonic() + step_delay_s if abs(steps) == 1 else None
+        # step_delay_s caps the cruise speed, like the per-step delay of TB6600Driver
+        max_speed = self.max_speed_sps
+        if step_delay_s > 0:
+            max_speed = min(max_speed, 1.0 / step_delay_s)
+        rise_us = compile_pulse_train(steps, max_speed, self.accel_sps2, self.pulse_width_us)
+        self.backend.write(self.dir_pin, 1 if steps > 0 else 0)
+        self.backend.send(rise_us, self.pulse_width_us)
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def home(self, home_steps: int = 0) -> None:
+        self.step(-home_steps, step_delay_s=0.002)
+
+
+def create_motor_driver(cfg) -> MotorDriver:
+    """Build the step driver selected by ControlConfig.driver."""
+    if cfg.driver == "wave":
+        return WaveformStepDriver(
+            max_speed_sps=cfg.max_speed_sps,
+            accel_sps2=cfg.accel_sps2,
+            pul_pin=cfg.pul_pin,
+            dir_pin=cfg.dir_pin,
+            ena_pin=cfg.ena_pin,
+        )
+    return TB6600Driver(pul_pin=cfg.pul_pin, dir_pin=cfg.dir_pin, ena_pin=cfg.ena_pin)
@@ -0,0 +1,220 @@
+import logging
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .detector import Detection, box_iou
+
+log = logging.getLogger(__name__)
+
+
+def greedy_match(iou: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+    """(row, col) pairs, best overlap first, each row and column used once; only pairs >= threshold."""
+    rows, cols = np.nonzero(iou >= threshold)
+    if not len(rows):
+        return []
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_r, used_c, pairs = set(), set(), []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if r not in used_r and c not in used_c:
+            used_r.add(r)
+            used_c.add(c)
+            pairs.append((r, c))
+    return pairs
+
+
+def hungarian_match(iou: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+    """Globally optimal assignment (max total IoU) via scipy; pairs below threshold are rejected."""
+    from scipy.optimize import linear_sum_assignment  # type: ignore
+
+    rows, cols = linear_sum_assignment(-iou)
+    return [(r, c) for r, c in zip(rows.tolist(), cols.tolist()) if iou[r, c] >= threshold]
+
+
+def _area(det: Detection) -> float:
+    x1, y1, x2, y2 = det.bbox
+    return (x2 - x1) * (y2 - y1)
+
+
+class MultiFaceTracker:
+    """
+    SORT-style association of detector results into tracks with stable ids, plus sticky target selection.
+
+    Track state lives in parallel arrays (box, velocity in px/s, hits, misses, age). Each update predicts
+    every box to the new timestamp with constant velocity, matches detections to predictions on an IoU
+    matrix (greedy or Hungarian), and sets Detection.track_id. select() keeps following the current
+    target unless a challenger (a track matched at least min_hits times) is switch_margin larger for
+    switch_frames updates in a row.
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        matching: str = "greedy",
+        max_age: int = 10,
+        min_hits: int = 2,
+        switch_margin: float = 0.3,
+        switch_frames: int = 5,
+        hold_frames: int = 3,
+        velocity_smoothing: float = 0.5,
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.switch_margin = switch_margin
+        self.switch_frames = switch_frames
+        self.hold_frames = hold_frames
+        self.velocity_smoothing = velocity_smoothing
+        self._match = greedy_match
+        if matching == "hungarian":
+            try:
+                from scipy.optimize import linear_sum_assignment  # type: ignore  # noqa: F401
+
+                self._match = hungarian_match
+            except Exception as exc:  # pragma: no cover
+                log.warning("scipy not available (%s); using greedy track matching", exc)
+        elif matching != "greedy":
+            raise ValueError(f"Unknown matching: {matching}")
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.boxes = np.zeros((0, 4), dtype=np.float64)
+        self.velocities = np.zeros((0, 4), dtype=np.float64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.misses = np.zeros(0, dtype=np.int64)
+        self.age = np.zeros(0, dtype=np.int64)
+        self._last_ts: Optional[float] = None
+        self._next_id = 1
+        self.updates = 0
+        self.target_id: Optional[int] = None
+        self._challenger: Optional[int] = None
+        self._challenger_count = 0
+        self._selected_for = None  # detector result the current target decision was made for
+        self._lock = threading.Lock()  # update() may run on the detector thread, select() on the loop
+        self.switches = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def predict(self, timestamp: float) -> np.ndarray:
+        """Track boxes extrapolated to timestamp (capture time of the next detector input)."""
+        if self._last_ts is None or not len(self.ids):
+            return self.boxes.copy()
+        dt = min(max(timestamp - self._last_ts, 0.0), 1.0)
+        return self.boxes + self.velocities * dt
+
+    def update(self, dets: Sequence[Detection], timestamp: float) -> None:
+        """Associate one detector result (input frame captured at timestamp) and set det.track_id."""
+        with self._lock:
+            self._update(dets, timestamp)
+
+    def _update(self, dets: Sequence[Detection], timestamp: float) -> None:
+        self.updates += 1
+        predicted = self.predict(timestamp)
+        dt = timestamp - self._last_ts if self._last_ts is not None else 0.0
+        self._last_ts = timestamp
+        n_tracks = len(self.ids)
+        det_boxes = np.array([d.bbox for d in dets], dtype=np.float64).reshape(-1, 4)
+        pairs = self._match(box_iou(predicted, det_boxes), self.iou_threshold) if n_tracks and len(dets) else []
+        matched_tracks = np.zeros(n_tracks, dtype=bool)
+        matched_dets = np.zeros(len(dets), dtype=bool)
+        if pairs:
+            t_idx = np.fromiter((p[0] for p in pairs), dtype=np.int64, count=len(pairs))
+            d_idx = np.fromiter((p[1] for p in pairs), dtype=np.int64, count=len(pairs))
+            if dt > 1e-6:
+                measured = (det_boxes[d_idx] - self.boxes[t_idx]) / dt
+                a = self.velocity_smoothing
+                self.velocities[t_idx] = a * measured + (1 - a) * self.velocities[t_idx]
+            self.boxes[t_idx] = det_boxes[d_idx]
+            self.hits[t_idx] += 1
+            self.misses[t_idx] = 0
+            matched_tracks[t_idx] = True
+            matched_dets[d_idx] = True
+            for t, d in zip(t_idx.tolist(), d_idx.tolist()):
+                dets[d].track_id = int(self.ids[t])
+        # Unmatched tracks coast on their prediction until max_age misses
+        coast = ~matched_tracks
+        self.boxes[coast] = predicted[coast]
+        self.misses[coast] += 1
+        self.age += 1
+        keep = self.misses <= self.max_age
+        if not keep.all():
+            self._compact(keep)
+        new = np.nonzero(~matched_dets)[0]
+        if len(new):
+            new_ids = np.arange(self._next_id, self._next_id + len(new), dtype=np.int64)
+            self._next_id += len(new)
+            for d, track_id in zip(new.tolist(), new_ids.tolist()):
+                dets[d].track_id = track_id
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, det_boxes[new]])
+            self.velocities = np.concatenate([self.velocities, np.zeros((len(new), 4))])
+            self.hits = np.concatenate([self.hits, np.ones(len(new), dtype=np.int64)])
+            self.misses = np.concatenate([self.misses, np.zeros(len(new), dtype=np.int64)])
+            self.age = np.concatenate([self.age, np.zeros(len(new), dtype=np.int64)])
+
+    def _compact(self, keep: np.ndarray) -> None:
+        self.ids, self.boxes, self.velocities = self.ids[keep], self.boxes[keep], self.velocities[keep]
+        self.hits, self.misses, self.age = self.hits[keep], self.misses[keep], self.age[keep]
+
+    def _row(self, track_id: Optional[int]) -> Optional[int]:
+        if track_id is None:
+            return None
+        rows = np.nonzero(self.ids == track_id)[0]
+        return int(rows[0]) if len(rows) else None
+
+    def select(self, dets: Sequence[Detection], result=None) -> Optional[Detection]:
+        """
+        Target among dets (e.g. the enrolled people of a detector result) with hysteresis. The decision
+        is made once per result (the detector's list, default dets); repeated calls for the same result
+        return the same target.
+        """
+        with self._lock:
+            return self._select(dets, dets if result is None else result)
+
+    def _select(self, dets: Sequence[Detection], result) -> Optional[Detection]:
+        by_id = {d.track_id: d for d in dets if d.track_id is not None}
+        if result is self._selected_for:
+            return by_id.get(self.target_id)
+        self._selected_for = result
+        current = by_id.get(self.target_id)
+        if current is None:
+            row = self._row(self.target_id)
+            if row is not None and self.misses[row] <= self.hold_frames:
+                return None  # target briefly missed: hold instead of jumping to someone else
+            best = max(by_id.values(), key=_area, default=None)
+            self._set_target(best.track_id if best is not None else None)
+            return best
+        challengers = [
+            d for d in by_id.values() if d.track_id != self.target_id and self.hits[self._row(d.track_id)] >= self.min_hits
+        ]
+        best = max(challengers, key=_area, default=None)
+        if best is None or _area(best) <= _area(current) * (1.0 + self.switch_margin):
+            self._challenger, self._challenger_count = None, 0
+            return current
+        if self._challenger == best.track_id:
+            self._challenger_count += 1
+        else:
+            self._challenger, self._challenger_count = best.track_id, 1
+        if self._challenger_count < self.switch_frames:
+            return current
+        self._set_target(best.track_id)
+        return best
+
+    def _set_target(self, track_id: Optional[int]) -> None:
+        if track_id != self.target_id and track_id is not None and self.target_id is not None:
+            self.switches += 1
+            log.info("Target switched from track %d to %d", self.target_id, track_id)
+        self.target_id = track_id
+        self._challenger, self._challenger_count = None, 0
+
+
+def create_multi_tracker(cfg) -> MultiFaceTracker:
+    return MultiFaceTracker(
+        iou_threshold=cfg.iou_threshold,
+        matching=cfg.matching,
+        max_age=cfg.max_age,
+        min_hits=cfg.min_hits,
+        switch_margin=cfg.switch_margin,
+        switch_frames=cfg.switch_frames,
+        hold_frames=cfg.hold_frames,
+    )
@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .frame_pool import PooledFrame
+
+log = logging.getLogger(__name__)
+
+_PAGE = b"""<html><head><title>Tracker preview</title></head>
+<body style="margin:0;background:#111"><img src="/stream.mjpg" style="max-width:100%"></body></html>"""
+
+
+def draw_overlay(frame: np.ndarray, person, error_px, steps: int, frame_center: Tuple[int, int]) -> None:
+    """Face box, face center, image center and error label, drawn in place."""
+    if person is None:
+        return
+    cx, cy = person.center
+    x1, y1, x2, y2 = map(int, person.bbox)
+    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    cv2.circle(frame, (int(cx), int(cy)), 3, (0, 255, 0), -1)
+    cv2.circle(frame, frame_center, 3, (0, 0, 255), -1)
+    cv2.putText(
+        frame,
+        f"{f'#{person.track_id} ' if person.track_id is not None else ''}"
+        f"{person.identity + ' ' if person.identity else ''}err={error_px:.1f}px steps={steps}",
+        (x1, max(0, y1 - 10)),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        0.5,
+        (0, 255, 0),
+        1,
+        cv2.LINE_AA,
+    )
+
+
+def draw_status(canvas: np.ndarray, lines: List[str], scale: float = 0.6, line_h: int = 28) -> None:
+    y = int(line_h * 0.9)
+    for line in lines:
+        cv2.putText(canvas, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 255, 0), 1, cv2.LINE_AA)
+        y += line_h
+
+
+class MjpegPreviewServer:
+    """
+    MJPEG-over-HTTP preview. The control loop only hands over references via publish();
+    copying, overlay drawing and JPEG encoding happen on a render thread, and only while
+    at least one client is connected, at no more than max_fps.
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1", max_fps: float = 5.0, quality: int = 70):
+        self.max_fps = max_fps
+        self.quality = quality
+        self._latest: Optional[Tuple[np.ndarray, Callable[[np.ndarray], None], Optional[PooledFrame]]] = None
+        self._latest_seq = 0
+        self._jpeg: Optional[bytes] = None
+        self._jpeg_seq = 0
+        self._cond = threading.Condition()
+        self._clients = 0
+        self._running = True
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="preview-http", daemon=True).start()
+        self._render_thread = threading.Thread(target=self._render_loop, name="preview-render", daemon=True)
+        self._render_thread.start()
+        log.info("MJPEG preview on http://%s:%d/", host, self.port)
+
+    @property
+    def active(self) -> bool:
+        return self._clients > 0
+
+    def publish(
+        self, frame: np.ndarray, draw: Callable[[np.ndarray], None], buffer: Optional[PooledFrame] = None
+    ) -> None:
+        """
+        Hand over the latest frame and a callback that draws overlays onto a copy of it.
+        A pooled frame is retained until the render thread has copied it.
+        """
+        if buffer is not None:
+            buffer.retain()
+        with self._cond:
+            if self._latest is not None and self._latest[2] is not None:
+                self._latest[2].release()  # superseded before it was rendered
+            self._latest = (frame, draw, buffer)
+            self._latest_seq += 1
+            self._cond.notify_all()
+
+    def _render_loop(self) -> None:
+        rendered_seq = 0
+        while self._running:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: not self._running or (self._clients > 0 and self._latest_seq != rendered_seq)
+                )
+                if not self._running:
+                    return
+                frame, draw, buffer = self._latest
+                self._latest = None
+                rendered_seq = self._latest_seq
+            start = time.monotonic()
+            view = frame.copy()
+            if buffer is not None:
+                buffer.release()
+            draw(view)
+            ok, buf = cv2.imencode(".jpg", view, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if ok:
+                with self._cond:
+                    self._jpeg = buf.tobytes()
+                    self._jpeg_seq += 1
+                    self._cond.notify_all()
+            # Cap the preview rate; the sleep happens here, never in the control loop
+            time.sleep(max(0.0, 1.0 / self.max_fps - (time.monotonic() - start)))
+
+    def _make_handler(self):
+        preview = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                path = self.path.split("?")[0]
+                if path == "/":
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html")
+                    self.send_header("Content-Length", str(len(_PAGE)))
+                    self.end_headers()
+                    self.wfile.write(_PAGE)
+                elif path == "/stream.mjpg":
+                    self._stream()
+                else:
+                    self.send_error(404)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                with preview._cond:
+                    preview._clients += 1
+                    preview._cond.notify_all()
+                sent_seq = 0
+                try:
+                    while preview._running:
+                        with preview._cond:
+                            preview._cond.wait_for(
+                                lambda: not preview._running or preview._jpeg_seq != sent_seq, timeout=1.0
+                            )
+                            if preview._jpeg_seq == sent_seq:
+                                continue
+                            jpeg, sent_seq = preview._jpeg, preview._jpeg_seq
+                        self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n")
+                        self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with preview._cond:
+                        preview._clients -= 1
+
+            def log_message(self, fmt, *args):
+                log.debug("preview http: " + fmt, *args)
+
+        return Handler
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
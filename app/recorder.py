@@ -0,0 +1,222 @@
+"""
+Flight recorder: an append-only binary log of a tracking session.
+
+File layout (little endian): b"MISOREC1", u32 config length, AppConfig as JSON, then records of
+u8 kind + u32 payload length + payload. Frames are stored raw (downscaled BGR), so FlightLog can
+hand them out as zero-copy views of a memory-mapped file. See app/replay.py for offline replay.
+"""
+
+import json
+import logging
+import mmap
+import queue
+import struct
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import AppConfig, apply_overrides
+from .detector import Detection
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"MISOREC1"
+KIND_FRAME, KIND_DETECTIONS, KIND_LOOP = 1, 2, 3
+
+_RECORD = struct.Struct("<BI")
+# seq, capture timestamp, original width/height, stored width/height (pixels follow)
+_FRAME = struct.Struct("<IdHHHH")
+# capture timestamp of the detector input, box count (x1, y1, x2, y2, conf float32 each follow)
+_DETECTIONS = struct.Struct("<dI")
+_BOX = np.dtype([("x1", "<f4"), ("y1", "<f4"), ("x2", "<f4"), ("y2", "<f4"), ("conf", "<f4")])
+# seq, loop start, target time, prediction time, flags (1 = person, 2 = fresh measurement),
+# person bbox + conf, measurement (capture ts, pan steps), ControlState before, error_px, steps, ControlState after
+_LOOP = struct.Struct("<IdddB4dddqqdqddiqdqd")
+FLAG_PERSON, FLAG_MEASUREMENT = 1, 2
+
+
+@dataclass
+class LoopRecord:
+    seq: int
+    loop_start: float
+    now: float
+    mono_now: float
+    person: Optional[Tuple[float, float, float, float]]
+    conf: float
+    person_meta: Optional[Tuple[float, int]]
+    state_before: Tuple[int, float, int, float]  # ControlState fields
+    error_px: Optional[float]
+    steps: int
+    state_after: Tuple[int, float, int, float]
+
+
+def _state_tuple(state) -> Tuple[int, float, int, float]:
+    return int(state.current_steps), float(state.last_error_px), int(state.target_steps), float(state.speed_sps)
+
+
+def pack_loop(rec: LoopRecord) -> bytes:
+    flags = (FLAG_PERSON if rec.person is not None else 0) | (FLAG_MEASUREMENT if rec.person_meta is not None else 0)
+    bbox = rec.person if rec.person is not None else (0.0, 0.0, 0.0, 0.0)
+    meta_ts, meta_pan = rec.person_meta if rec.person_meta is not None else (0.0, 0)
+    return _LOOP.pack(
+        rec.seq, rec.loop_start, rec.now, rec.mono_now, flags, *bbox, rec.conf, meta_ts, meta_pan,
+        *rec.state_before, float("nan") if rec.error_px is None else rec.error_px, rec.steps, *rec.state_after,
+    )
+
+
+def unpack_loop(buf, offset: int) -> LoopRecord:
+    v = _LOOP.unpack_from(buf, offset)
+    flags = v[4]
+    return LoopRecord(
+        seq=v[0],
+        loop_start=v[1],
+        now=v[2],
+        mono_now=v[3],
+        person=tuple(v[5:9]) if flags & FLAG_PERSON else None,
+        conf=v[9],
+        person_meta=(v[10], v[11]) if flags & FLAG_MEASUREMENT else None,
+        state_before=tuple(v[12:16]),
+        error_px=None if np.isnan(v[16]) else v[16],
+        steps=v[17],
+        state_after=tuple(v[18:22]),
+    )
+
+
+class FlightRecorder:
+    """
+    Serializes on a writer thread. The loop only downscales the frame and enqueues; when the bounded
+    queue is full the record is dropped (counted in `dropped`) instead of stalling the loop.
+    """
+
+    def __init__(self, path, cfg: AppConfig, frame_width: int = 160, queue_size: int = 256):
+        self.path = Path(path)
+        self.frame_width = frame_width
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue[Optional[Tuple[int, object]]]" = queue.Queue(maxsize=queue_size)
+        self._file = open(self.path, "wb")
+        header = json.dumps(asdict(cfg)).encode()
+        self._file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        self._thread = threading.Thread(target=self._write_loop, name="flight-recorder", daemon=True)
+        self._thread.start()
+        log.info("Recording session to %s", self.path)
+
+    def _put(self, kind: int, item) -> None:
+        try:
+            self._queue.put_nowait((kind, item))
+        except queue.Full:
+            self.dropped += 1
+
+    def record_frame(self, captured) -> None:
+        image = captured.image
+        h, w = image.shape[:2]
+        if self.frame_width and w > self.frame_width:
+            # Copies out of the (possibly pooled) capture buffer before it is recycled
+            small = cv2.resize(image, (self.frame_width, max(1, h * self.frame_width // w)), interpolation=cv2.INTER_AREA)
+        else:
+            small = image.copy()
+        self._put(KIND_FRAME, (captured.seq, captured.timestamp, w, h, small))
+
+    def record_detections(self, timestamp: float, dets: List[Detection]) -> None:
+        boxes = [(*d.bbox, d.conf) for d in dets]
+        self._put(KIND_DETECTIONS, (timestamp, boxes))
+
+    def record_loop(self, seq, loop_start, now, mono_now, person, person_meta, state_before, error_px, steps, state) -> None:
+        rec = LoopRecord(
+            seq=seq,
+            loop_start=loop_start,
+            now=now,
+            mono_now=mono_now,
+            person=tuple(float(v) for v in person.bbox) if person is not None else None,
+            conf=float(person.conf) if person is not None else 0.0,
+            person_meta=person_meta,
+            state_before=_state_tuple(state_before),
+            error_px=None if error_px is None else float(error_px),
+            steps=int(steps),
+            state_after=_state_tuple(state),
+        )
+        self._put(KIND_LOOP, rec)
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind, data = item
+            if kind == KIND_FRAME:
+                seq, ts, w, h, small = data
+                payload = _FRAME.pack(seq, ts, w, h, small.shape[1], small.shape[0]) + small.tobytes()
+            elif kind == KIND_DETECTIONS:
+                ts, boxes = data
+                payload = _DETECTIONS.pack(ts, len(boxes)) + np.array(boxes, dtype=np.float32).tobytes()
+            else:
+                payload = pack_loop(data)
+            self._file.write(_RECORD.pack(kind, len(payload)) + payload)
+            self.written += 1
+        self._file.flush()
+
+    def close(self) -> None:
+        self._queue.put(None)  # blocking: the writer drains everything queued before it
+        self._thread.join(timeout=10.0)
+        self._file.close()
+        log.info("Recorder closed: %d records written, %d dropped", self.written, self.dropped)
+
+
+class FlightLog:
+    """Read-only, memory-mapped view of a recording."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fh = open(self.path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a flight recording")
+        (n,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.config: AppConfig = apply_overrides(AppConfig(), json.loads(self._mm[start : start + n]))
+        self._index: List[Tuple[int, int, int]] = []  # (kind, payload offset, payload length)
+        pos = start + n
+        while pos + _RECORD.size <= len(self._mm):
+            kind, length = _RECORD.unpack_from(self._mm, pos)
+            pos += _RECORD.size
+            if pos + length > len(self._mm):
+                log.warning("Truncated record at end of %s ignored", self.path)
+                break
+            self._index.append((kind, pos, length))
+            pos += length
+
+    def count(self, kind: int) -> int:
+        return sum(1 for k, _, _ in self._index if k == kind)
+
+    def frames(self) -> Iterator[Tuple[int, float, Tuple[int, int], np.ndarray]]:
+        """(seq, capture timestamp, original (width, height), stored image as a view into the file)."""
+        for kind, offset, _ in self._index:
+            if kind != KIND_FRAME:
+                continue
+            seq, ts, w, h, sw, sh = _FRAME.unpack_from(self._mm, offset)
+            image = np.frombuffer(self._mm, dtype=np.uint8, count=sw * sh * 3, offset=offset + _FRAME.size)
+            yield seq, ts, (w, h), image.reshape(sh, sw, 3)
+
+    def detections(self) -> Iterator[Tuple[float, List[Detection]]]:
+        for kind, offset, _ in self._index:
+            if kind != KIND_DETECTIONS:
+                continue
+            ts, n = _DETECTIONS.unpack_from(self._mm, offset)
+            boxes = np.frombuffer(self._mm, dtype=_BOX, count=n, offset=offset + _DETECTIONS.size)
+            yield ts, [Detection((float(b["x1"]), float(b["y1"]), float(b["x2"]), float(b["y2"])), float(b["conf"]), 0) for b in boxes]
+
+    def loops(self) -> Iterator[LoopRecord]:
+        for kind, offset, _ in self._index:
+            if kind == KIND_LOOP:
+                yield unpack_loop(self._mm, offset)
+
+    def close(self) -> None:
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # frame views still alive; the mapping goes away with them
+        self._fh.close()
@@ -0,0 +1,183 @@
+"""
+Deterministic replay of a flight recording (app/recorder.py) through TrackerApp.
+
+The recorded frames stand in for the camera, the recorded target and clocks stand in for the
+detector and time, and a simulated waveform driver stands in for the motor. With unchanged control
+code every step command matches the recording; any difference is reported per frame.
+
+    python test/test.py --record session.rec ...      # on the Pi
+    python -m app.replay session.rec --metrics        # offline
+"""
+
+import argparse
+import logging
+import sys
+from copy import deepcopy
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+
+from .camera import CapturedFrame
+from .detector import Detection
+from .metrics import REGISTRY as METRICS
+from .motor_driver import SimulatedWaveBackend, WaveformStepDriver
+from .recorder import FlightLog, LoopRecord
+from .tracker import TrackerApp
+
+log = logging.getLogger(__name__)
+
+
+class ReplayCamera:
+    """Camera stand-in yielding recorded frames, scaled back to the recorded capture size."""
+
+    def __init__(self, flight_log: FlightLog, seqs, on_end):
+        # Only frames whose loop record was written too (the recorder drops records under backlog)
+        self._frames = (item for item in flight_log.frames() if item[0] in seqs)
+        self._next = next(self._frames, None)
+        self._on_end = on_end
+        self.frames_captured = 0
+        self.dropped_frames = 0
+        self.pool_stats = (0, 0)
+
+    @property
+    def next_seq(self) -> Optional[int]:
+        """Sequence number of the frame the next read_frame() returns (None at the end)."""
+        return None if self._next is None else self._next[0]
+
+    def read_frame(self, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        item, self._next = self._next, next(self._frames, None)
+        if item is None:
+            self._on_end()
+            return None
+        seq, ts, (w, h), small = item
+        image = cv2.resize(small, (w, h), interpolation=cv2.INTER_LINEAR)
+        self.frames_captured += 1
+        return CapturedFrame(image, ts, seq)
+
+    def set_mode(self, width: int, height: int, fps: int) -> None:
+        pass
+
+    def release(self) -> None:
+        pass
+
+
+class ReplayChecker:
+    """Takes the recorder's place in the replayed app and compares each loop against the recording."""
+
+    def __init__(self, loops: Dict[int, LoopRecord], on_loop=None):
+        self._loops = loops
+        self._on_loop = on_loop
+        self.checked = 0
+        self.mismatches: List[Tuple[int, int, int]] = []  # (seq, recorded steps, replayed steps)
+
+    def record_frame(self, captured) -> None:
+        pass
+
+    def record_detections(self, timestamp, dets) -> None:
+        pass
+
+    def record_loop(self, seq, loop_start, now, mono_now, person, person_meta, state_before, error_px, steps, state) -> None:
+        if self._on_loop is not None:
+            self._on_loop()
+        rec = self._loops.get(seq)
+        if rec is None:
+            return
+        self.checked += 1
+        if steps != rec.steps:
+            self.mismatches.append((seq, rec.steps, steps))
+
+    def close(self) -> None:
+        pass
+
+
+class ReplayTrackerApp(TrackerApp):
+    """
+    TrackerApp fed from a recording. Detection, motion gating, tracking and preview are off; the
+    target, clocks and ControlState of every loop come from the log, so each step command is checked
+    on its own: loops whose records the recorder dropped do not shift the following ones, and
+    recordings made with async_motion (whose motion thread timing cannot be reproduced) replay with
+    synchronous simulated motion.
+    """
+
+    def __init__(self, flight_log: FlightLog, metrics: bool = False):
+        cfg = deepcopy(flight_log.config)
+        cfg.control.async_motion = False
+        cfg.recorder.path = ""
+        cfg.detector.process_workers = 0
+        cfg.detector.model = "hog"  # unused; avoids loading an ONNX model that may not be here
+        cfg.tracking.enabled = False
+        cfg.scheduler.enabled = False
+        cfg.motion_gate.enabled = False
+        cfg.identity.enabled = False
+        cfg.display.mode = "headless"
+        cfg.display.preview_port = 0
+        cfg.metrics.enabled = metrics
+        cfg.metrics.http_port = 0
+        driver = WaveformStepDriver(
+            max_speed_sps=cfg.control.max_speed_sps,
+            accel_sps2=cfg.control.accel_sps2,
+            backend=SimulatedWaveBackend(strict=False),
+        )
+        super().__init__(cfg, motor_driver=driver)
+        frame_seqs = {item[0] for item in flight_log.frames()}
+        loops = {rec.seq: rec for rec in flight_log.loops() if rec.seq in frame_seqs}
+        self.camera = ReplayCamera(flight_log, loops, on_end=self._stop)
+        self.checker = ReplayChecker(loops, on_loop=self._end_loop)
+        self.recorder = self.checker
+        self._loops = loops
+        self._pace = False
+        # Clocks come from the loop records: before a loop's target is known the wall clock reads as
+        # the upcoming loop's start, afterwards as its recorded target time; the monotonic clock reads
+        # as the recorded prediction time.
+        self._replay_rec: Optional[LoopRecord] = None
+        self._replay_wall = next(iter(loops.values())).loop_start if loops else 0.0
+        self._clock = self._replay_clock
+        self._replay_mono = 0.0
+        self._mono = lambda: self._replay_mono
+
+    def _replay_clock(self) -> float:
+        if self._replay_rec is not None:
+            return self._replay_rec.now
+        upcoming = self._loops.get(self.camera.next_seq)
+        if upcoming is not None:
+            self._replay_wall = upcoming.loop_start
+        return self._replay_wall
+
+    def _end_loop(self) -> None:
+        self._replay_rec = None
+
+    def _acquire_target(self, frame, seq):
+        rec = self._loops.get(seq)
+        if rec is None:
+            self._person_meta = None
+            return None
+        self._replay_rec = rec
+        self._replay_mono = rec.mono_now
+        state = self.controller.state
+        state.current_steps, state.last_error_px, state.target_steps, state.speed_sps = rec.state_before
+        self._person_meta = rec.person_meta
+        if rec.person is None:
+            return None
+        return Detection(rec.person, rec.conf, 0)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Replay a flight recording and compare controller outputs.")
+    p.add_argument("recording", help="File written with RecorderConfig.path / test.py --record.")
+    p.add_argument("--metrics", action="store_true", help="Collect per-stage timings while replaying.")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    flight_log = FlightLog(args.recording)
+    app = ReplayTrackerApp(flight_log, metrics=args.metrics)
+    app.run()
+    checker = app.checker
+    print(f"Replayed {checker.checked} loops, {len(checker.mismatches)} step mismatches")
+    for seq, recorded, replayed in checker.mismatches[:20]:
+        print(f"  seq={seq}: recorded {recorded} steps, replayed {replayed}")
+    if args.metrics:
+        print(METRICS.summary())
+    sys.exit(1 if checker.mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
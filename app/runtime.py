@@ -0,0 +1,374 @@
+"""
+Asyncio runtime for TrackerApp: capture, detection, control, actuation and output run as separate
+tasks connected by bounded channels, so each stage runs at its own rate and a slow stage only
+makes its input channel drop or fill up (visible in the stage report and metrics) instead of
+delaying everything else. Blocking calls (camera read, detector, motor moves) run on executors.
+
+    python test/test.py --runtime async
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .camera import CapturedFrame
+from .metrics import E2E_METRIC, REGISTRY as METRICS, STAGE_METRIC
+from .tracker import TrackerApp
+
+log = logging.getLogger(__name__)
+
+POLICIES = ("latest", "drop_oldest", "block")
+_HOME = "home"
+
+
+class Channel:
+    """
+    Bounded single-consumer channel between two stages (event-loop thread only).
+
+    policy="latest": holds one item, a put replaces it. "drop_oldest": FIFO of maxsize, a put into a
+    full channel evicts the oldest item. "block": a put into a full channel waits (backpressure).
+    Evicted and leftover items are passed to on_drop (e.g. to release pooled frames).
+    """
+
+    def __init__(self, name: str, policy: str = "latest", maxsize: int = 1, on_drop: Optional[Callable] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown channel policy: {policy}")
+        self.name = name
+        self.policy = policy
+        self.maxsize = 1 if policy == "latest" else max(1, maxsize)
+        self._on_drop = on_drop
+        self._items: Deque = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self.puts = 0
+        self.gets = 0
+        self.dropped = 0
+        self.blocked_s = 0.0
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def put(self, item) -> None:
+        if len(self._items) >= self.maxsize:
+            if self.policy == "block":
+                start = time.perf_counter()
+                while len(self._items) >= self.maxsize:
+                    self._not_full.clear()
+                    await self._not_full.wait()
+                self.blocked_s += time.perf_counter() - start
+            else:
+                self._drop(self._items.popleft())
+        self._items.append(item)
+        self.puts += 1
+        self.high_water = max(self.high_water, len(self._items))
+        self._not_empty.set()
+
+    async def get(self):
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self._take()
+
+    def get_nowait(self):
+        return self._take() if self._items else None
+
+    def _take(self):
+        item = self._items.popleft()
+        self.gets += 1
+        self._not_full.set()
+        return item
+
+    def _drop(self, item) -> None:
+        self.dropped += 1
+        METRICS.inc("runtime_channel_dropped_total", channel=self.name)
+        if self._on_drop is not None:
+            self._on_drop(item)
+
+    def close(self) -> None:
+        while self._items:
+            item = self._items.popleft()
+            if self._on_drop is not None:
+                self._on_drop(item)
+
+
+def _release_frame(item) -> None:
+    item[0].release()
+
+
+def _share(captured: CapturedFrame) -> CapturedFrame:
+    """Another handle on the same image holding its own pool reference."""
+    buffer = captured.buffer.retain() if captured.buffer is not None else None
+    return CapturedFrame(captured.image, captured.timestamp, captured.seq, buffer)
+
+
+class AsyncRuntime:
+    """
+    Runs an already constructed TrackerApp on asyncio instead of TrackerApp.run, reusing its camera,
+    detector (or process pool), controller, light, preview and recorder.
+
+    Control emits absolute pan targets (pan position at capture plus the correction), and the command
+    channel always keeps only the newest one, so a target computed while the motor was still busy
+    never adds up with the move before it. Optical-flow tracking is loop-runtime only.
+    """
+
+    def __init__(self, app: TrackerApp):
+        self.app = app
+        self.cfg = app.cfg
+        rt = self.cfg.runtime
+        self.frames = Channel("frames", rt.channel_policy, rt.channel_size, on_drop=_release_frame)
+        self.display = Channel("display", "latest", on_drop=_release_frame)
+        self.detections = Channel("detections", rt.channel_policy, rt.channel_size)
+        self.commands = Channel("commands", "latest")
+        self.channels = (self.frames, self.display, self.detections, self.commands)
+        self.stage_counts: Dict[str, int] = {name: 0 for name in ("capture", "detect", "control", "actuate", "output")}
+        # Camera reads and motor moves block; each gets its own thread so neither waits on the other
+        self._capture_exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rt-capture")
+        self._motor_exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rt-motor")
+        self._tasks: List[asyncio.Task] = []
+        self._status: Tuple = (None, None, 0)  # person, error_px, steps of the latest control step
+        self._last_seen = time.monotonic()
+        if app.box_tracker is not None:
+            log.warning("Optical-flow tracking is not supported by the async runtime; detector results only")
+
+    def run(self) -> None:
+        try:
+            self.app._start_up()
+            asyncio.run(self._main())
+        finally:
+            for channel in self.channels:
+                channel.close()
+            self._capture_exec.shutdown(wait=True)
+            self._motor_exec.shutdown(wait=True)  # let a running move finish before the driver is disabled
+            self.app._shutdown()
+
+    def stop(self) -> None:
+        log.info("Stopping...")
+        self.app._running = False
+        for task in self._tasks:
+            task.cancel()
+
+    async def _main(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # not the main thread / platform without loop signal handlers; TrackerApp's handler stays
+        self.app.light.off()
+        stages = [self._capture, self._detect, self._control, self._actuate, self._output, self._watch]
+        self._tasks = [asyncio.create_task(stage(), name=stage.__name__.strip("_")) for stage in stages]
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(sig)
+                except (NotImplementedError, RuntimeError):
+                    pass
+
+    async def _capture(self) -> None:
+        app = self.app
+        loop = asyncio.get_running_loop()
+        while True:
+            captured = await loop.run_in_executor(self._capture_exec, app.camera.read_frame)
+            if captured is None:
+                await asyncio.sleep(0.05)
+                continue
+            self.stage_counts["capture"] += 1
+            pan_steps = app.controller.state.current_steps
+            if app.recorder is not None:
+                app.recorder.record_frame(captured)
+            app._publish_frame(captured)
+            if app.motion_gate is not None:
+                app._scene_active = app.motion_gate(captured.image)
+                if app._idle_mode and app._scene_active:
+                    app._set_idle(False)
+            if app._scene_active:
+                await self.frames.put((_share(captured), pan_steps))
+            await self.display.put((_share(captured), pan_steps))
+            captured.release()
+
+    async def _detect(self) -> None:
+        if self.app._pool is not None:
+            await self._detect_pool()
+            return
+        app = self.app
+        loop = asyncio.get_running_loop()
+        while True:
+            captured, pan_steps = await self.frames.get()
+            try:
+                dets, latency = await loop.run_in_executor(app._executor, app._detect_timed, captured.image, captured.timestamp)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                log.warning("Detector failed: %s", exc)
+                dets, latency = [], 0.0
+            if app.scheduler is not None:
+                app.scheduler.observe(latency, dets, captured.image.shape[1])
+            width = captured.image.shape[1]
+            captured.release()
+            await self._emit_detections(captured.timestamp, pan_steps, width, dets)
+
+    async def _detect_pool(self) -> None:
+        """Process pool: submit the newest frame, poll results; the pool's shared memory copies frames."""
+        app = self.app
+        loop = asyncio.get_running_loop()
+        meta: Dict[int, Tuple[float, int, int]] = {}
+        while True:
+            result = app._pool.poll()
+            if result is not None and result.seq in meta:
+                ts, pan_steps, width = meta.pop(result.seq)
+                if app.identity is not None or app.multi_tracker is not None:
+                    await loop.run_in_executor(app._executor, app._associate, result.frame, result.dets, ts)
+                await self._emit_detections(ts, pan_steps, width, result.dets)
+            item = self.frames.get_nowait()
+            if item is None:
+                await asyncio.sleep(0.005)
+                continue
+            captured, pan_steps = item
+            if app._pool.submit(captured.image, captured.seq):
+                meta[captured.seq] = (captured.timestamp, pan_steps, captured.image.shape[1])
+                for old in [s for s in meta if s < captured.seq - 64]:
+                    del meta[old]
+            captured.release()
+
+    async def _emit_detections(self, ts: float, pan_steps: int, width: int, dets) -> None:
+        self.stage_counts["detect"] += 1
+        app = self.app
+        app._latest_dets = dets
+        app._det_meta = (ts, pan_steps)
+        app._record_detections()
+        await self.detections.put((ts, pan_steps, width, dets))
+
+    async def _control(self) -> None:
+        app = self.app
+        ctrl = app.controller
+        tick = 1.0 / self.cfg.runtime.control_hz if self.cfg.runtime.control_hz > 0 and app.estimator else None
+        person, width, last_ts = None, 0, None
+        while True:
+            if tick is None:
+                item = await self.detections.get()
+            else:
+                try:
+                    item = await asyncio.wait_for(self.detections.get(), timeout=tick)
+                except asyncio.TimeoutError:
+                    item = None  # no new measurement: act on the prediction for the last target
+            if item is not None:
+                ts, pan_steps, width, dets = item
+                person = app._pick_person(dets)
+                app._person_meta = (ts, pan_steps) if person is not None else None
+            else:
+                app._person_meta = None
+            self.stage_counts["control"] += 1
+            now = time.monotonic()
+            if person is None:
+                app._last_steps = 0
+                self._status = (None, None, 0)
+                if now - self._last_seen > self.cfg.control.timeout_no_person_s:
+                    if app._light_on:
+                        app.light.off()
+                        app._light_on = False
+                        await self.commands.put((_HOME, None))
+                    if app.motion_gate is not None and not app._scene_active and not app._idle_mode:
+                        app._set_idle(True)
+                continue
+            stage_t0 = time.perf_counter()
+            if app.estimator is not None:
+                # Error relative to where the axis is now (the estimator works in pan-compensated pixels)
+                error_px, steps = app._predictive_command(person, width, app._mono())
+                base = ctrl.state.current_steps
+            else:
+                # Error was measured with the axis at pan_steps
+                error_px = person.center[0] - width / 2
+                dt = max(ts - last_ts, 1e-3) if last_ts is not None else 0.0
+                steps = ctrl.compute_step_command(error_px, width, dt=dt)
+                base = pan_steps
+            last_ts = ts
+            METRICS.observe(STAGE_METRIC, time.perf_counter() - stage_t0, stage="control")
+            self._last_seen = now
+            app._note_tracked()
+            if not app._light_on:
+                app.light.on()
+                app._light_on = True
+            app._last_steps = steps
+            self._status = (person, error_px, steps)
+            if steps:
+                await self.commands.put((base + steps, ts))
+
+    async def _actuate(self) -> None:
+        app = self.app
+        ctrl = app.controller
+        loop = asyncio.get_running_loop()
+        while True:
+            target, ts = await self.commands.get()
+            self.stage_counts["actuate"] += 1
+            if target == _HOME:
+                await loop.run_in_executor(self._motor_exec, ctrl.home)
+                continue
+            # Relative to the position right now; with async_motion this retargets the motion thread
+            steps = target - ctrl.state.current_steps
+            if steps:
+                await loop.run_in_executor(self._motor_exec, ctrl.move, steps)
+            METRICS.observe(E2E_METRIC, app._mono() - ts)
+
+    async def _output(self) -> None:
+        app = self.app
+        stats_mark = report_mark = (time.monotonic(), dict(self.stage_counts))
+        while True:
+            captured, _ = await self.display.get()
+            self.stage_counts["output"] += 1
+            frame = captured.image
+            person, error_px, steps = self._status
+            stage_t0 = time.perf_counter()
+            app._frame_ref = captured.buffer
+            app._visualize(frame, person, error_px, steps, (frame.shape[1] // 2, frame.shape[0] // 2))
+            app._frame_ref = None
+            METRICS.observe(STAGE_METRIC, time.perf_counter() - stage_t0, stage="show")
+            captured.release()
+            app._publish_gauges()
+            now = time.monotonic()
+            if METRICS.enabled and now - stats_mark[0] >= 1.0:
+                self._publish_stats(stats_mark[1], now - stats_mark[0])
+                stats_mark = (now, dict(self.stage_counts))
+            interval = self.cfg.runtime.report_interval_s
+            if interval and now - report_mark[0] >= interval:
+                log.info("%s", self.format_report(report_mark[1], now - report_mark[0]))
+                report_mark = (now, dict(self.stage_counts))
+
+    async def _watch(self) -> None:
+        # TrackerApp._stop (window 'q', signal handler outside the main thread) only clears the flag
+        while self.app._running:
+            await asyncio.sleep(0.1)
+        self.stop()
+
+    def stage_rates(self, counts: Dict[str, int], elapsed: float) -> Dict[str, float]:
+        return {name: (self.stage_counts[name] - counts.get(name, 0)) / elapsed for name in self.stage_counts}
+
+    def _publish_stats(self, counts: Dict[str, int], elapsed: float) -> None:
+        for name, rate in self.stage_rates(counts, elapsed).items():
+            METRICS.set_gauge("runtime_stage_rate", rate, stage=name)
+        for channel in self.channels:
+            METRICS.set_gauge("runtime_channel_depth", len(channel), channel=channel.name)
+            METRICS.set_gauge("runtime_channel_blocked_seconds", channel.blocked_s, channel=channel.name)
+
+    def format_report(self, counts: Dict[str, int], elapsed: float) -> str:
+        rates = " ".join(f"{name}={rate:.1f}/s" for name, rate in self.stage_rates(counts, elapsed).items())
+        chans = " ".join(
+            f"{c.name}[{len(c)}/{c.maxsize} drop={c.dropped} block={c.blocked_s:.1f}s]" for c in self.channels
+        )
+        return f"Stages: {rates} | {chans}"
+
+
+def run_app(app: TrackerApp) -> None:
+    """Run app with the runtime selected by RuntimeConfig.mode."""
+    if app.cfg.runtime.mode == "async":
+        AsyncRuntime(app).run()
+    else:
+        app.run()
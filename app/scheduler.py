@@ -0,0 +1,100 @@
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+from .detector import Detection
+
+log = logging.getLogger(__name__)
+
+
+class QualityScheduler:
+    """
+    Adapts FaceRecognitionDetector.resize_width / upsample at runtime.
+
+    Operating points form a ladder ordered by effective detector resolution (resize_width * 2**upsample).
+    The scheduler steps down when the smoothed detector latency overruns the budget or the face is
+    much larger than HOG needs, and steps up when the face gets small or is lost while latency has
+    headroom. A move needs `patience` consecutive votes and latency uses a hysteresis band, so the
+    operating point does not oscillate.
+    """
+
+    def __init__(
+        self,
+        detector,
+        budget_s: float,
+        widths: Sequence[int] = (160, 200, 240, 320, 400, 480),
+        max_upsample: int = 1,
+        shrink_face_px: float = 140.0,
+        grow_face_px: float = 70.0,
+        hysteresis: float = 0.15,
+        patience: int = 3,
+        ema_alpha: float = 0.3,
+    ):
+        self.detector = detector
+        self.budget_s = budget_s
+        self.shrink_face_px = shrink_face_px
+        self.grow_face_px = grow_face_px
+        self.hysteresis = hysteresis
+        self.patience = patience
+        self.ema_alpha = ema_alpha
+        ladder = {(w, up) for w in widths for up in range(max_upsample + 1)}
+        ladder.add((detector.resize_width, detector.upsample))  # start exactly at the configured point
+        self.ladder: List[Tuple[int, int]] = sorted(ladder, key=lambda p: (p[0] * 2 ** p[1], p[1]))
+        self.index = self.ladder.index((detector.resize_width, detector.upsample))
+        self.latency_ema = 0.0
+        self.face_px = 0.0  # last face width in detector-input pixels, 0 when lost
+        self._votes = 0  # >0 grow, <0 shrink
+        self.changes = 0
+        self._apply()
+
+    @property
+    def operating_point(self) -> Dict[str, float]:
+        width, upsample = self.ladder[self.index]
+        return {
+            "resize_width": width,
+            "upsample": upsample,
+            "latency_ema_ms": self.latency_ema * 1000.0,
+            "budget_ms": self.budget_s * 1000.0,
+            "face_px": self.face_px,
+        }
+
+    def _apply(self) -> None:
+        width, upsample = self.ladder[self.index]
+        self.detector.resize_width = width
+        self.detector.upsample = upsample
+
+    def observe(self, latency_s: float, dets: List[Detection], frame_width: int) -> None:
+        if self.latency_ema == 0.0:
+            self.latency_ema = latency_s
+        else:
+            self.latency_ema += self.ema_alpha * (latency_s - self.latency_ema)
+
+        width, upsample = self.ladder[self.index]
+        scale = (width / frame_width if width and frame_width > width else 1.0) * 2**upsample
+        if dets:
+            largest = max(dets, key=lambda d: d.bbox[2] - d.bbox[0])
+            self.face_px = (largest.bbox[2] - largest.bbox[0]) * scale
+        else:
+            self.face_px = 0.0
+
+        over = self.latency_ema > self.budget_s * (1 + self.hysteresis)
+        headroom = self.latency_ema < self.budget_s * (1 - self.hysteresis)
+        if over or self.face_px > self.shrink_face_px:
+            vote = -1
+        elif headroom and (not dets or self.face_px < self.grow_face_px):
+            vote = 1
+        else:
+            vote = 0
+
+        if vote == 0 or (self._votes and (vote > 0) != (self._votes > 0)):
+            self._votes = vote
+        else:
+            self._votes += vote
+        if abs(self._votes) >= self.patience:
+            new_index = min(max(self.index + (1 if self._votes > 0 else -1), 0), len(self.ladder) - 1)
+            self._votes = 0
+            if new_index != self.index:
+                self.index = new_index
+                self.changes += 1
+                self._apply()
+                log.info("Detector quality -> resize_width=%d upsample=%d (latency %.0fms, face %.0fpx)",
+                         *self.ladder[self.index], self.latency_ema * 1000.0, self.face_px)
@@ -0,0 +1,398 @@
+"""
+Hardware-free closed-loop simulator: a virtual pan axis (MotorDriver) and a synthetic camera that
+renders a panorama with a moving face at the simulated pan angle, driven through TrackerApp on a
+virtual clock (faster than real time). Reports settling time, overshoot, steady-state error and
+step rate, for tuning kp/kd/deadband_px/max_speed_sps and for CI regression checks.
+
+    python -m app.simulator --scenario step --duration 6
+    python -m app.simulator --scenario sine --kp 0.8 --kd 0.1 --json sim.json
+"""
+
+import argparse
+import json
+import logging
+import math
+import time
+from copy import deepcopy
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .camera import CapturedFrame
+from .config import AppConfig, load_config
+from .detector import Detection
+from .metrics import REGISTRY as METRICS
+from .tracker import TrackerApp
+
+log = logging.getLogger(__name__)
+
+
+class SimClock:
+    """Virtual time in seconds. advance() also integrates everything registered with on_advance()."""
+
+    def __init__(self, start: float = 1000.0, max_dt: float = 0.0005):
+        self.t = start
+        self.max_dt = max_dt
+        self._listeners: List[Callable[[float], None]] = []
+
+    def now(self) -> float:
+        return self.t
+
+    def on_advance(self, fn: Callable[[float], None]) -> None:
+        self._listeners.append(fn)
+
+    def advance(self, dt: float) -> None:
+        while dt > 1e-12:
+            h = min(dt, self.max_dt)
+            for fn in self._listeners:
+                fn(h)
+            self.t += h
+            dt -= h
+
+    def advance_to(self, t: float) -> None:
+        if t > self.t:
+            self.advance(t - self.t)
+
+
+class VirtualPanAxis:
+    """
+    MotorDriver for a simulated pan stage. Commanded steps feed a reference position; the shaft follows
+    it as a damped spring (load inertia). Pulses faster than stall_sps are partly lost, like a stepper
+    that cannot keep up. step() blocks in virtual time for the duration of the pulse train.
+    """
+
+    def __init__(
+        self,
+        clock: SimClock,
+        stall_sps: float = 2000.0,
+        natural_hz: float = 15.0,
+        damping: float = 0.7,
+    ):
+        self.clock = clock
+        self.stall_sps = stall_sps
+        self.omega = 2 * math.pi * natural_hz
+        self.damping = damping
+        self.mock = True
+        self.enabled = False
+        self.reference = 0.0  # steps the shaft is being driven toward (settles here: executed steps)
+        self.position = 0.0  # shaft position in steps
+        self.velocity = 0.0
+        self.commanded = 0  # steps requested by the controller
+        self.lost = 0.0
+        self._rate = 0.0  # reference slew while a pulse train is running
+        clock.on_advance(self._integrate)
+
+    def _integrate(self, dt: float) -> None:
+        self.reference += self._rate * dt
+        acc = self.omega**2 * (self.reference - self.position) - 2 * self.damping * self.omega * self.velocity
+        self.velocity += acc * dt
+        self.position += self.velocity * dt
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def step(self, steps: int, step_delay_s: float) -> None:
+        if steps == 0:
+            return
+        rate = 1.0 / max(step_delay_s, 1e-6)
+        duration = abs(steps) / rate
+        executed = abs(steps) * min(1.0, self.stall_sps / rate)
+        self.commanded += steps
+        self.lost += abs(steps) - executed
+        self._rate = math.copysign(executed, steps) / duration
+        self.clock.advance(duration)
+        self._rate = 0.0
+
+    def home(self, home_steps: int = 0) -> None:
+        self.step(-home_steps, step_delay_s=0.002)
+
+
+def make_panorama(width: int = 3600, height: int = 360, seed: int = 0) -> np.ndarray:
+    """Textured 360° backdrop (10 px per degree) so the view visibly pans."""
+    rng = np.random.default_rng(seed)
+    pano = np.zeros((height, width, 3), dtype=np.uint8)
+    pano[:] = np.linspace(50, 110, height, dtype=np.uint8)[:, None, None]
+    for _ in range(width // 40):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        w, h = int(rng.integers(20, 120)), int(rng.integers(40, 200))
+        color = tuple(int(c) for c in rng.integers(30, 140, 3))
+        cv2.rectangle(pano, (x, y), (x + w, min(height - 1, y + h)), color, -1)
+    return pano
+
+
+def trajectory(scenario: str, amplitude_deg: float, period_s: float) -> Callable[[float], float]:
+    """Face bearing in degrees as a function of seconds since the start."""
+    if scenario == "step":
+        return lambda t: 0.0 if t < 0.5 else amplitude_deg
+    if scenario == "ramp":
+        return lambda t: max(-amplitude_deg, min(amplitude_deg, amplitude_deg * (2 * t / period_s - 1)))
+    if scenario == "sine":
+        return lambda t: amplitude_deg * math.sin(2 * math.pi * t / period_s)
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+class SyntheticCamera:
+    """
+    Camera stand-in: renders the part of the panorama seen at the axis' current pan angle, with a face
+    at bearing(t). Each read advances the virtual clock to the next frame time.
+    """
+
+    def __init__(
+        self,
+        clock: SimClock,
+        axis: VirtualPanAxis,
+        bearing: Callable[[float], float],
+        steps_per_deg: float,
+        hfov_deg: float,
+        width: int,
+        height: int,
+        fps: float,
+        duration_s: float,
+        on_end,
+        panorama: Optional[np.ndarray] = None,
+        face_deg: float = 6.0,
+    ):
+        self.clock = clock
+        self.axis = axis
+        self.bearing = bearing
+        self.steps_per_deg = steps_per_deg
+        self.hfov_deg = hfov_deg
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.duration_s = duration_s
+        self.on_end = on_end
+        self.panorama = panorama if panorama is not None else make_panorama(height=height)
+        self.px_per_deg_pano = self.panorama.shape[1] / 360.0
+        self.face_deg = face_deg
+        self.start = clock.now()
+        self.frames_captured = 0
+        self.dropped_frames = 0
+        self.pool_stats = (0, 0)
+        self._seq = 0
+        self._view = np.empty((height, width, 3), dtype=np.uint8)
+        self.truth: Optional[Tuple[float, float, float, float]] = None  # face box in the last frame
+
+    def pan_deg(self) -> float:
+        return self.axis.position / self.steps_per_deg
+
+    def face_box(self, t: float, pan_deg: float) -> Optional[Tuple[float, float, float, float]]:
+        px_per_deg = self.width / self.hfov_deg
+        cx = self.width / 2 + (self.bearing(t - self.start) - pan_deg) * px_per_deg
+        half = self.face_deg * px_per_deg / 2
+        cy = self.height * 0.45
+        if cx + half < 0 or cx - half > self.width:
+            return None
+        return cx - half, cy - half * 1.2, cx + half, cy + half * 1.2
+
+    def read_frame(self, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        next_t = self.start + (self._seq + 1) / self.fps
+        self.clock.advance_to(next_t)
+        if self.clock.now() - self.start >= self.duration_s:
+            self.on_end()
+            return None
+        self._seq += 1
+        t = self.clock.now()
+        pan = self.pan_deg()
+        # Crop the panorama around the pan angle (wrapping at 360°) and scale it to the camera size
+        pano_w = self.panorama.shape[1]
+        span = int(self.hfov_deg * self.px_per_deg_pano)
+        x0 = int((pan - self.hfov_deg / 2) * self.px_per_deg_pano) % pano_w
+        cols = (np.arange(span) + x0) % pano_w
+        cv2.resize(self.panorama[:, cols], (self.width, self.height), dst=self._view, interpolation=cv2.INTER_LINEAR)
+        self.truth = self.face_box(t, pan)
+        if self.truth is not None:
+            x1, y1, x2, y2 = self.truth
+            center = (int((x1 + x2) / 2), int((y1 + y2) / 2))
+            axes = (int((x2 - x1) / 2), int((y2 - y1) / 2))
+            cv2.ellipse(self._view, center, axes, 0, 0, 360, (160, 180, 220), -1)
+        self.frames_captured += 1
+        return CapturedFrame(self._view, t, self._seq)
+
+    def set_mode(self, width: int, height: int, fps: int) -> None:
+        pass
+
+    def release(self) -> None:
+        pass
+
+
+class SimTrackerApp(TrackerApp):
+    """
+    TrackerApp in the simulator. Detection is an oracle: it returns the rendered face box with pixel
+    noise and misses, and takes detect_time_s of virtual time (the axis keeps settling meanwhile), which
+    models detector latency without running a real model on synthetic faces.
+    """
+
+    def __init__(
+        self,
+        cfg: AppConfig,
+        scenario: str = "step",
+        duration_s: float = 6.0,
+        amplitude_deg: float = 15.0,
+        period_s: float = 4.0,
+        stall_sps: float = 3200.0,
+        stiffness_hz: float = 15.0,
+        detect_time_s: float = 0.06,
+        noise_px: float = 1.5,
+        miss_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        cfg = deepcopy(cfg)
+        cfg.control.async_motion = False  # the motion thread runs on real time
+        cfg.detector.process_workers = 0
+        cfg.detector.model = "hog"  # unused
+        cfg.tracking.enabled = False
+        cfg.scheduler.enabled = False
+        cfg.motion_gate.enabled = False
+        cfg.identity.enabled = False
+        cfg.recorder.path = ""
+        cfg.display.mode = "headless"
+        cfg.display.preview_port = 0
+        cfg.metrics.http_port = 0
+        self.clock = SimClock()
+        self.axis = VirtualPanAxis(self.clock, stall_sps=stall_sps, natural_hz=stiffness_hz)
+        super().__init__(cfg, motor_driver=self.axis)
+        ctl = cfg.control
+        steps_per_deg = ctl.steps_per_rev * ctl.microstep * ctl.gear_ratio / 360.0
+        self.bearing = trajectory(scenario, amplitude_deg, period_s)
+        self.scenario = scenario
+        self.amplitude_deg = amplitude_deg
+        self.camera = SyntheticCamera(
+            self.clock,
+            self.axis,
+            self.bearing,
+            steps_per_deg,
+            ctl.camera_hfov_deg,
+            cfg.camera.width,
+            cfg.camera.height,
+            cfg.camera.fps,
+            duration_s,
+            on_end=self._stop,
+        )
+        self.steps_per_deg = steps_per_deg
+        self._clock = self.clock.now
+        self._mono = self.clock.now
+        self._pace = False
+        self.detect_time_s = detect_time_s
+        self.noise_px = noise_px
+        self.miss_rate = miss_rate
+        self._rng = np.random.default_rng(seed)
+        # (time, true bearing error in degrees = face bearing - shaft angle)
+        self.trace: List[Tuple[float, float]] = []
+
+    def _acquire_target(self, frame, seq):
+        cam = self.camera
+        t = self.clock.now()
+        self.trace.append((t - cam.start, self.bearing(t - cam.start) - cam.pan_deg()))
+        box, pan_steps = cam.truth, self.controller.state.current_steps
+        self.clock.advance(self.detect_time_s)
+        if box is None or self._rng.uniform() < self.miss_rate:
+            self._person_meta = None
+            return None
+        noisy = tuple(float(v) for v in np.asarray(box) + self._rng.normal(0.0, self.noise_px, 4))
+        self._person_meta = (t, pan_steps)
+        return Detection(noisy, 1.0, 0)
+
+    def report(self, wall_s: float) -> Dict[str, float]:
+        """Step response / tracking figures from the true (not detected) bearing error."""
+        trace = np.asarray(self.trace, dtype=np.float64).reshape(-1, 2)
+        t, err = trace[:, 0], trace[:, 1]
+        px_per_deg = self.cfg.camera.width / self.cfg.control.camera_hfov_deg
+        sim_s = float(t[-1]) if len(t) else 0.0
+        tail = err[t >= sim_s * 0.8] if len(t) else err
+        report = {
+            "sim_s": sim_s,
+            "wall_s": wall_s,
+            "speedup": sim_s / wall_s if wall_s > 0 else 0.0,
+            "steady_state_error_px": float(np.mean(np.abs(tail)) * px_per_deg) if len(tail) else 0.0,
+            "rms_error_px": float(np.sqrt(np.mean(err**2)) * px_per_deg) if len(err) else 0.0,
+            "steps_per_s": abs(self.axis.commanded) / sim_s if sim_s else 0.0,
+            "steps_lost": float(self.axis.lost),
+            # Against where the shaft settles (executed steps), not its momentary spring position
+            "position_drift_steps": round(self.controller.state.current_steps - self.axis.reference, 3) + 0.0,
+        }
+        if self.scenario == "step" and len(t):
+            after = t >= 0.5
+            band_deg = max(self.cfg.control.deadband_px * 2, 4) / px_per_deg
+            outside = np.nonzero(after & (np.abs(err) > band_deg))[0]
+            settle = float(t[outside[-1]] - 0.5) if len(outside) else 0.0
+            report["settling_time_s"] = settle if len(outside) == 0 or outside[-1] < len(t) - 1 else float("inf")
+            # The error starts at +amplitude; overshoot is how far it swings past zero
+            report["overshoot_pct"] = float(max(0.0, -err[after].min()) / self.amplitude_deg * 100.0)
+        return report
+
+
+def run_simulation(cfg: AppConfig, **kwargs) -> Dict[str, float]:
+    app = SimTrackerApp(cfg, **kwargs)
+    start = time.perf_counter()
+    app.run()
+    return app.report(time.perf_counter() - start)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Closed-loop pan tracking simulator (no camera or motor needed).")
+    p.add_argument("--config", type=str, default=None, help="JSON settings file (as for test.py --config).")
+    p.add_argument("--scenario", choices=("step", "sine", "ramp"), default="step")
+    p.add_argument("--duration", type=float, default=6.0, help="Simulated seconds.")
+    p.add_argument("--amplitude", type=float, default=15.0, help="Face bearing step/amplitude in degrees.")
+    p.add_argument("--period", type=float, default=4.0, help="Sine period / ramp duration in seconds.")
+    p.add_argument("--stall-sps", type=float, default=3200.0, help="Pulse rate above which steps are lost.")
+    p.add_argument("--stiffness-hz", type=float, default=15.0, help="Natural frequency of the pan load (lower = springier).")
+    p.add_argument("--detect-time", type=float, default=0.06, help="Detector latency in seconds.")
+    p.add_argument("--noise-px", type=float, default=1.5, help="Detector box jitter (std, px).")
+    p.add_argument("--miss-rate", type=float, default=0.0, help="Share of frames without a detection.")
+    p.add_argument("--kp", type=float, default=None)
+    p.add_argument("--kd", type=float, default=None)
+    p.add_argument("--deadband", type=int, default=None)
+    p.add_argument("--max-speed", type=int, default=None)
+    p.add_argument("--predict", action="store_true", help="Use the Kalman target estimator.")
+    p.add_argument("--predict-kd", type=float, default=None, help="Rate gain with --predict (EstimatorConfig.kd).")
+    p.add_argument("--metrics", action="store_true", help="Also print per-stage timings.")
+    p.add_argument("--json", type=str, default=None, help="Write the report here.")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+    cfg = load_config(args.config) if args.config else AppConfig()
+    if args.kp is not None:
+        cfg.control.kp = args.kp
+    if args.kd is not None:
+        cfg.control.kd = args.kd
+    if args.deadband is not None:
+        cfg.control.deadband_px = args.deadband
+    if args.max_speed is not None:
+        cfg.control.max_speed_sps = args.max_speed
+    if args.predict:
+        cfg.estimator.enabled = True
+    if args.predict_kd is not None:
+        cfg.estimator.kd = args.predict_kd
+    cfg.metrics.enabled = args.metrics
+    report = run_simulation(
+        cfg,
+        scenario=args.scenario,
+        duration_s=args.duration,
+        amplitude_deg=args.amplitude,
+        period_s=args.period,
+        stall_sps=args.stall_sps,
+        stiffness_hz=args.stiffness_hz,
+        detect_time_s=args.detect_time,
+        noise_px=args.noise_px,
+        miss_rate=args.miss_rate,
+    )
+    for key, value in report.items():
+        print(f"{key:22s} {value:10.3f}")
+    if args.metrics:
+        print(METRICS.summary())
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Runs several camera -> detector -> pan unit pipelines on one box.
+
+Each pipeline is a TrackerApp with its own camera, controller and light, driven on its own thread.
+All of them share one ProcessDetectorPool through a FairDetectorScheduler.
+
+    python -m app.supervisor --sources 0,1 --pins 17:27:22:23,5:6:13:24
+    python -m app.supervisor --sources a.mp4,b.mp4,c.mp4 --scaling --duration 20
+"""
+
+import argparse
+import copy
+import logging
+import signal
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .config import AppConfig, SupervisorConfig
+from .detector_pool import FairDetectorScheduler, ProcessDetectorPool
+from .metrics import REGISTRY as METRICS
+from .startup import process_age_s, sd_notify
+from .tracker import TrackerApp
+
+log = logging.getLogger(__name__)
+
+
+class Supervisor:
+    def __init__(self, app_cfgs: Sequence[AppConfig], cfg: Optional[SupervisorConfig] = None):
+        self.cfg = cfg or SupervisorConfig()
+        if not app_cfgs:
+            raise ValueError("Supervisor needs at least one pipeline config")
+        app_cfgs = [copy.deepcopy(c) for c in app_cfgs]
+        # One metrics registry per process: the supervisor serves it, pipelines only record into it
+        metrics_cfg = copy.deepcopy(app_cfgs[0].metrics)
+        for c in app_cfgs:
+            if c.display.mode != "headless":
+                # HighGUI is not thread-safe; use preview_port per camera instead
+                c.display.mode = "headless"
+            c.metrics.http_port = 0
+        for i, c in enumerate(app_cfgs):
+            if c.frame_bus.name:
+                c.frame_bus.name = f"{c.frame_bus.name}-cam{i}"  # one segment per camera
+        slot_bytes = max(c.camera.width * c.camera.height * 3 for c in app_cfgs)
+        pool = ProcessDetectorPool(
+            app_cfgs[0].detector,
+            workers=self.cfg.workers,
+            keep_frames=any(c.tracking.enabled or c.identity.enabled for c in app_cfgs),
+            slot_bytes=slot_bytes,
+        )
+        self.scheduler = FairDetectorScheduler(pool, budget_s=self.cfg.budget_s)
+        self.startup = app_cfgs[0].startup
+        self._warm_shape = (app_cfgs[0].camera.height, app_cfgs[0].camera.width, 3)
+        self.names = [f"cam{i}" for i in range(len(app_cfgs))]
+        self.clients = [self.scheduler.client(name) for name in self.names]
+        self.apps = [TrackerApp(c, detector_pool=client) for c, client in zip(app_cfgs, self.clients)]
+        METRICS.enabled = any(c.metrics.enabled for c in app_cfgs)
+        self._metrics_cfg = metrics_cfg
+        self._threads: List[threading.Thread] = []
+        self._running = True
+        self._start_time = 0.0
+        # TrackerApp installs its own handlers; one signal must stop every pipeline
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+    def stop(self, *args) -> None:
+        log.info("Stopping %d pipelines...", len(self.apps))
+        self._running = False
+        for app in self.apps:
+            app._stop()
+
+    def run(self, duration_s: float = 0.0) -> Dict[str, Dict[str, float]]:
+        """Run all pipelines until stop() (or for duration_s) and return the final report."""
+        self._start_time = time.monotonic()
+        if self._metrics_cfg.enabled and self._metrics_cfg.http_port:
+            METRICS.start_http_server(self._metrics_cfg.http_port, host=self._metrics_cfg.http_host)
+        if self.startup.warmup:
+            # Workers load and warm their detectors while the pipelines open their cameras
+            self.scheduler.pool.start(self._warm_shape)
+        for name, app in zip(self.names, self.apps):
+            thread = threading.Thread(target=self._run_app, args=(name, app), name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        try:
+            self._await_ready()
+        except Exception:
+            self.stop()
+            self.scheduler.shutdown()
+            METRICS.stop_http_server()
+            raise
+        last_report = self._start_time
+        while self._running and any(t.is_alive() for t in self._threads):
+            time.sleep(0.2)
+            now = time.monotonic()
+            if duration_s and now - self._start_time >= duration_s:
+                self.stop()
+            if self.cfg.report_interval_s > 0 and now - last_report >= self.cfg.report_interval_s:
+                last_report = now
+                log.info("Pipelines:\n%s", format_report(self.report()))
+        for thread in self._threads:
+            thread.join(timeout=5.0)
+        report = self.report()
+        self.scheduler.shutdown()
+        METRICS.stop_http_server()
+        return report
+
+    def _await_ready(self) -> None:
+        """Signal readiness once: a warm detector worker and every pipeline started (or the timeout)."""
+        deadline = time.monotonic() + self.startup.timeout_s
+        pool = self.scheduler.pool
+        if self.startup.warmup and not pool.wait_ready(1, timeout=self.startup.timeout_s):
+            log.warning("No detector worker ready after %.1f s", self.startup.timeout_s)
+        for app in self.apps:
+            app.ready.wait(max(0.0, deadline - time.monotonic()))
+        pending = [name for name, app in zip(self.names, self.apps) if not app.ready.is_set()]
+        if pending:
+            log.warning("Pipelines not started after %.1f s: %s", self.startup.timeout_s, ", ".join(pending))
+        sd_notify("READY=1")
+        log.info(
+            "Ready %.2f s after process start (%d pipelines, %d detector workers warm)",
+            process_age_s(),
+            len(self.apps) - len(pending),
+            pool.ready_workers,
+        )
+
+    @staticmethod
+    def _run_app(name: str, app: TrackerApp) -> None:
+        try:
+            app.run()
+        except Exception:
+            log.exception("Pipeline %s crashed", name)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-camera capture rate, detection rate and submit -> result latency (p50/p90)."""
+        elapsed = max(time.monotonic() - self._start_time, 1e-6)
+        report = {}
+        for name, app, client in zip(self.names, self.apps, self.clients):
+            lat = np.asarray(client.latencies, dtype=np.float64) * 1000.0
+            report[name] = {
+                "capture_fps": app.camera.frames_captured / elapsed,
+                "detect_fps": client.completed / elapsed,
+                "latency_p50_ms": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+                "latency_p90_ms": float(np.percentile(lat, 90)) if len(lat) else 0.0,
+                "superseded": client.superseded,
+            }
+        report["total"] = {
+            "capture_fps": sum(r["capture_fps"] for r in report.values()),
+            "detect_fps": sum(r["detect_fps"] for r in report.values()),
+        }
+        return report
+
+
+def format_report(report: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"{'camera':8s} {'cap fps':>8s} {'det fps':>8s} {'p50ms':>8s} {'p90ms':>8s} {'superseded':>10s}"]
+    for name, r in report.items():
+        if name == "total":
+            continue
+        lines.append(
+            f"{name:8s} {r['capture_fps']:8.1f} {r['detect_fps']:8.1f} {r['latency_p50_ms']:8.1f} "
+            f"{r['latency_p90_ms']:8.1f} {r['superseded']:10d}"
+        )
+    total = report["total"]
+    lines.append(f"{'total':8s} {total['capture_fps']:8.1f} {total['detect_fps']:8.1f}")
+    return "\n".join(lines)
+
+
+def build_configs(sources: List[str], pins: List[str], base: Optional[AppConfig] = None) -> List[AppConfig]:
+    """One AppConfig per source (device index or video path); pins are PUL:DIR:ENA:RELAY per camera."""
+    base = base or AppConfig()
+    cfgs = []
+    for i, source in enumerate(sources):
+        cfg = copy.deepcopy(base)
+        cfg.camera.device_index = int(source) if source.isdigit() else source
+        if i < len(pins):
+            pul, dir_, ena, relay = (int(p) for p in pins[i].split(":"))
+            cfg.control.pul_pin, cfg.control.dir_pin, cfg.control.ena_pin = pul, dir_, ena
+            cfg.light.relay_pin = relay
+        elif i > 0:
+            log.warning("No --pins for camera %d; it shares GPIO pins with camera 0", i)
+        cfgs.append(cfg)
+    return cfgs
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Run several tracking pipelines with one shared detector pool.")
+    p.add_argument("--sources", type=str, required=True, help="Comma-separated camera indices or video files.")
+    p.add_argument("--pins", type=str, default="", help="Comma-separated PUL:DIR:ENA:RELAY per camera.")
+    p.add_argument("--workers", type=int, default=SupervisorConfig.workers, help="Shared detector processes.")
+    p.add_argument("--budget", type=float, default=SupervisorConfig.budget_s, help="Per-camera deadline (s).")
+    p.add_argument("--duration", type=float, default=0.0, help="Stop after this many seconds (0 = until Ctrl+C).")
+    p.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus metrics for all pipelines on this port.")
+    p.add_argument(
+        "--scaling",
+        action="store_true",
+        help="Run with the first 1..N sources in turn (each for --duration) and print total throughput.",
+    )
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()]
+    pins = [s.strip() for s in args.pins.split(",") if s.strip()]
+    base = AppConfig()
+    if args.metrics_port:
+        base.metrics.enabled = True
+        base.metrics.http_port = args.metrics_port
+    cfgs = build_configs(sources, pins, base)
+    sup_cfg = SupervisorConfig(workers=args.workers, budget_s=args.budget)
+    if not args.scaling:
+        print(format_report(Supervisor(cfgs, sup_cfg).run(duration_s=args.duration)))
+        return
+    duration = args.duration or 15.0
+    rows = []
+    for n in range(1, len(cfgs) + 1):
+        report = Supervisor(cfgs[:n], sup_cfg).run(duration_s=duration)
+        print(format_report(report))
+        rows.append((n, report["total"]["detect_fps"]))
+    base_fps = rows[0][1] or 1e-9
+    print(f"{'cameras':>7s} {'det fps':>8s} {'speedup':>8s}")
+    for n, fps in rows:
+        print(f"{n:7d} {fps:8.1f} {fps / base_fps:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,94 +1,334 @@
 import logging
+import os
+import platform
 import signal
+import threading
 import time
+from copy import copy
 from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import cv2
 import numpy as np
 
+from .box_tracker import LKBoxTracker
 from .camera import Camera
 from .config import AppConfig
 from .controller import MotorController
-from .detector import FaceRecognitionDetector
+from .detector import create_detector
+from .detector_pool import PoolClient, ProcessDetectorPool
+from .estimator import TargetEstimator
+from .frame_bus import FrameBusPublisher, create_frame_bus
+from .frame_pool import PooledFrame
+from .identity import IdentityResolver, create_identity_resolver
 from .light import LightController
-from .motor_driver import TB6600Driver
+from .metrics import E2E_METRIC, REGISTRY as METRICS, STAGE_METRIC
+from .motion_gate import MotionGate
+from .motor_driver import create_motor_driver
+from .multi_tracker import MultiFaceTracker, create_multi_tracker
+from .preview import MjpegPreviewServer, draw_overlay, draw_status
+from .recorder import FlightRecorder
+from .scheduler import QualityScheduler
+from .startup import StartupJobs, process_age_s, sd_notify
 
 log = logging.getLogger(__name__)
 
 
 class TrackerApp:
-    """Minimal camera -> face_recognition detector -> motor + light tracking loop."""
+    """Minimal camera -> face detector -> motor + light tracking loop."""
 
-    def __init__(self, cfg: AppConfig):
+    def __init__(self, cfg: AppConfig, detector_pool=None, motor_driver=None):
+        """
+        detector_pool: externally owned pool (e.g. a PoolClient shared by several cameras).
+        motor_driver: use this driver instead of the one selected by ControlConfig.driver (e.g. replay).
+        """
         self.cfg = cfg
+        init_start = time.perf_counter()
+        # Readiness: "starting" until the detector is warm and the camera delivers frames, then "ready"
+        self.ready = threading.Event()
+        self.startup_state = "starting"
+        self.startup_timings: Dict[str, float] = {}
+        self._first_track_logged = False
+        self._startup_lock = threading.Lock()  # a startup job finishing after the timeout must not replace the fallback
+        # Wall clock for loop timing and monotonic clock for predictions; replay substitutes recorded time
+        self._clock = time.time
+        self._mono = time.monotonic
+        self._pace = True
+        self._shared_pool = detector_pool is not None
+        # A Supervisor warms its shared pool once and signals readiness for all of its pipelines
+        self.notify_ready = not isinstance(detector_pool, PoolClient)
         self.camera = Camera(
             device_index=cfg.camera.device_index,
             width=cfg.camera.width,
             height=cfg.camera.height,
             fps=cfg.camera.fps,
+            threaded=cfg.camera.threaded,
+            buffer_size=cfg.camera.buffer_size,
+            pool_size=cfg.camera.pool_size,
         )
-        self.detector = FaceRecognitionDetector(
-            model=cfg.detector.model,
-            upsample=cfg.detector.upsample,
-            resize_width=cfg.detector.resize_width,
-            use_fallback=cfg.detector.use_fallback,
-            fallback_model=cfg.detector.fallback_model,
-            fallback_upsample=cfg.detector.fallback_upsample,
-            fallback_resize_width=cfg.detector.fallback_resize_width,
-        )
-        self.motor_driver = TB6600Driver()
+        # With a process pool the detectors live in the workers. The in-process detector (heavy
+        # face_recognition/dlib import plus first-call setup) is built and warmed by _start_up.
+        self._use_pool = self._shared_pool or cfg.detector.process_workers > 0
+        self.detector = None
+        self.motor_driver = motor_driver if motor_driver is not None else create_motor_driver(cfg.control)
         self.controller = MotorController(cfg.control, self.motor_driver)
         self.light = LightController(cfg.light.relay_pin)
         self._last_steps = 0
         self._light_on = False
         self._executor = ThreadPoolExecutor(max_workers=1)
         self._pending: Optional[Future] = None
+        self._pending_frame: Optional[np.ndarray] = None
+        self._pending_ref: Optional[PooledFrame] = None
+        self._det_frame: Optional[np.ndarray] = None  # input frame of the most recently collected result
+        self._det_ref: Optional[PooledFrame] = None
+        self._frame_ref: Optional[PooledFrame] = None  # pool handle of the frame being processed
+        self._display: Optional[np.ndarray] = None  # overlay layer for the window; frames stay untouched
+        self._frame_seq = 0
+        self._pending_seq = 0
+        # seq -> (capture timestamp, pan position in steps) for frames handed to the detector
+        self._frame_meta: Dict[int, Tuple[float, int]] = {}
+        self._capture_meta: Tuple[float, int] = (0.0, 0)
+        self._det_meta: Optional[Tuple[float, int]] = None
+        self._person_meta: Optional[Tuple[float, int]] = None  # set when this loop's target is a fresh measurement
+        self.estimator: Optional[TargetEstimator] = None
+        self._pan_mark: Optional[Tuple[float, int]] = None  # (time, pan steps) at the last predictive command
+        if cfg.estimator.enabled:
+            self.estimator = TargetEstimator(
+                process_accel=cfg.estimator.process_accel,
+                meas_std_px=cfg.estimator.meas_std_px,
+                max_predict_s=cfg.estimator.max_predict_s,
+                reset_after_s=cfg.estimator.reset_after_s,
+            )
+        self.multi_tracker: Optional[MultiFaceTracker] = None
+        if cfg.multi_track.enabled:
+            self.multi_tracker = create_multi_tracker(cfg.multi_track)
+        self.identity: Optional[IdentityResolver] = None  # built by _start_up (imports face_recognition)
+        self._pool: Optional[ProcessDetectorPool] = detector_pool
+        if detector_pool is None and cfg.detector.process_workers > 0:
+            self._pool = ProcessDetectorPool(
+                cfg.detector,
+                workers=cfg.detector.process_workers,
+                keep_frames=cfg.tracking.enabled or cfg.identity.enabled,
+            )
         self._latest_dets = []
+        self.box_tracker: Optional[LKBoxTracker] = None
+        if cfg.tracking.enabled:
+            self.box_tracker = LKBoxTracker(work_width=cfg.tracking.work_width, max_points=cfg.tracking.max_points)
+        self._frames_since_detect = 0
+        self.scheduler: Optional[QualityScheduler] = None  # needs the detector; built by _start_up
+        self.motion_gate: Optional[MotionGate] = None
+        if cfg.motion_gate.enabled:
+            gate_cfg = cfg.motion_gate
+            self.motion_gate = MotionGate(
+                work_width=gate_cfg.work_width,
+                threshold=gate_cfg.threshold,
+                min_area_frac=gate_cfg.min_area_frac,
+                hold_frames=gate_cfg.hold_frames,
+            )
+        self._scene_active = True
+        self._idle_mode = False
+        # process CPU seconds / wall seconds spent per mode ("active" vs low-power "idle")
+        self._cpu_usage = {"active": [0.0, 0.0], "idle": [0.0, 0.0]}
+        self._show_window = self._resolve_window(cfg.display.mode)
+        self._status_canvas: Optional[np.ndarray] = None
+        self.preview: Optional[MjpegPreviewServer] = None
+        if cfg.display.preview_port:
+            self.preview = MjpegPreviewServer(
+                cfg.display.preview_port,
+                host=cfg.display.preview_host,
+                max_fps=cfg.display.preview_fps,
+                quality=cfg.display.preview_quality,
+            )
+        self.recorder: Optional[FlightRecorder] = None
+        if cfg.recorder.path:
+            self.recorder = FlightRecorder(
+                cfg.recorder.path, cfg, frame_width=cfg.recorder.frame_width, queue_size=cfg.recorder.queue_size
+            )
+        self.frame_bus: Optional[FrameBusPublisher] = create_frame_bus(cfg.frame_bus)
         self._running = True
+        METRICS.enabled = cfg.metrics.enabled
+        self._serves_metrics = bool(cfg.metrics.enabled and cfg.metrics.http_port)  # off under a Supervisor
+        if self._serves_metrics:
+            METRICS.start_http_server(cfg.metrics.http_port, host=cfg.metrics.http_host)
         signal.signal(signal.SIGINT, self._stop)
         signal.signal(signal.SIGTERM, self._stop)
+        self.startup_timings["init"] = time.perf_counter() - init_start
+
+    @staticmethod
+    def _resolve_window(mode: str) -> bool:
+        if mode == "auto":
+            # No X/Wayland session (e.g. systemd on a Pi): imshow would only fail, so skip all drawing
+            if platform.system().lower() == "linux":
+                return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+            return True
+        return mode == "window"
+
+    def _start_up(self) -> None:
+        """
+        Build/warm the detector, load the identity gallery and open the camera concurrently
+        (StartupConfig.parallel), then mark the app ready. Called by run() before the first frame.
+        """
+        if self.ready.is_set():
+            return
+        cfg = self.cfg
+        start = time.perf_counter()
+        jobs = StartupJobs(parallel=cfg.startup.parallel)
+        shape = (cfg.camera.height, cfg.camera.width, 3)
+        if not self._use_pool and self.detector is None:
+            jobs.start("detector", self._build_detector)
+        if cfg.identity.enabled and self.identity is None:
+            jobs.start("identity", lambda: setattr(self, "identity", create_identity_resolver(cfg.identity)))
+        if hasattr(self.camera, "open"):
+            # Replay/simulator cameras have nothing to open
+            jobs.start("camera", lambda: self._open_camera(jobs))
+        elif isinstance(self._pool, ProcessDetectorPool) and cfg.startup.warmup:
+            jobs.start("pool", lambda: self._start_pool(shape))
+        if not jobs.wait(cfg.startup.timeout_s):
+            log.warning("Startup still running after %.1f s; starting anyway", cfg.startup.timeout_s)
+        if not self._use_pool:
+            with self._startup_lock:
+                if self.detector is None:
+                    self.detector = create_detector(cfg.detector)  # timed-out job: fall back to building it here
+        self._build_scheduler()
+        self.startup_timings.update(jobs.timings)
+        self.startup_timings["startup"] = time.perf_counter() - start
+        self.startup_state = "ready"
+        self.ready.set()
+        timings = ", ".join(f"{name} {sec * 1000:.0f} ms" for name, sec in self.startup_timings.items())
+        if self.notify_ready:
+            sd_notify("READY=1")
+            log.info("Ready %.2f s after process start (%s)", process_age_s(), timings)
+        else:
+            log.info("Pipeline started %.2f s after process start (%s)", process_age_s(), timings)
+        for name, sec in self.startup_timings.items():
+            METRICS.set_gauge("startup_seconds", sec, phase=name)
+
+    def _build_detector(self) -> None:
+        detector = create_detector(self.cfg.detector)
+        if self.cfg.startup.warmup and hasattr(detector, "warm_up"):
+            detector.warm_up((self.cfg.camera.height, self.cfg.camera.width, 3))
+        with self._startup_lock:
+            if self.detector is not None:
+                log.info("Detector warm-up finished after the startup timeout; keeping the fallback detector")
+                return
+            self.detector = detector
+
+    def _open_camera(self, jobs: StartupJobs) -> None:
+        """Open the device and grab one frame (device settle time, real frame shape for the pool)."""
+        captured = self.camera.read_frame(timeout=5.0)
+        if captured is None:
+            raise RuntimeError("Camera delivered no frame during startup")
+        if isinstance(self._pool, ProcessDetectorPool) and self.cfg.startup.warmup:
+            shape = captured.image.shape
+            captured.release()
+            jobs.timed("pool", self._start_pool, shape)
+            return
+        captured.release()
+
+    def _start_pool(self, shape) -> None:
+        """Spawn the detector workers and wait for the first one to be warm."""
+        self._pool.start(shape)
+        if not self._pool.wait_ready(1, timeout=self.cfg.startup.timeout_s):
+            log.warning("No detector worker ready after %.0f s", self.cfg.startup.timeout_s)
+
+    def _note_tracked(self) -> None:
+        if not self._first_track_logged:
+            self._first_track_logged = True
+            age = process_age_s()
+            log.info("First tracked frame %.2f s after process start", age)
+            METRICS.set_gauge("startup_seconds", age, phase="first_tracked_frame")
+
+    def _build_scheduler(self) -> None:
+        cfg = self.cfg.scheduler
+        if not cfg.enabled or self.scheduler is not None:
+            return
+        if self.detector is None or not hasattr(self.detector, "upsample"):
+            log.warning("Quality scheduler needs an in-process face_recognition detector; disabled")
+            return
+        self.scheduler = QualityScheduler(
+            self.detector,
+            budget_s=cfg.budget_frames / self.cfg.camera.fps,
+            widths=cfg.widths,
+            max_upsample=cfg.max_upsample,
+            shrink_face_px=cfg.shrink_face_px,
+            grow_face_px=cfg.grow_face_px,
+            hysteresis=cfg.hysteresis,
+            patience=cfg.patience,
+        )
 
     def _stop(self, *args) -> None:
         log.info("Stopping...")
         self._running = False
 
     def _pick_person(self, dets):
+        result = dets
+        if self.identity is not None:
+            targets = self.cfg.identity.targets
+            known = [d for d in dets if d.identity is not None and (not targets or d.identity in targets)]
+            if known or self.cfg.identity.known_only:
+                dets = known
+        if self.multi_tracker is not None:
+            # Sticky: stays on the current track unless another one is clearly bigger for a while
+            return self.multi_tracker.select(dets, result)
         if not dets:
             return None
         return max(dets, key=lambda d: (d.bbox[2] - d.bbox[0]) * (d.bbox[3] - d.bbox[1]))
 
     def run(self) -> None:
-        last_seen = time.time()
+        try:
+            self._start_up()
+        except Exception:
+            self._shutdown()  # e.g. missing model: release the camera, pool and motor before failing
+            raise
+        last_seen = self._clock()
         self.light.off()
+        cpu_mark = (time.process_time(), time.monotonic())
 
         while self._running:
-            loop_start = time.time()
-            frame_data = self.camera.read()
-            if frame_data is None:
+            cpu_mark = self._account_cpu(cpu_mark)
+            loop_start = self._clock()
+            loop_t0 = time.perf_counter()
+            captured = self.camera.read_frame()
+            if captured is None:
                 time.sleep(0.05)
                 continue
 
-            _, frame = frame_data
-            # Async detection: fetch completed results, then submit the latest frame if idle.
-            self._collect_future()
-            self._submit_future(frame)
-            dets = self._latest_dets
-            person = self._pick_person(dets)
+            frame = captured.image
+            self._frame_ref = captured.buffer
+            self._capture_meta = (captured.timestamp, self.controller.state.current_steps)
+            if self.recorder is not None:
+                self.recorder.record_frame(captured)
+            if self.motion_gate is not None:
+                self._scene_active = self.motion_gate(frame)
+                if self._idle_mode and self._scene_active:
+                    self._set_idle(False)
+            stage_t0 = time.perf_counter()
+            person = self._acquire_target(frame, captured.seq)
+            METRICS.observe(STAGE_METRIC, time.perf_counter() - stage_t0, stage="target")
+            self._publish_frame(captured, person)
             frame_center_x = frame.shape[1] / 2
             frame_center = (frame.shape[1] // 2, frame.shape[0] // 2)
             error_px = None
             steps = 0
-            idle_time = time.time() - last_seen
+            now = self._clock()
+            mono_now = self._mono()
+            idle_time = now - last_seen
+            state_before = copy(self.controller.state) if self.recorder is not None else None
 
             if person:
-                now = time.time()
                 dt = max(now - loop_start, 1e-3)
                 last_seen = now
-                cx, cy = person.center
+                cx, _ = person.center
                 error_px = cx - frame_center_x
-                steps = self.controller.compute_step_command(error_px, frame.shape[1], dt=dt)
+                stage_t0 = time.perf_counter()
+                if self.estimator is not None:
+                    error_px, steps = self._predictive_command(person, frame.shape[1], mono_now)
+                else:
+                    steps = self.controller.compute_step_command(error_px, frame.shape[1], dt=dt)
+                METRICS.observe(STAGE_METRIC, time.perf_counter() - stage_t0, stage="control")
                 self.controller.move(steps)
+                METRICS.observe(E2E_METRIC, self._mono() - self._measured_at(captured.timestamp))
+                self._note_tracked()
                 self.light.on()
                 self._light_on = True
                 self._last_steps = steps
@@ -99,43 +339,157 @@ class TrackerApp:
                     error_px,
                     steps,
                 )
-                # Draw overlay
-                x1, y1, x2, y2 = map(int, person.bbox)
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.circle(frame, (int(cx), int(cy)), 3, (0, 255, 0), -1)
-                cv2.circle(frame, frame_center, 3, (0, 0, 255), -1)
-                cv2.putText(
-                    frame,
-                    f"err={error_px:.1f}px steps={steps}",
-                    (x1, max(0, y1 - 10)),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (0, 255, 0),
-                    1,
-                    cv2.LINE_AA,
-                )
             else:
                 # Hold last pose and keep light on until timeout; then home and power off.
                 if idle_time > self.cfg.control.timeout_no_person_s:
                     self.light.off()
                     self._light_on = False
                     self.controller.home()
+                    if self.motion_gate is not None and not self._scene_active and not self._idle_mode:
+                        self._set_idle(True)
                 else:
                     if not self._light_on:
                         self.light.on()
                         self._light_on = True
 
-            self._show(frame, status=self._status_text(person, error_px, steps, frame_center))
+            if self.recorder is not None:
+                self.recorder.record_loop(
+                    captured.seq, loop_start, now, mono_now, person, self._person_meta,
+                    state_before, error_px, steps, self.controller.state,
+                )
+            stage_t0 = time.perf_counter()
+            self._visualize(frame, person, error_px, steps, frame_center)
+            METRICS.observe(STAGE_METRIC, time.perf_counter() - stage_t0, stage="show")
+            METRICS.observe(STAGE_METRIC, time.perf_counter() - loop_t0, stage="loop")
+            # Anything that keeps the frame (detector, preview) holds its own reference
+            captured.release()
+            self._frame_ref = None
+            self._publish_gauges()
 
             elapsed = time.time() - loop_start
             # To keep UI snappy, skip sleeping unless loop is faster than target FPS.
-            sleep_time = max(0, (1 / self.cfg.camera.fps) - elapsed)
-            if sleep_time > 0:
+            fps = self.cfg.motion_gate.idle_fps if self._idle_mode else self.cfg.camera.fps
+            sleep_time = max(0, (1 / fps) - elapsed)
+            if sleep_time > 0 and self._pace:
                 time.sleep(sleep_time)
 
+        self._shutdown()
+
+    def _publish_gauges(self) -> None:
+        if not METRICS.enabled:
+            return
+        METRICS.set_gauge("camera_frames_captured", self.camera.frames_captured)
+        METRICS.set_gauge("camera_frames_dropped", self.camera.dropped_frames)
+        allocated, reused = self.camera.pool_stats
+        METRICS.set_gauge("frame_pool_allocated", allocated)
+        METRICS.set_gauge("frame_pool_reused", reused)
+        for mode, usage in self.cpu_usage().items():
+            METRICS.set_gauge("process_cpu_percent", usage, mode=mode)
+        if self.scheduler is not None:
+            for key, value in self.scheduler.operating_point.items():
+                METRICS.set_gauge(f"detector_{key}", value)
+        METRICS.maybe_log_summary(self.cfg.metrics.summary_interval_s)
+
+    def _shutdown(self) -> None:
+        if self.motion_gate is not None:
+            usage = self.cpu_usage()
+            log.info("CPU usage: active %.1f%%, idle %.1f%% (of one core)", usage["active"], usage["idle"])
         self.controller.shutdown()
         self.camera.release()
         self._executor.shutdown(wait=False)
+        if self._pool is not None:
+            self._pool.shutdown()
+        if self._serves_metrics:
+            METRICS.stop_http_server()
+        if self.preview is not None:
+            self.preview.shutdown()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.frame_bus is not None:
+            self.frame_bus.close()
+
+    def _publish_frame(self, captured, person=None) -> None:
+        """Frame, capture time and the current detections to the shared-memory bus (never waits on readers)."""
+        if self.frame_bus is None:
+            return
+        stage_t0 = time.perf_counter()
+        det_ts = self._det_meta[0] if self._det_meta is not None else 0.0
+        self.frame_bus.publish(captured.image, captured.timestamp, self._latest_dets, det_ts, person, captured.seq)
+        METRICS.observe(STAGE_METRIC, time.perf_counter() - stage_t0, stage="bus")
+
+    def _measured_at(self, capture_ts: float) -> float:
+        """Capture time of the frame this loop's target was measured on (not the frame just grabbed)."""
+        if self._person_meta is not None:
+            return self._person_meta[0]  # fresh detector result, or the flow tracker on this frame
+        if self._det_meta is not None:
+            return self._det_meta[0]  # reused result of an earlier detection
+        return capture_ts
+
+    def _acquire_target(self, frame, seq):
+        """This loop's target (or None), also setting _person_meta when it is a fresh measurement."""
+        if self.box_tracker is not None:
+            return self._track(frame)
+        # Async detection: fetch completed results, then submit the latest frame if idle.
+        fresh = self._collect_future()
+        self._submit_future(frame)
+        self._person_meta = self._det_meta if fresh else None
+        return self._pick_person(self._latest_dets)
+
+    def _predictive_command(self, person, frame_width, mono_now):
+        """Feed fresh measurements (at their capture time) to the estimator, act on the predicted error."""
+        ctrl = self.controller
+        cx, cy = person.center
+        if self._person_meta is not None:
+            ts, pan_steps = self._person_meta
+            # Pan-compensated position: where the face is relative to the home heading
+            self.estimator.update(ts, cx + ctrl.steps_to_px(pan_steps, frame_width), cy, person.bbox[2] - person.bbox[0])
+        state = self.estimator.predict(mono_now + self.cfg.estimator.lead_s)
+        if state is None:
+            return cx - frame_width / 2, ctrl.compute_step_command(cx - frame_width / 2, frame_width, dt=0.0)
+        pan_px = ctrl.steps_to_px(ctrl.state.current_steps, frame_width)
+        error_px = float(state[0]) - pan_px - frame_width / 2
+        error_rate = float(state[3]) - ctrl.steps_to_px(self._pan_rate(mono_now), frame_width)
+        steps = ctrl.compute_step_command_from_state(error_px, error_rate, frame_width, kd=self.cfg.estimator.kd)
+        return error_px, steps
+
+    def _pan_rate(self, mono_now: float) -> float:
+        """Pan speed in steps/s: the motion thread's, or for blocking moves the average since the last command."""
+        ctrl = self.controller
+        mark, self._pan_mark = self._pan_mark, (mono_now, ctrl.state.current_steps)
+        if ctrl.motion is not None:
+            return ctrl.state.speed_sps
+        # Blocking moves are over by the next loop, so speed_sps stays 0 and would turn the D term
+        # into the face's own velocity
+        if mark is None or mono_now <= mark[0]:
+            return 0.0
+        return (ctrl.state.current_steps - mark[1]) / (mono_now - mark[0])
+
+    def _set_idle(self, idle: bool) -> None:
+        """Low-power idle: lower capture rate/resolution until the motion gate fires again."""
+        self._idle_mode = idle
+        cam, gate = self.cfg.camera, self.cfg.motion_gate
+        if idle:
+            self.camera.set_mode(gate.idle_width or cam.width, gate.idle_height or cam.height, gate.idle_fps)
+        else:
+            self.camera.set_mode(cam.width, cam.height, cam.fps)
+        usage = self.cpu_usage()
+        log.info(
+            "%s idle mode (CPU active %.1f%%, idle %.1f%%)",
+            "Entering" if idle else "Leaving",
+            usage["active"],
+            usage["idle"],
+        )
+
+    def _account_cpu(self, mark):
+        cpu, wall = time.process_time(), time.monotonic()
+        bucket = self._cpu_usage["idle" if self._idle_mode else "active"]
+        bucket[0] += cpu - mark[0]
+        bucket[1] += wall - mark[1]
+        return cpu, wall
+
+    def cpu_usage(self):
+        """Average process CPU per mode, in percent of one core."""
+        return {mode: (cpu / wall * 100.0 if wall > 0 else 0.0) for mode, (cpu, wall) in self._cpu_usage.items()}
 
     def _status_text(self, person, error_px, steps, frame_center):
         if person:
@@ -152,38 +506,147 @@ class TrackerApp:
             f"Center: ({frame_center[0]},{frame_center[1]})",
             f"Motor last cmd: {self._last_steps} steps | Pos: {self.controller.state.current_steps}",
             f"Light: {'ON' if self._light_on else 'OFF'}",
+            *self._scheduler_text(),
             "Press 'q' to quit",
         ]
 
+    def _visualize(self, frame, person, error_px, steps, frame_center):
+        """Window and/or MJPEG preview. Headless without preview clients costs nothing."""
+        preview_active = self.preview is not None and self.preview.active
+        if not self._show_window and not preview_active:
+            return
+        status = self._status_text(person, error_px, steps, frame_center)
+        if preview_active:
+
+            def draw(view):
+                draw_overlay(view, person, error_px, steps, frame_center)
+                draw_status(view, status[:-1], scale=0.45, line_h=18)
+
+            # Rendering and encoding happen on the preview thread
+            self.preview.publish(frame, draw, self._frame_ref)
+        if self._show_window:
+            # Draw on a reused display layer so the frame itself (detector input) is never modified
+            if self._display is None or self._display.shape != frame.shape:
+                self._display = np.empty_like(frame)
+            np.copyto(self._display, frame)
+            draw_overlay(self._display, person, error_px, steps, frame_center)
+            self._show(self._display, status)
+
+    def _scheduler_text(self):
+        if self.scheduler is None:
+            return []
+        op = self.scheduler.operating_point
+        return [f"Det: w={op['resize_width']} up={op['upsample']} {op['latency_ema_ms']:.0f}/{op['budget_ms']:.0f}ms"]
+
     def _show(self, frame, status):
         try:
             cv2.imshow("camera", frame)
-            canvas = np.zeros((180, 420, 3), dtype=np.uint8)
+            if self._status_canvas is None:
+                self._status_canvas = np.zeros((180, 420, 3), dtype=np.uint8)
+            canvas = self._status_canvas
+            canvas.fill(0)
             cv2.rectangle(canvas, (0, 0), (canvas.shape[1] - 1, canvas.shape[0] - 1), (200, 200, 200), 1)
-            y = 25
-            for line in status:
-                cv2.putText(canvas, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 1, cv2.LINE_AA)
-                y += 28
+            draw_status(canvas, status)
             cv2.imshow("status", canvas)
             if cv2.waitKey(1) & 0xFF == ord("q"):
                 self._stop()
         except cv2.error:
             pass
 
+    def _track(self, frame):
+        """Detect-then-track: reseed the flow tracker from each detection, advance it on every frame."""
+        tracker = self.box_tracker
+        collected = self._collect_future()
+        if collected:
+            self._frames_since_detect = 0
+            best = self._pick_person(self._latest_dets)
+            if best is None:
+                tracker.reset()
+            else:
+                # Seed on the frame the detector saw; the update below brings the box up to this frame.
+                tracker.init(self._det_frame, best.bbox)
+        person = tracker.update(frame)
+        self._frames_since_detect += 1
+        if (
+            person is None
+            or tracker.confidence < self.cfg.tracking.min_confidence
+            or self._frames_since_detect >= self.cfg.tracking.detect_every_n
+        ):
+            self._submit_future(frame)
+        if person is not None:
+            self._person_meta = self._capture_meta
+        else:
+            # No usable flow points: fall back to the last detector result
+            person = self._pick_person(self._latest_dets)
+            self._person_meta = self._det_meta if collected else None
+        return person
+
     def _submit_future(self, frame):
+        if not self._scene_active:
+            # Motion gate: static scene, keep the previous result instead of re-detecting
+            return
+        self._frame_seq += 1
+        self._frame_meta[self._frame_seq] = self._capture_meta
+        self._frame_meta.pop(self._frame_seq - 64, None)
+        if self._pool is not None:
+            # Shared-memory hand-off copies the frame
+            self._pool.submit(frame, self._frame_seq)
+            return
         if self._pending is None:
-            # Copy to avoid race with UI drawing
-            self._pending = self._executor.submit(self.detector, frame.copy())
+            # Nothing draws on frames any more: share it, holding a pool reference until collected
+            self._pending_frame = frame
+            self._pending_ref = self._frame_ref.retain() if self._frame_ref is not None else None
+            self._pending_seq = self._frame_seq
+            self._pending = self._executor.submit(self._detect_timed, self._pending_frame, self._capture_meta[0])
+
+    def _detect_timed(self, frame, timestamp: float):
+        start = time.perf_counter()
+        dets = self.detector(frame)
+        latency = time.perf_counter() - start
+        # Still on the detector thread
+        self._associate(frame, dets, timestamp)
+        return dets, latency
 
-    def _collect_future(self):
+    def _associate(self, frame, dets, timestamp: Optional[float]) -> None:
+        """Track ids (multi-face tracker), then names; identity encodes only faces starting a new track."""
+        if self.multi_tracker is not None and timestamp is not None:
+            self.multi_tracker.update(dets, timestamp)
+        if self.identity is not None and frame is not None:
+            self.identity.resolve(frame, dets)
+
+    def _collect_future(self) -> bool:
+        if self._pool is not None:
+            result = self._pool.poll()
+            if result is None:
+                return False
+            self._latest_dets = result.dets
+            self._det_frame = result.frame
+            self._det_meta = self._frame_meta.get(result.seq)
+            self._associate(result.frame, result.dets, self._det_meta[0] if self._det_meta is not None else None)
+            self._record_detections()
+            return True
         if self._pending is not None and self._pending.done():
+            if self._det_ref is not None:
+                self._det_ref.release()
+            self._det_frame, self._det_ref = self._pending_frame, self._pending_ref
+            self._pending_ref = None
+            self._det_meta = self._frame_meta.get(self._pending_seq)
             try:
-                self._latest_dets = self._pending.result()
+                self._latest_dets, latency = self._pending.result()
+                if self.scheduler is not None:
+                    self.scheduler.observe(latency, self._latest_dets, self._det_frame.shape[1])
             except Exception as exc:
                 log.warning("Detector future failed: %s", exc)
                 self._latest_dets = []
             finally:
                 self._pending = None
+            self._record_detections()
+            return True
+        return False
+
+    def _record_detections(self):
+        if self.recorder is not None and self._det_meta is not None:
+            self.recorder.record_detections(self._det_meta[0], self._latest_dets)
 
 
 def main():
@@ -0,0 +1,282 @@
+"""
+Autotune detector/camera settings on recorded clips or the bundled image set.
+- Sweeps DetectorConfig fields and camera resolution (frames are rescaled to the candidate capture size).
+- Grid or Bayesian (Gaussian-process, random-scalarization) search, evaluated in parallel processes.
+- Prints the throughput/recall Pareto front and writes the chosen settings for test.py --config.
+
+    python test/autotune.py --images Yolo_face_recognition_trained_50/images/val \
+        --grid resize_width=160,240,320,400 --grid upsample=0,1 --grid camera.width=320,480,640
+    python test/autotune.py --video door1.mp4 --video door2.mp4 --search bayes --trials 24
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Ensure project root is importable when running from test/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import cv2
+
+from app.benchmark import Sample, evaluate, iter_image_dir, iter_video
+from app.config import AppConfig, apply_overrides, save_config
+from app.detector import create_detector
+
+log = logging.getLogger("autotune")
+
+DEFAULT_GRID = [
+    "resize_width=160,240,320,400",
+    "upsample=0,1",
+    "camera.width=320,480,640",
+]
+
+# One point: {"detector": {...}, "camera": {...}}
+Point = Dict[str, Dict[str, object]]
+
+
+def parse_grid(specs: Sequence[str]) -> List[Tuple[str, str, List[object]]]:
+    """'camera.width=320,480' / 'upsample=0,1' -> [(section, field, values)], values typed like the defaults."""
+    defaults = AppConfig()
+    axes = []
+    for spec in specs:
+        key, _, raw = spec.partition("=")
+        section, _, name = key.rpartition(".")
+        section = section or "detector"
+        if section not in ("detector", "camera"):
+            raise ValueError(f"Only detector.* and camera.* can be tuned, got {key}")
+        typ = type(getattr(getattr(defaults, section), name))
+        if typ is bool:
+            values = [v.lower() in ("1", "true", "yes", "on") for v in raw.split(",")]
+        else:
+            values = [typ(v) for v in raw.split(",")]
+        axes.append((section, name, values))
+    return axes
+
+
+def point_from_indices(axes, indices: Sequence[int]) -> Point:
+    point: Point = {}
+    for (section, name, values), i in zip(axes, indices):
+        point.setdefault(section, {})[name] = values[i]
+    return point
+
+
+def point_name(point: Point) -> str:
+    return ",".join(f"{'camera.' if s == 'camera' else ''}{k}={v}" for s, vals in point.items() for k, v in vals.items())
+
+
+def load_samples(videos: List[str], images: Optional[str], max_frames: int) -> List[Sample]:
+    sources: List[Iterator[Sample]] = [iter_video(Path(v)) for v in videos]
+    if images:
+        sources.append(iter_image_dir(Path(images)))
+    samples = []
+    for source in sources:
+        for i, sample in enumerate(source):
+            if max_frames and i >= max_frames:
+                break
+            samples.append(sample)
+    return samples
+
+
+def rescale(samples: List[Sample], camera: Dict[str, object]) -> Iterator[Sample]:
+    """Simulate a capture size: resize frames (and labels) to camera.width (x camera.height if given)."""
+    width, height = camera.get("width"), camera.get("height")
+    for name, frame, gt in samples:
+        h, w = frame.shape[:2]
+        new_w = min(int(width), w) if width else w
+        new_h = int(height) if height else max(1, round(h * new_w / w))
+        if (new_w, new_h) != (w, h):
+            frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA)
+            if gt is not None:
+                gt = gt * np.array([new_w / w, new_h / h, new_w / w, new_h / h])
+        yield name, frame, gt
+
+
+_SAMPLES: List[Sample] = []
+
+
+def _init_worker(samples: List[Sample]) -> None:
+    global _SAMPLES
+    _SAMPLES = samples
+    cv2.setNumThreads(1)  # one core per configuration, so parallel runs do not compete inside OpenCV
+
+
+def _run_point(point: Point) -> Dict[str, object]:
+    cfg = apply_overrides(AppConfig(), point)
+    report = evaluate(create_detector(cfg.detector), rescale(_SAMPLES, point.get("camera", {})))
+    accuracy = report["recall"] if "recall" in report else report["hit_rate"]
+    return {"point": point, "name": point_name(point), "accuracy": accuracy, **report}
+
+
+def pareto_front(results: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Results not dominated in (throughput_fps, accuracy), sorted by throughput."""
+    front = []
+    for r in results:
+        dominated = any(
+            o["throughput_fps"] >= r["throughput_fps"]
+            and o["accuracy"] >= r["accuracy"]
+            and (o["throughput_fps"] > r["throughput_fps"] or o["accuracy"] > r["accuracy"])
+            for o in results
+        )
+        if not dominated:
+            front.append(r)
+    return sorted(front, key=lambda r: r["throughput_fps"])
+
+
+def choose(front: List[Dict[str, object]], recall_slack: float) -> Dict[str, object]:
+    """Fastest front point whose accuracy is within recall_slack of the best."""
+    best = max(r["accuracy"] for r in front)
+    return max((r for r in front if r["accuracy"] >= best - recall_slack), key=lambda r: r["throughput_fps"])
+
+
+class BayesSearch:
+    """
+    Gaussian-process search over the grid indices. Each proposal maximizes expected improvement of a
+    randomly weighted mix of normalized accuracy and log throughput, so a batch spreads along the front.
+    """
+
+    def __init__(self, axes, seed: int = 0, length_scale: float = 0.3, noise: float = 1e-3):
+        self.sizes = [len(values) for _, _, values in axes]
+        self.rng = np.random.default_rng(seed)
+        self.length_scale = length_scale
+        self.noise = noise
+        total = math.prod(self.sizes)
+        if total <= 20000:
+            grid = np.array(list(itertools.product(*[range(n) for n in self.sizes])))
+        else:
+            grid = np.stack([self.rng.integers(0, n, 5000) for n in self.sizes], axis=1)
+        self.candidates = grid
+
+    def _encode(self, idx: np.ndarray) -> np.ndarray:
+        return idx / np.maximum(np.array(self.sizes) - 1, 1)
+
+    def _kernel(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        sq = ((a[:, None, :] - b[None, :, :]) ** 2).sum(-1)
+        return np.exp(-0.5 * sq / self.length_scale**2)
+
+    def propose(self, done: List[Tuple[Tuple[int, ...], float, float]], n: int) -> List[Tuple[int, ...]]:
+        seen = {d[0] for d in done}
+        pool = [c for c in map(tuple, self.candidates) if c not in seen]
+        if not pool:
+            return []
+        if len(done) < 4:
+            picks = self.rng.choice(len(pool), size=min(n, len(pool)), replace=False)
+            return [pool[i] for i in picks]
+        X = self._encode(np.array([d[0] for d in done], dtype=np.float64))
+        acc = np.array([d[1] for d in done])
+        fps = np.log(np.maximum([d[2] for d in done], 1e-6))
+        norm = lambda v: (v - v.min()) / (np.ptp(v) or 1.0)  # noqa: E731
+        C = self._encode(np.array(pool, dtype=np.float64))
+        K = self._kernel(X, X) + self.noise * np.eye(len(X))
+        K_inv = np.linalg.inv(K)
+        Ks = self._kernel(C, X)
+        var = np.maximum(1.0 - np.einsum("ij,jk,ik->i", Ks, K_inv, Ks), 1e-12)
+        proposals: List[Tuple[int, ...]] = []
+        taken = set()
+        for _ in range(n):
+            w = self.rng.uniform()
+            y = w * norm(acc) + (1 - w) * norm(fps)
+            mean_y = y.mean()
+            mu = Ks @ K_inv @ (y - mean_y) + mean_y
+            sigma = np.sqrt(var)
+            z = (mu - y.max()) / sigma
+            ei = (mu - y.max()) * _norm_cdf(z) + sigma * np.exp(-0.5 * z**2) / math.sqrt(2 * math.pi)
+            for i in np.argsort(ei)[::-1]:
+                if i not in taken:
+                    taken.add(int(i))
+                    proposals.append(pool[int(i)])
+                    break
+        return proposals
+
+
+def _norm_cdf(z: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.vectorize(math.erf)(z / math.sqrt(2.0)))
+
+
+def format_front(front: List[Dict[str, object]], chosen: Dict[str, object]) -> str:
+    lines = [f"  {'config':56s} {'fps':>7s} {'p90ms':>7s} {'recall':>7s}"]
+    for r in front:
+        mark = "*" if r is chosen else " "
+        lines.append(
+            f"{mark} {r['name'][:56]:56s} {r['throughput_fps']:7.1f} {r['latency_ms']['p90']:7.1f} {r['accuracy']:7.3f}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Search detector/camera settings for the best speed/recall trade-off.")
+    p.add_argument("--video", action="append", default=[], help="Recorded clip (repeatable).")
+    p.add_argument(
+        "--images",
+        type=str,
+        default=None,
+        help="Image directory with YOLO labels (default: bundled Yolo_face_recognition_trained_50/images/val).",
+    )
+    p.add_argument("--grid", action="append", default=[], help="field=v1,v2,... (camera.width=... for camera fields).")
+    p.add_argument("--search", choices=("grid", "bayes"), default="grid")
+    p.add_argument("--trials", type=int, default=24, help="Configurations to evaluate with --search bayes.")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Configurations evaluated in parallel.")
+    p.add_argument("--max-frames", type=int, default=0, help="Frames per source (0 = all).")
+    p.add_argument("--recall-slack", type=float, default=0.05, help="Accept this much less recall for speed.")
+    p.add_argument("--out", type=str, default="tuned_config.json", help="Chosen settings, for test.py --config.")
+    p.add_argument("--json", type=str, default=None, help="Write every evaluated configuration here.")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+    images = args.images
+    if images is None and not args.video:
+        images = str(PROJECT_ROOT / "Yolo_face_recognition_trained_50" / "images" / "val")
+    samples = load_samples(args.video, images, args.max_frames)
+    if not samples:
+        raise SystemExit("No frames to tune on")
+    axes = parse_grid(args.grid or DEFAULT_GRID)
+    log.info("Tuning on %d frames over %s", len(samples), ", ".join(f"{s}.{n}" for s, n, _ in axes))
+
+    results: List[Dict[str, object]] = []
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(samples,)) as pool:
+        if args.search == "grid":
+            points = [point_from_indices(axes, idx) for idx in itertools.product(*[range(len(v)) for _, _, v in axes])]
+            results = list(pool.map(_run_point, points))
+        else:
+            search = BayesSearch(axes)
+            done: List[Tuple[Tuple[int, ...], float, float]] = []
+            while len(done) < args.trials:
+                batch = search.propose(done, min(args.jobs, args.trials - len(done)))
+                if not batch:
+                    break
+                for idx, result in zip(batch, pool.map(_run_point, [point_from_indices(axes, i) for i in batch])):
+                    done.append((idx, result["accuracy"], result["throughput_fps"]))
+                    results.append(result)
+                    log.info("%s: %.1f fps, recall %.3f", result["name"], result["throughput_fps"], result["accuracy"])
+
+    front = pareto_front(results)
+    chosen = choose(front, args.recall_slack)
+    print(f"Pareto front ({len(front)} of {len(results)} configurations, * = chosen):")
+    print(format_front(front, chosen))
+    point = chosen["point"]
+    camera = point.get("camera", {})
+    if "width" in camera and "height" not in camera:
+        # Keep the clips' aspect ratio, as rescale() did
+        h, w = samples[0][1].shape[:2]
+        camera["height"] = max(1, round(h * min(camera["width"], w) / w))
+    save_config(args.out, point)
+    log.info("Wrote %s (load with: python test/test.py --config %s)", args.out, args.out)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"results": results, "chosen": chosen["name"]}, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,31 +12,82 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from app.config import AppConfig
+from app.config import AppConfig, load_config
+from app.runtime import run_app
 from app.tracker import TrackerApp
 
 
 def parse_args():
     p = argparse.ArgumentParser(description="Run face tracker (app modules).")
+    p.add_argument("--config", type=str, default=None, help="JSON settings file (e.g. from test/autotune.py).")
     p.add_argument("--camera-index", type=int, default=None, help="Camera index (override config)")
     p.add_argument("--width", type=int, default=None, help="Camera width (override config)")
     p.add_argument("--height", type=int, default=None, help="Camera height (override config)")
     p.add_argument("--fps", type=int, default=None, help="Camera FPS (override config)")
+    p.add_argument("--threaded-camera", action="store_true", help="Grab frames on a background thread (newest wins).")
     p.add_argument(
         "--model",
         type=str,
         default=None,
-        choices=["hog", "cnn"],
-        help="face_recognition model backend (hog=CPU, cnn=GPU/NEON). Overrides config.",
+        choices=["hog", "cnn", "yolo"],
+        help="Detector backend (hog=CPU, cnn=GPU/NEON, yolo=ONNX via cv2.dnn). Overrides config.",
     )
+    p.add_argument("--onnx-path", type=str, default=None, help="YOLO ONNX model path (with --model yolo).")
+    p.add_argument("--det-conf", type=float, default=None, help="YOLO confidence threshold (override config).")
     p.add_argument("--upsample", type=int, default=None, help="Number of upsampling passes for detection.")
     p.add_argument("--det-resize-width", type=int, default=None, help="Resize frame width before detection for speed.")
+    p.add_argument("--det-workers", type=int, default=None, help="Detector worker processes (0 = single thread).")
+    p.add_argument("--adaptive", action="store_true", help="Adapt resize width/upsample to a latency budget.")
+    p.add_argument("--tiles", action="store_true", help="Tiled small-face search under a time budget.")
+    p.add_argument("--roi", action="store_true", help="Detect around the last face with periodic full-frame sweeps.")
+    p.add_argument("--track", action="store_true", help="Detect-then-track: optical-flow tracking between detections.")
+    p.add_argument("--multi-track", action="store_true", help="Stable face track ids and a sticky target (no flip-flopping).")
+    p.add_argument("--detect-every", type=int, default=None, help="Full detection cadence in frames when tracking.")
+    p.add_argument(
+        "--motor-driver",
+        type=str,
+        default=None,
+        choices=["gpio", "wave"],
+        help="Step driver: gpio (per-step pulses) or wave (precompiled pigpio pulse trains).",
+    )
+    p.add_argument("--identify", action="store_true", help="Prefer enrolled people (see --gallery) as the target.")
+    p.add_argument("--gallery", type=str, default=None, help="Known-faces directory (<name>/*.jpg).")
+    p.add_argument("--follow", type=str, default=None, help="Comma-separated names to follow (default: anyone enrolled).")
+    p.add_argument("--predict", action="store_true", help="Kalman-predicted, latency-compensated control.")
+    p.add_argument("--motion-gate", action="store_true", help="Skip detection on static scenes, idle at low FPS.")
+    p.add_argument("--async-motion", action="store_true", help="Non-blocking motion thread with acceleration ramps.")
+    p.add_argument("--headless", action="store_true", help="No windows and no overlay drawing.")
+    p.add_argument("--preview-port", type=int, default=None, help="Serve an MJPEG preview on this port.")
+    p.add_argument("--preview-host", type=str, default=None, help="Preview bind address (0.0.0.0 for LAN access).")
+    p.add_argument("--metrics", action="store_true", help="Record per-stage latency histograms and log summaries.")
+    p.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this local port.")
+    p.add_argument("--record", type=str, default=None, help="Write a flight recording (replay: python -m app.replay).")
+    p.add_argument(
+        "--frame-bus",
+        type=str,
+        default=None,
+        help="Publish frames and detections to this shared-memory segment (read: python -m app.frame_bus --name ...).",
+    )
+    p.add_argument(
+        "--runtime",
+        type=str,
+        default=None,
+        choices=["loop", "async"],
+        help="loop (single while loop) or async (asyncio task per stage with latest-value channels).",
+    )
+    p.add_argument(
+        "--channel-policy",
+        type=str,
+        default=None,
+        choices=["latest", "drop_oldest", "block"],
+        help="Async runtime frame/detection channels: keep newest, bounded FIFO, or backpressure.",
+    )
     p.add_argument("--timeout", type=float, default=None, help="Seconds until light off/home when no face (override config).")
     return p.parse_args()
 
 
 def build_config(args) -> AppConfig:
-    cfg = AppConfig()
+    cfg = load_config(args.config) if args.config else AppConfig()
     if args.camera_index is not None:
         cfg.camera.device_index = args.camera_index
     if args.width is not None:
@@ -45,14 +96,66 @@ def build_config(args) -> AppConfig:
         cfg.camera.height = args.height
     if args.fps is not None:
         cfg.camera.fps = args.fps
+    if args.threaded_camera:
+        cfg.camera.threaded = True
     if args.model is not None:
         cfg.detector.model = args.model
+    if args.onnx_path is not None:
+        cfg.detector.onnx_path = args.onnx_path
+    if args.det_conf is not None:
+        cfg.detector.conf_threshold = args.det_conf
     if args.upsample is not None:
         cfg.detector.upsample = args.upsample
     if args.det_resize_width is not None:
         cfg.detector.resize_width = args.det_resize_width
+    if args.det_workers is not None:
+        cfg.detector.process_workers = args.det_workers
+    if args.adaptive:
+        cfg.scheduler.enabled = True
+    if args.tiles:
+        cfg.detector.tile_enabled = True
+    if args.roi:
+        cfg.detector.roi_enabled = True
+    if args.track:
+        cfg.tracking.enabled = True
+    if args.multi_track:
+        cfg.multi_track.enabled = True
+    if args.detect_every is not None:
+        cfg.tracking.detect_every_n = args.detect_every
+    if args.motor_driver is not None:
+        cfg.control.driver = args.motor_driver
+    if args.identify or args.gallery or args.follow:
+        cfg.identity.enabled = True
+    if args.gallery is not None:
+        cfg.identity.gallery_dir = args.gallery
+    if args.follow is not None:
+        cfg.identity.targets = tuple(n.strip() for n in args.follow.split(",") if n.strip())
+    if args.predict:
+        cfg.estimator.enabled = True
+    if args.motion_gate:
+        cfg.motion_gate.enabled = True
+    if args.async_motion:
+        cfg.control.async_motion = True
+    if args.headless:
+        cfg.display.mode = "headless"
+    if args.preview_port is not None:
+        cfg.display.preview_port = args.preview_port
+    if args.preview_host is not None:
+        cfg.display.preview_host = args.preview_host
+    if args.metrics or args.metrics_port:
+        cfg.metrics.enabled = True
+    if args.metrics_port is not None:
+        cfg.metrics.http_port = args.metrics_port
     if args.timeout is not None:
         cfg.control.timeout_no_person_s = args.timeout
+    if args.record is not None:
+        cfg.recorder.path = args.record
+    if args.frame_bus is not None:
+        cfg.frame_bus.name = args.frame_bus
+    if args.runtime is not None:
+        cfg.runtime.mode = args.runtime
+    if args.channel_policy is not None:
+        cfg.runtime.channel_policy = args.channel_policy
     return cfg
 
 
@@ -60,7 +163,7 @@ def main():
     args = parse_args()
     cfg = build_config(args)
     app = TrackerApp(cfg)
-    app.run()
+    run_app(app)
 
 
 if __name__ == "__main__":